@@ -1,42 +1,107 @@
+import time
+
+SCRIPT_START = time.perf_counter()
+# Model calls made by this script run; every widget interaction reruns the script
+rerun_stats = {"model_calls": 0}
+
 import streamlit as st
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
-import cv2
-import tensorflow as tf
 import random
-import time
-import pandas as pd
+
+import config
+import startup
+from model_registry import ModelRegistry
+from prediction import predict_batch
+from results import PredictionResult
+from preprocessing import PIPELINES, preprocess_image
+from result_cache import ResultCache, cache_key
+from segmentation import read_line
+from samples import load_az_dataset_samples, load_emnist_style_samples, create_realistic_alphabet_samples, load_mnist_test_set
+
+# Heavy dependencies are imported on first use, not at startup
+Image = startup.lazy_import("PIL.Image")
 
 # ---------------------------
 # Load Models
 # ---------------------------
+MODEL_SPECS = {
+    "digit": {
+        "path": config.MODEL_PATHS["digit"],
+        "name": "MNIST CNN Model",
+        "info": "Convolutional Neural Network for Digit Recognition (0-9)"
+    },
+    "alphabet": {
+        "path": config.MODEL_PATHS["alphabet"],
+        "name": "Arpit Alphabet Model",
+        "info": "Deep Learning Model for Alphabet Recognition (A-Z)"
+    }
+}
+
 @st.cache_resource
-def load_models():
-    """Load both AI models - digit and alphabet recognition"""
-    try:
-        digit_model = tf.keras.models.load_model("mnist_cnn_model.h5")
-        digit_model_name = "MNIST CNN Model"
-        digit_model_info = "Convolutional Neural Network for Digit Recognition (0-9)"
-    except Exception as e:
-        digit_model = None
-        digit_model_name = "MNIST CNN Model (Not Available)"
-        digit_model_info = f"Model file not found: {str(e)}"
+def get_registry():
+    """Process-wide model registry; models load on first use of their mode and hot-reload in the background"""
+    registry = ModelRegistry(MODEL_SPECS)
+    registry.start_watcher()
+    return registry
 
+@st.cache_resource
+def get_result_cache():
+    """Process-wide cache of preprocessed images and predictions for camera frames and uploads, shared by all sessions"""
+    return ResultCache()
+
+def get_model(mode):
+    """Return the active model entry for a mode, loading and warming it with a spinner the first time"""
+    registry = get_registry()
+    entry = registry.entry(mode)
+    if entry is not None:
+        return entry
+    with st.spinner(f"⏳ Loading and warming up {MODEL_SPECS[mode]['name']}..."):
+        return registry.load(mode)
+
+def model_load_state(mode):
+    """Human-readable load state of a mode's model for the sidebar"""
+    entry = get_registry().entry(mode)
+    if entry is None:
+        return "⚪ Not loaded (loads on first use)"
+    if entry["model"] is None:
+        return "🔴 Failed to load"
+    precision = f", {entry['precision']}" if entry["precision"] not in (None, "float32") else ""
+    state = (
+        f"🟢 Version {entry['version']}{precision}, loaded in {entry['load_time']:.2f}s, "
+        f"warmed up in {entry['warmup_time']:.2f}s"
+    )
+    if hasattr(entry["model"], "hit_rate"):
+        state += f", cascade answered {entry['model'].hit_rate():.0%} from the first stage"
+    return state
+
+def analyze_model_output(model, mode="alphabet", entry=None):
+    """Analyze model structure to understand output format, plus the active version when an entry is given"""
     try:
-        alphabet_model = tf.keras.models.load_model("arpit.h5")
-        alphabet_model_name = "Arpit Alphabet Model"
-        alphabet_model_info = "Deep Learning Model for Alphabet Recognition (A-Z)"
-    except Exception as e:
-        alphabet_model = None
-        alphabet_model_name = "Arpit Alphabet Model (Not Available)"
-        alphabet_model_info = f"Model file not found: {str(e)}"
+        if model is None:
+            return "Model not loaded"
 
-    return {
-        "digit": {"model": digit_model, "name": digit_model_name, "info": digit_model_info},
-        "alphabet": {"model": alphabet_model, "name": alphabet_model_name, "info": alphabet_model_info}
-    }
+        # Get model summary info
+        model_info = {
+            "input_shape": model.input_shape,
+            "output_shape": model.output_shape,
+            "num_classes": model.output_shape[-1] if model.output_shape else "Unknown"
+        }
+
+        # Registry details let latency and accuracy changes be matched to model rollouts
+        if entry is not None:
+            model_info.update({
+                "version": entry["version"],
+                "sha256": entry["sha256"],
+                "path": entry["path"],
+                "backend": entry["backend"],
+                "precision": entry["precision"],
+                "precision_check": entry["precision_check"],
+                "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["loaded_at"]))
+            })
 
-models = load_models()
+        return model_info
+    except Exception as e:
+        return f"Error analyzing model: {str(e)}"
 
 # ---------------------------
 # Page Config
@@ -704,35 +769,37 @@ with st.sidebar:
     if 'recognition_type' in locals():
         if recognition_type == "🔢 Digit Recognition (0-9)":
             st.info("🔢 **Active**: Digit Recognition System")
-            if models["digit"]["model"] is not None:
-                st.success(f"✓ {models['digit']['name']}")
-                st.caption(models['digit']['info'])
+            if get_model("digit")["model"] is not None:
+                st.success(f"✓ {get_model('digit')['name']}")
+                st.caption(get_model('digit')['info'])
+                st.caption(f"⚙️ Inference backend: {get_model('digit')['backend']}")
 
                 # Model analysis
                 if st.button("🔍 Analyze Digit Model"):
-                    model_info = analyze_model_output(models["digit"]["model"], "digit")
+                    model_info = analyze_model_output(get_model("digit")["model"], "digit", get_model("digit"))
                     st.json(model_info)
             else:
-                st.error(f"❌ {models['digit']['name']}")
+                st.error(f"❌ {get_model('digit')['name']}")
                 st.caption("Model not available")
         else:
             st.info("🔤 **Active**: Alphabet Recognition System")
-            if models["alphabet"]["model"] is not None:
-                st.success(f"✓ {models['alphabet']['name']}")
-                st.caption(models['alphabet']['info'])
+            if get_model("alphabet")["model"] is not None:
+                st.success(f"✓ {get_model('alphabet')['name']}")
+                st.caption(get_model('alphabet')['info'])
+                st.caption(f"⚙️ Inference backend: {get_model('alphabet')['backend']}")
 
                 # Model analysis
                 if st.button("🔍 Analyze Alphabet Model"):
-                    model_info = analyze_model_output(models["alphabet"]["model"], "alphabet")
+                    model_info = analyze_model_output(get_model("alphabet")["model"], "alphabet", get_model("alphabet"))
                     st.json(model_info)
             else:
-                st.error(f"❌ {models['alphabet']['name']}")
+                st.error(f"❌ {get_model('alphabet')['name']}")
                 st.caption("Model not available")
 
     st.markdown("### <i class='fas fa-chart-line'></i> System Status")
     if 'recognition_type' in locals():
-        if ((recognition_type == "🔢 Digit Recognition (0-9)" and models["digit"]["model"] is not None) or
-            (recognition_type == "🔤 Alphabet Recognition (A-Z)" and models["alphabet"]["model"] is not None)):
+        if ((recognition_type == "🔢 Digit Recognition (0-9)" and get_model("digit")["model"] is not None) or
+            (recognition_type == "🔤 Alphabet Recognition (A-Z)" and get_model("alphabet")["model"] is not None)):
             st.success("🟢 AI Model: Online")
         else:
             st.error("🔴 AI Model: Offline")
@@ -875,7 +942,7 @@ if recognition_type == "🔢 Digit Recognition (0-9)":
         """,
         unsafe_allow_html=True
     )
-    current_model = models["digit"]
+    current_model = get_model("digit")
     recognition_mode = "digit"
 
 elif recognition_type == "🔤 Alphabet Recognition (A-Z)":
@@ -888,9 +955,18 @@ elif recognition_type == "🔤 Alphabet Recognition (A-Z)":
         """,
         unsafe_allow_html=True
     )
-    current_model = models["alphabet"]
+    current_model = get_model("alphabet")
     recognition_mode = "alphabet"
 
+# Report per-mode model load state now that the active mode's model is loaded
+with st.sidebar:
+    st.markdown("### <i class='fas fa-database'></i> Model Load State", unsafe_allow_html=True)
+    for mode, spec in MODEL_SPECS.items():
+        st.caption(f"**{spec['name']}**: {model_load_state(mode)}")
+    if current_model["model"] is not None:
+        with st.expander("🔍 Active Model Details"):
+            st.json(analyze_model_output(current_model["model"], recognition_mode, current_model))
+
 # ---------------------------
 # Preprocessing & Prediction
 # ---------------------------
@@ -940,385 +1016,158 @@ def assess_image_quality(img_array, mode="digit"):
 
     return quality_score, issues, recommendations
 
-def preprocess_image_with_steps(img, mode="digit"):
-    """Enhanced preprocessing with step-by-step visualization"""
-    steps = {}
-
-    # Step 1: Convert to grayscale
-    img_gray = img.convert("L") if img.mode != "L" else img
-    img_array = np.array(img_gray)
-    steps['original'] = img_array.copy()
-
-    if mode == "alphabet":
-        # For alphabet recognition - threshold first, then invert
-        # Step 2: Apply threshold to clean up the image first
-        _, binary_img = cv2.threshold(img_array, 127, 255, cv2.THRESH_BINARY)
-        steps['thresholded'] = binary_img.copy()
-
-        # Step 3: Check and invert if needed (after thresholding)
-        mean_val = np.mean(binary_img)
-        if mean_val > 127:  # If background is light after thresholding
-            inverted_img = 255 - binary_img  # Invert to black background
-            steps['inverted'] = inverted_img.copy()
-        else:
-            inverted_img = binary_img.copy()
-            steps['inverted'] = inverted_img.copy()
-
-        # Step 4: Resize to 28x28 (using inverted image)
-        resized_img = cv2.resize(inverted_img, (28, 28), interpolation=cv2.INTER_AREA)
-        steps['resized'] = resized_img.copy()
-
-        # Step 5: Normalize to 0-1 range
-        norm_img = resized_img.astype(np.float32) / 255.0
-        steps['normalized'] = norm_img.copy()
-
-    else:
-        # For digit recognition - original preprocessing
-        # Step 2: Apply threshold
-        _, binary_img = cv2.threshold(img_array, 127, 255, cv2.THRESH_BINARY)
-        steps['thresholded'] = binary_img.copy()
-
-        # Step 3: Invert colors
-        inverted_img = cv2.bitwise_not(binary_img)
-        steps['inverted'] = inverted_img.copy()
-
-        # Step 4: Resize to 28x28
-        resized_img = cv2.resize(inverted_img, (28, 28), interpolation=cv2.INTER_AREA)
-        steps['resized'] = resized_img.copy()
-
-        # Step 5: Normalize to 0-1 range
-        norm_img = resized_img.astype(np.float32) / 255.0
-        steps['normalized'] = norm_img.copy()
-
-    return norm_img, steps
-
-def preprocess_image(img, mode="digit"):
-    """Enhanced preprocessing for both digit and alphabet recognition"""
-    norm_img, _ = preprocess_image_with_steps(img, mode)
-    return norm_img
-
-def preprocess_alphabet_image(img):
-    """Specific preprocessing for alphabet recognition: Threshold → Invert → Resize → Normalize"""
-    # Convert to grayscale
-    img_gray = img.convert("L") if img.mode != "L" else img
-    img_array = np.array(img_gray)
-
-    # Step 1: Apply threshold first (127 threshold for clear separation)
-    _, binary_img = cv2.threshold(img_array, 127, 255, cv2.THRESH_BINARY)
-
-    # Step 2: Check and invert if needed (after thresholding)
-    mean_val = np.mean(binary_img)
-    if mean_val > 127:  # If background is light after thresholding
-        inverted_img = 255 - binary_img  # Invert to black background, white text
-    else:
-        inverted_img = binary_img.copy()
-
-    # Step 3: Resize to 28x28
-    resized_img = cv2.resize(inverted_img, (28, 28), interpolation=cv2.INTER_AREA)
-
-    # Step 4: Normalize to 0-1 range
-    norm_img = resized_img.astype(np.float32) / 255.0
-
-    return norm_img
+def show_stage_timings(pipeline_run):
+    """Debug view of a preprocessing run: this image's stage timings next to the process-wide means"""
+    means = pipeline_run.pipeline.mean_timings()
+    st.write(f"⏱️ **Preprocessing Stages** ({pipeline_run.total_ms():.1f} ms):")
+    for name, ms in pipeline_run.timings.items():
+        st.write(f"- {name.title()}: {ms:.2f} ms (mean {means.get(name, ms):.2f} ms)")
+
+def show_prediction_debug(img_array, model, result):
+    """Debug view of one prediction: the model input and the top-k analysis of its result"""
+    st.write(f"🔍 **Debug Info:**")
+    st.write(f"- Input shape: {img_array.shape}")
+    st.write(f"- Input range: [{img_array.min():.3f}, {img_array.max():.3f}]")
+    st.write(f"- Model input shape: {model.input_shape}")
+    st.write(f"- Model output shape: {model.output_shape}")
+    st.write(f"- Number of output classes: {len(result.probabilities)}")
+    st.write(f"- Predicted class: {result.class_index}")
+    st.write(f"- Top {len(result.top_k)} predictions: {', '.join(f'{label} ({score:.3f})' for label, score in result.top_k)}")
+    st.write(f"- Top-1/top-2 margin: {result.margin:.3f}")
+
+def predict_character(img_array, model, mode="digit", debug=False, labels=None):
+    """Enhanced prediction function with better preprocessing and model handling
+
+    A single-image wrapper over predict_batch. Returns a PredictionResult,
+    which still unpacks as (label, confidence). `labels` is the model's label
+    table from the registry entry.
+    """
+    if model is None:
+        return PredictionResult.unavailable(None)
 
-def load_az_dataset_samples():
-    """Load samples from A_Z Handwritten Data.csv dataset"""
     try:
-        import pandas as pd
-
-        # Load the A_Z dataset
-        df = pd.read_csv("A_Z Handwritten Data.csv")
-
-        # Get unique labels and select 5 random samples
-        alphabet_samples = {}
-        letters = ['A', 'B', 'C', 'D', 'E']  # Only 5 samples as requested
-
-        for letter in letters:
-            # Convert letter to numeric label (A=0, B=1, etc.)
-            label_num = ord(letter) - ord('A')
+        rerun_stats["model_calls"] += 1
+        result = predict_batch([img_array], mode, model, labels)[0]
 
-            # Filter data for this letter
-            letter_data = df[df.iloc[:, 0] == label_num]
-
-            if len(letter_data) > 0:
-                # Select a random sample
-                sample_idx = random.randint(0, len(letter_data) - 1)
-                sample_row = letter_data.iloc[sample_idx]
-
-                # Extract pixel values (assuming columns 1-784 contain pixel data)
-                pixel_values = sample_row.iloc[1:].values
-
-                # Reshape to 28x28 image
-                img_array = pixel_values.reshape(28, 28).astype(np.uint8)
-
-                alphabet_samples[letter] = img_array
-            else:
-                # Fallback: create a simple letter if no data found
-                img = Image.new('L', (28, 28), color=0)
-                draw = ImageDraw.Draw(img)
-                try:
-                    font = ImageFont.truetype("arial.ttf", 18)
-                except:
-                    font = ImageFont.load_default()
-
-                bbox = draw.textbbox((0, 0), letter, font=font)
-                text_width = bbox[2] - bbox[0]
-                text_height = bbox[3] - bbox[1]
-                x = (28 - text_width) // 2
-                y = (28 - text_height) // 2
-
-                draw.text((x, y), letter, fill=255, font=font)
-                alphabet_samples[letter] = np.array(img)
+        # Debug information
+        if debug:
+            show_prediction_debug(img_array, model, result)
 
-        return alphabet_samples, True
+        return result
 
     except Exception as e:
-        st.error(f"❌ Could not load A_Z dataset: {str(e)}")
-        return {}, False
+        st.error(f"Prediction error: {str(e)}")
+        return PredictionResult.unavailable("Error")
 
-def load_emnist_style_samples():
-    """Load EMNIST-style alphabet samples for realistic testing"""
-    try:
-        # In a real implementation, you would use:
-        # pip install extra-keras-datasets
-        # from extra_keras_datasets import emnist
-        # (x_train, y_train), (x_test, y_test) = emnist.load_data(type='letters')
-
-        # For now, we'll create realistic EMNIST-style samples
-        alphabet_samples = {}
-        letters = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T']
-
-        for i, letter in enumerate(letters):
-            # Create realistic handwritten-style letters
-            img = Image.new('L', (28, 28), color=0)  # Black background
-            draw = ImageDraw.Draw(img)
-
-            # Use different fonts and add variations for realism
-            try:
-                fonts = ["arial.ttf", "calibri.ttf", "times.ttf", "georgia.ttf"]
-                font_choice = fonts[i % len(fonts)]
-                font_size = 12 + (i % 8)  # Vary font size (12-19)
-                font = ImageFont.truetype(font_choice, font_size)
-            except:
-                font = ImageFont.load_default()
-
-            # Add position variations to simulate handwriting
-            bbox = draw.textbbox((0, 0), letter, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-            x = (28 - text_width) // 2 + random.randint(-4, 4)  # Position variation
-            y = (28 - text_height) // 2 + random.randint(-4, 4)  # Position variation
-
-            # Ensure text stays within bounds
-            x = max(0, min(x, 28 - text_width))
-            y = max(0, min(y, 28 - text_height))
-
-            draw.text((x, y), letter, fill=255, font=font)
-
-            # Add realistic variations
-            img_array = np.array(img)
-
-            # Add slight noise for realism (simulating EMNIST characteristics)
-            if random.random() > 0.3:  # Add noise to most samples
-                noise = np.random.normal(0, 12, img_array.shape)
-                img_array = np.clip(img_array + noise, 0, 255).astype(np.uint8)
-
-            # Add slight rotation for some samples
-            if random.random() > 0.6:
-                angle = random.randint(-15, 15)
-                img_pil = Image.fromarray(img_array)
-                img_pil = img_pil.rotate(angle, fillcolor=0)
-                img_array = np.array(img_pil)
-
-            alphabet_samples[letter] = img_array
-
-        return alphabet_samples, True
+def cached_prediction(pipeline_run, data, model_entry, capture_steps=False):
+    """Preprocess and predict a camera frame or upload, reusing the shared result cache for bytes seen before
 
-    except Exception as e:
-        return {}, False
-
-def create_realistic_alphabet_samples():
-    """Create realistic alphabet samples based on provided images"""
-    alphabet_samples = {}
-
-    # Sample B - based on your provided image
-    b_pattern = np.array([
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-    ], dtype=np.uint8)
-    alphabet_samples['B'] = b_pattern
-
-    # Sample M - based on your provided image
-    m_pattern = np.array([
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 255, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 255, 255, 255, 0, 0, 0, 0, 0, 0, 255, 255, 255, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 0, 255, 255, 255, 0, 0, 0, 0, 255, 255, 255, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 0, 0, 255, 255, 255, 0, 0, 255, 255, 255, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
-    ], dtype=np.uint8)
-    alphabet_samples['M'] = m_pattern
-
-    # Add more letters using font rendering for variety
-    additional_letters = ['A', 'C', 'E', 'F', 'G', 'H', 'I', 'J', 'L', 'P', 'T', 'D']
-    for letter in additional_letters:
-        img = Image.new('L', (28, 28), color=0)  # Black background
-        draw = ImageDraw.Draw(img)
+    Returns (entry, hit): the entry holds the "processed" 28x28 image, the
+    "result" and the captured "steps" (None if they were never asked for).
+    A hit that lacks requested steps reruns preprocessing for them but still
+    reuses the cached prediction. Failed predictions are not cached.
+    """
+    cache = get_result_cache()
+    roi, threshold = config.PREPROCESS_ROI, config.THRESHOLD_METHOD
+    key = cache_key(data, pipeline_run.mode, model_entry, roi, threshold)
+    entry = cache.get(key)
+    if entry is not None and (entry["steps"] is not None or not capture_steps):
+        return entry, True
+
+    processed_img, steps = pipeline_run.finish(capture_steps, roi=roi, threshold=threshold)
+    if entry is None:
+        result = predict_character(processed_img, model_entry["model"], pipeline_run.mode, labels=model_entry["labels"])
+        entry = {"processed": processed_img, "result": result, "steps": None}
+    entry = dict(entry, steps=steps if capture_steps else None)
+    if entry["result"].class_index is not None:
+        cache.put(key, entry)
+    return entry, False
+
+def input_artifacts(source, upload, mode, model_entry):
+    """Decoded image, grayscale array and quality assessment of a camera frame or upload, kept in session state
+
+    Keyed by the upload's file id (with the mode and model version), so the
+    reruns caused by toggling debug or step display render from state instead
+    of decoding and assessing again. One slot per source ("camera", "upload")
+    holds only the current input. The prediction is filled in by
+    input_prediction, the line reading by show_line_result. Returns None,
+    after showing the error, if the image cannot be decoded.
+    """
+    key = (upload.file_id, mode, model_entry["version"])
+    artifacts = st.session_state.get(f"{source}_artifacts")
+    if artifacts is None or artifacts["key"] != key:
         try:
-            font = ImageFont.truetype("arial.ttf", 18)
-        except:
-            font = ImageFont.load_default()
-
-        bbox = draw.textbbox((0, 0), letter, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        x = (28 - text_width) // 2
-        y = (28 - text_height) // 2
-
-        draw.text((x, y), letter, fill=255, font=font)
-        alphabet_samples[letter] = np.array(img)
-
-    return alphabet_samples
-
-def analyze_model_output(model, mode="alphabet"):
-    """Analyze model structure to understand output format"""
-    try:
-        if model is None:
-            return "Model not loaded"
-
-        # Get model summary info
-        model_info = {
-            "input_shape": model.input_shape,
-            "output_shape": model.output_shape,
-            "num_classes": model.output_shape[-1] if model.output_shape else "Unknown"
+            pipeline_run = PIPELINES[mode].start(upload)
+        except Exception as e:
+            st.error(f"❌ **Could Not Open Image**: {str(e)}")
+            return None
+        img_array = np.array(pipeline_run.image.convert("L"))
+        artifacts = {
+            "key": key, "image": pipeline_run.image, "gray": img_array,
+            "quality": assess_image_quality(img_array, mode),
+            "pipeline_run": pipeline_run, "entry": None, "cache_hit": False, "line": None,
         }
+        st.session_state[f"{source}_artifacts"] = artifacts
+    return artifacts
 
-        return model_info
-    except Exception as e:
-        return f"Error analyzing model: {str(e)}"
-
-def predict_character(img_array, model, mode="digit", debug=False):
-    """Enhanced prediction function with better preprocessing and model handling"""
-    if model is None:
-        return None, 0.0
+def input_prediction(artifacts, upload, model_entry, capture_steps=False):
+    """The input's preprocessed image, result and steps, computed only when its session state lacks them
 
-    try:
-        # Ensure proper input format
-        if len(img_array.shape) == 2:
-            # If 2D array, add batch and channel dimensions
-            input_img = img_array.reshape(1, 28, 28, 1).astype("float32")
-        elif len(img_array.shape) == 3:
-            # If 3D array, add batch dimension
-            input_img = img_array.reshape(1, img_array.shape[0], img_array.shape[1], 1).astype("float32")
-        else:
-            # Already in correct format
-            input_img = img_array.astype("float32")
-
-        # Ensure values are in correct range (0-1)
-        if input_img.max() > 1.0:
-            input_img = input_img / 255.0
-
-        # Debug information
-        if debug:
-            st.write(f"🔍 **Debug Info:**")
-            st.write(f"- Input shape: {input_img.shape}")
-            st.write(f"- Input range: [{input_img.min():.3f}, {input_img.max():.3f}]")
-            st.write(f"- Model input shape: {model.input_shape}")
-            st.write(f"- Model output shape: {model.output_shape}")
-
-        # Get model prediction
-        prediction = model.predict(input_img, verbose=0)
-        predicted_class = int(np.argmax(prediction))
-        confidence = float(np.max(prediction))
-
-        if debug:
-            st.write(f"- Raw prediction shape: {prediction.shape}")
-            st.write(f"- Predicted class: {predicted_class}")
-            st.write(f"- Top 3 predictions: {np.argsort(prediction[0])[-3:][::-1]}")
-            st.write(f"- Top 3 confidences: {np.sort(prediction[0])[-3:][::-1]}")
-
-        if mode == "digit":
-            # For digits 0-9
-            predicted_char = str(predicted_class)
-        elif mode == "alphabet":
-            # For alphabet recognition - check model output classes
-            num_classes = prediction.shape[1]
-
-            if debug:
-                st.write(f"- Number of output classes: {num_classes}")
-
-            if num_classes == 26:
-                # Standard A-Z mapping (A=0, B=1, ..., Z=25)
-                if predicted_class < 26:
-                    predicted_char = chr(ord('A') + predicted_class)
-                else:
-                    predicted_char = "Unknown"
-            elif num_classes == 27:
-                # Some models include space or special character
-                if predicted_class < 26:
-                    predicted_char = chr(ord('A') + predicted_class)
-                else:
-                    predicted_char = "Special"
-            else:
-                # Custom mapping - try standard A-Z first
-                if predicted_class < 26:
-                    predicted_char = chr(ord('A') + predicted_class)
-                else:
-                    predicted_char = f"Class_{predicted_class}"
-
-        return predicted_char, confidence
-
-    except Exception as e:
-        st.error(f"Prediction error: {str(e)}")
-        return "Error", 0.0
+    Preprocessing goes through cached_prediction, so a new file id with
+    bytes seen before still skips the model. A run can only be finished once,
+    so a later request for steps starts a new one from the decoded image.
+    """
+    entry = artifacts["entry"]
+    if entry is None or (capture_steps and entry["steps"] is None):
+        if artifacts["pipeline_run"].array is not None:
+            artifacts["pipeline_run"] = PIPELINES[artifacts["pipeline_run"].mode].start(artifacts["image"])
+        artifacts["entry"], artifacts["cache_hit"] = cached_prediction(artifacts["pipeline_run"], upload.getvalue(), model_entry, capture_steps)
+    return artifacts["entry"]
+
+def sample_prediction_state(slot, model_entry):
+    """A dataset sample's stored prediction, dropped once the model version it came from is swapped out"""
+    sample_prediction = st.session_state.get(slot)
+    if sample_prediction is not None and sample_prediction["version"] != model_entry["version"]:
+        del st.session_state[slot]
+        return None
+    return sample_prediction
+
+def show_line_result(artifacts, model_entry, mode):
+    """Read a camera frame or upload as a line of characters and show the string, each character and its box
+
+    All characters go through the model in one batched call; the result is
+    kept in the input's session state like the single-character one.
+    """
+    st.markdown("#### 🔡 Line Reading")
+    if artifacts["line"] is None:
+        try:
+            artifacts["line"] = read_line(
+                artifacts["image"], mode, model_entry["model"], model_entry["labels"],
+                threshold=config.THRESHOLD_METHOD, capture_steps=True,
+            )
+            rerun_stats["model_calls"] += 1
+        except Exception as e:
+            st.error(f"❌ **Line Reading Error**: {str(e)}")
+            return
+    line, steps = artifacts["line"]
+
+    if not len(line):
+        st.warning("⚠️ No characters found in the image")
+        return
+    st.success(f"**{line.text}** ({len(line)} characters, lowest confidence {min(line.confidences):.1%})")
+    st.image(
+        np.hsplit(steps["resized"], len(line)),
+        caption=[f"{result.label} ({result.confidence:.0%})" for result in line.characters],
+        width=56,
+    )
+    with st.expander("📦 Character Boxes"):
+        st.dataframe(
+            [
+                {"Character": result.label, "Confidence": f"{result.confidence:.1%}", "Top": top, "Bottom": bottom, "Left": left, "Right": right}
+                for result, (top, bottom, left, right) in zip(line.characters, line.boxes)
+            ],
+            hide_index=True,
+        )
 
 # ---------------------------
 # Professional Guidelines Section
@@ -1396,25 +1245,28 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
             unsafe_allow_html=True
         )
         camera_img = st.camera_input(f"📷 Capture Handwritten {char_type.title()}", help=f"Position {char_type} clearly in center of frame")
-        if camera_img:
-            image = Image.open(camera_img)
+        artifacts = input_artifacts("camera", camera_img, recognition_mode, current_model) if camera_img else None
+        if artifacts is not None:
+            image = artifacts["image"]
 
             # Immediate prediction for camera capture
             if current_model["model"] is not None:
                 st.markdown("### 🎯 Instant Prediction Results")
 
-                # Add debug and preprocessing visualization toggles
-                col_debug1, col_debug2 = st.columns(2)
+                # Add debug, preprocessing visualization and line reading toggles
+                col_debug1, col_debug2, col_debug3 = st.columns(3)
                 with col_debug1:
                     debug_camera = st.checkbox("🔍 Enable Debug Mode (Camera)", key="debug_camera", help="Show detailed prediction analysis for camera capture")
                 with col_debug2:
                     show_steps = st.checkbox("👁️ Show Preprocessing Steps", key="steps_camera", help="Visualize image preprocessing pipeline")
+                with col_debug3:
+                    read_line_camera = st.checkbox("🔡 Read Whole Line", key="line_camera", help="Split a number or word into characters and read them all in one pass")
 
                 # Enhanced preprocessing with error handling
                 try:
-                    # Assess image quality first
-                    img_array = np.array(image.convert("L"))
-                    quality_score, issues, recommendations = assess_image_quality(img_array, recognition_mode)
+                    # Quality was assessed when the input arrived
+                    img_array = artifacts["gray"]
+                    quality_score, issues, recommendations = artifacts["quality"]
 
                     # Show quality assessment
                     quality_col1, quality_col2 = st.columns([1, 2])
@@ -1444,9 +1296,9 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
                         st.write(f"- Value range: [{img_array.min()}, {img_array.max()}]")
 
                     # Process with step visualization if requested
+                    entry = input_prediction(artifacts, camera_img, current_model, show_steps)
+                    processed_img, steps = entry["processed"], entry["steps"]
                     if show_steps:
-                        processed_img, steps = preprocess_image_with_steps(image, recognition_mode)
-
                         # Show preprocessing steps
                         st.markdown("#### 🔧 Preprocessing Pipeline:")
                         step_cols = st.columns(len(steps))
@@ -1458,22 +1310,28 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
                                 else:
                                     display_img = step_img
                                 st.image(display_img, caption=step_name.title(), width=100)
-                    else:
-                        processed_img = preprocess_image(image, recognition_mode)
 
                     if debug_camera:
                         st.write(f"🔧 **Processed Image Info:**")
                         st.write(f"- Shape: {processed_img.shape}")
                         st.write(f"- Data type: {processed_img.dtype}")
                         st.write(f"- Value range: [{processed_img.min():.3f}, {processed_img.max():.3f}]")
+                        if artifacts["cache_hit"]:
+                            st.write(f"♻️ **Served from result cache** ({get_result_cache().summary()})")
+                        else:
+                            show_stage_timings(artifacts["pipeline_run"])
+                        show_prediction_debug(processed_img, current_model["model"], entry["result"])
 
-                    predicted_char, confidence = predict_character(processed_img, current_model["model"], recognition_mode, debug=debug_camera)
+                    predicted_char, confidence = entry["result"]
 
                 except Exception as e:
                     st.error(f"❌ **Processing Error**: {str(e)}")
                     st.info("💡 **Tip**: Try adjusting lighting or repositioning the character in the frame.")
                     predicted_char, confidence = None, 0.0
 
+                if read_line_camera:
+                    show_line_result(artifacts, current_model, recognition_mode)
+
                 # Display results in columns
                 col1, col2 = st.columns([1, 2])
 
@@ -1551,25 +1409,28 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
             unsafe_allow_html=True
         )
         uploaded = st.file_uploader(f"📁 Upload {char_type.title()} Image", type=["png", "jpg", "jpeg"], help="Supported formats: PNG, JPG, JPEG")
-        if uploaded:
-            image = Image.open(uploaded)
+        artifacts = input_artifacts("upload", uploaded, recognition_mode, current_model) if uploaded else None
+        if artifacts is not None:
+            image = artifacts["image"]
 
             # Immediate prediction for file upload
             if current_model["model"] is not None:
                 st.markdown("### 🎯 Upload Prediction Results")
 
-                # Add debug and preprocessing visualization toggles
-                col_debug1, col_debug2 = st.columns(2)
+                # Add debug, preprocessing visualization and line reading toggles
+                col_debug1, col_debug2, col_debug3 = st.columns(3)
                 with col_debug1:
                     debug_upload = st.checkbox("🔍 Enable Debug Mode (Upload)", key="debug_upload", help="Show detailed prediction analysis for uploaded files")
                 with col_debug2:
                     show_steps_upload = st.checkbox("👁️ Show Preprocessing Steps", key="steps_upload", help="Visualize image preprocessing pipeline")
+                with col_debug3:
+                    read_line_upload = st.checkbox("🔡 Read Whole Line", key="line_upload", help="Split a number or word into characters and read them all in one pass")
 
                 # Enhanced preprocessing with error handling
                 try:
-                    # Assess image quality first
-                    img_array = np.array(image.convert("L"))
-                    quality_score, issues, recommendations = assess_image_quality(img_array, recognition_mode)
+                    # Quality was assessed when the input arrived
+                    img_array = artifacts["gray"]
+                    quality_score, issues, recommendations = artifacts["quality"]
 
                     # Show quality assessment
                     quality_col1, quality_col2 = st.columns([1, 2])
@@ -1606,9 +1467,9 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
                             st.write(f"- Mean: {np.mean(img_array_full):.2f}")
 
                     # Process with step visualization if requested
+                    entry = input_prediction(artifacts, uploaded, current_model, show_steps_upload)
+                    processed_img, steps = entry["processed"], entry["steps"]
                     if show_steps_upload:
-                        processed_img, steps = preprocess_image_with_steps(image, recognition_mode)
-
                         # Show preprocessing steps
                         st.markdown("#### 🔧 Preprocessing Pipeline:")
                         step_cols = st.columns(min(len(steps), 5))  # Max 5 columns
@@ -1620,8 +1481,6 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
                                 else:
                                     display_img = step_img
                                 st.image(display_img, caption=step_name.title(), width=100)
-                    else:
-                        processed_img = preprocess_image(image, recognition_mode)
 
                     if debug_upload:
                         st.write(f"🔧 **Processed Image Info:**")
@@ -1629,14 +1488,22 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
                         st.write(f"- Data type: {processed_img.dtype}")
                         st.write(f"- Value range: [{processed_img.min():.3f}, {processed_img.max():.3f}]")
                         st.write(f"- Mean: {np.mean(processed_img):.3f}")
+                        if artifacts["cache_hit"]:
+                            st.write(f"♻️ **Served from result cache** ({get_result_cache().summary()})")
+                        else:
+                            show_stage_timings(artifacts["pipeline_run"])
+                        show_prediction_debug(processed_img, current_model["model"], entry["result"])
 
-                    predicted_char, confidence = predict_character(processed_img, current_model["model"], recognition_mode, debug=debug_upload)
+                    predicted_char, confidence = entry["result"]
 
                 except Exception as e:
                     st.error(f"❌ **Processing Error**: {str(e)}")
                     st.info("💡 **Tip**: Try uploading a clearer image with better contrast between character and background.")
                     predicted_char, confidence = None, 0.0
 
+                if read_line_upload:
+                    show_line_result(artifacts, current_model, recognition_mode)
+
                 # Display results in columns
                 col1, col2 = st.columns([1, 2])
 
@@ -1713,15 +1580,14 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
                 """,
                 unsafe_allow_html=True
             )
-            from tensorflow.keras.datasets import mnist
-            (_, _), (x_test, y_test) = mnist.load_data()
+            x_test, y_test = load_mnist_test_set()
             sample_indices = random.sample(range(len(x_test)), 10)
             labels = [y_test[i] for i in sample_indices]
             st.markdown("### 🔬 Dataset Sample Preview")
             preview_imgs = []
             for i in range(10):
                 img = x_test[sample_indices[i]]
-                img_inverted = cv2.bitwise_not(img)
+                img_inverted = 255 - img
                 preview_imgs.append(Image.fromarray(img_inverted))
             st.image(preview_imgs, caption=[f"{labels[i]}" for i in range(10)], width=80)
 
@@ -1731,66 +1597,74 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
                 idx = int(sample_choice.split("Sample ")[1].replace(")", "")) - 1
                 img = x_test[sample_indices[idx]]
                 label = y_test[sample_indices[idx]]
-                img_inverted = cv2.bitwise_not(img)
+                img_inverted = 255 - img
                 image = Image.fromarray(img_inverted)
 
-                # Immediate prediction for dataset sample
+                # Predict once per click; the result lives in session state so
+                # reruns from other widgets render it without another model call
                 if current_model["model"] is not None:
-                    st.markdown("### 🎯 Dataset Sample Prediction")
-
-                    # Process and predict
                     processed_img = preprocess_image(image, recognition_mode)
-                    predicted_char, confidence = predict_character(processed_img, current_model["model"], recognition_mode)
+                    st.session_state["digit_sample_prediction"] = {
+                        "version": current_model["version"],
+                        "image": image, "label": label, "processed": processed_img,
+                        "result": predict_character(processed_img, current_model["model"], recognition_mode, labels=current_model["labels"]),
+                    }
+                else:
+                    st.warning("⚠️ Model not available for prediction")
 
-                    # Display results in columns
-                    col1, col2 = st.columns([1, 2])
+            sample_prediction = sample_prediction_state("digit_sample_prediction", current_model)
+            if sample_prediction is not None:
+                image, label, processed_img = sample_prediction["image"], sample_prediction["label"], sample_prediction["processed"]
+                predicted_char, confidence = sample_prediction["result"]
+                st.markdown("### 🎯 Dataset Sample Prediction")
 
-                    with col1:
-                        st.image(image, caption=f"True Label: {label}", width=200)
-                        st.image(processed_img, caption="Processed for AI", width=200)
+                # Display results in columns
+                col1, col2 = st.columns([1, 2])
 
-                    with col2:
-                        if predicted_char is not None:
-                            # Check if prediction matches true label
-                            is_correct = str(predicted_char) == str(label)
-                            accuracy_color = "#059669" if is_correct else "#dc2626"
-                            accuracy_text = "✅ Correct" if is_correct else "❌ Incorrect"
+                with col1:
+                    st.image(image, caption=f"True Label: {label}", width=200)
+                    st.image(processed_img, caption="Processed for AI", width=200)
 
-                            st.markdown(
-                                f"""
-                                <div class="glass-card">
-                                    <h4>🗃️ Dataset Sample Prediction</h4>
-                                    <div style="display: flex; align-items: center; justify-content: space-between; margin: 1rem 0;">
-                                        <div>
-                                            <div style="font-size: 3rem; font-weight: 700; color: #2a5298;">{predicted_char}</div>
-                                            <div style="color: #718096; font-size: 14px;">Predicted Digit</div>
-                                        </div>
-                                        <div style="text-align: right;">
-                                            <div style="font-size: 1.5rem; font-weight: 600; color: {accuracy_color};">{accuracy_text}</div>
-                                            <div style="font-size: 1.2rem; font-weight: 600; color: #059669;">{confidence:.1%}</div>
-                                            <div style="color: #718096; font-size: 14px;">Confidence</div>
-                                        </div>
+                with col2:
+                    if predicted_char is not None:
+                        # Check if prediction matches true label
+                        is_correct = str(predicted_char) == str(label)
+                        accuracy_color = "#059669" if is_correct else "#dc2626"
+                        accuracy_text = "✅ Correct" if is_correct else "❌ Incorrect"
+
+                        st.markdown(
+                            f"""
+                            <div class="glass-card">
+                                <h4>🗃️ Dataset Sample Prediction</h4>
+                                <div style="display: flex; align-items: center; justify-content: space-between; margin: 1rem 0;">
+                                    <div>
+                                        <div style="font-size: 3rem; font-weight: 700; color: #2a5298;">{predicted_char}</div>
+                                        <div style="color: #718096; font-size: 14px;">Predicted Digit</div>
+                                    </div>
+                                    <div style="text-align: right;">
+                                        <div style="font-size: 1.5rem; font-weight: 600; color: {accuracy_color};">{accuracy_text}</div>
+                                        <div style="font-size: 1.2rem; font-weight: 600; color: #059669;">{confidence:.1%}</div>
+                                        <div style="color: #718096; font-size: 14px;">Confidence</div>
                                     </div>
                                 </div>
-                                """,
-                                unsafe_allow_html=True
-                            )
-                            st.progress(float(confidence), text=f"{confidence:.1%}")
-
-                            # Detailed metrics
-                            col_a, col_b, col_c, col_d = st.columns(4)
-                            with col_a:
-                                st.metric("True Label", label)
-                            with col_b:
-                                st.metric("Prediction", predicted_char)
-                            with col_c:
-                                st.metric("Confidence", f"{confidence:.1%}")
-                            with col_d:
-                                st.metric("Accuracy", accuracy_text)
-                        else:
-                            st.error(f"❌ {current_model['name']}: Model not available")
-                else:
-                    st.warning("⚠️ Model not available for prediction")
+                            </div>
+                            """,
+                            unsafe_allow_html=True
+                        )
+                        st.progress(float(confidence), text=f"{confidence:.1%}")
+
+                        # Detailed metrics
+                        col_a, col_b, col_c, col_d = st.columns(4)
+                        with col_a:
+                            st.metric("True Label", label)
+                        with col_b:
+                            st.metric("Prediction", predicted_char)
+                        with col_c:
+                            st.metric("Confidence", f"{confidence:.1%}")
+                        with col_d:
+                            st.metric("Accuracy", accuracy_text)
+                    else:
+                        st.error(f"❌ {current_model['name']}: Model not available")
         else:
             # Alphabet sample dataset
             st.markdown(
@@ -1841,66 +1715,75 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
                 img_array, label = sample_data[idx]
                 image = Image.fromarray(img_array)
 
-                # Immediate prediction for alphabet dataset sample
+                # Predict once per click and keep the result in session state
                 if current_model["model"] is not None:
-                    st.markdown("### 🎯 Alphabet Dataset Prediction")
-
-                    # Add debug toggle
-                    debug_mode = st.checkbox("🔍 Enable Debug Mode", help="Show detailed prediction analysis")
-
-                    # Process and predict
                     processed_img = preprocess_image(image, recognition_mode)
-                    predicted_char, confidence = predict_character(processed_img, current_model["model"], recognition_mode, debug=debug_mode)
+                    st.session_state["alphabet_sample_prediction"] = {
+                        "version": current_model["version"],
+                        "image": image, "label": label, "processed": processed_img,
+                        "result": predict_character(processed_img, current_model["model"], recognition_mode, labels=current_model["labels"]),
+                    }
+                else:
+                    st.warning("⚠️ Model not available for prediction")
 
-                    # Display results in columns
-                    col1, col2 = st.columns([1, 2])
+            sample_prediction = sample_prediction_state("alphabet_sample_prediction", current_model)
+            if sample_prediction is not None:
+                image, label, processed_img = sample_prediction["image"], sample_prediction["label"], sample_prediction["processed"]
+                predicted_char, confidence = sample_prediction["result"]
+                st.markdown("### 🎯 Alphabet Dataset Prediction")
 
-                    with col1:
-                        st.image(image, caption=f"True Label: {label}", width=200)
-                        st.image(processed_img, caption="Processed for AI", width=200)
+                # Add debug toggle; it renders the stored result, so toggling makes no model call
+                debug_mode = st.checkbox("🔍 Enable Debug Mode", help="Show detailed prediction analysis")
+                if debug_mode and current_model["model"] is not None:
+                    show_prediction_debug(processed_img, current_model["model"], sample_prediction["result"])
 
-                    with col2:
-                        if predicted_char is not None:
-                            # Check if prediction matches true label
-                            is_correct = str(predicted_char).upper() == str(label).upper()
-                            accuracy_color = "#059669" if is_correct else "#dc2626"
-                            accuracy_text = "✅ Correct" if is_correct else "❌ Incorrect"
+                # Display results in columns
+                col1, col2 = st.columns([1, 2])
 
-                            st.markdown(
-                                f"""
-                                <div class="glass-card">
-                                    <h4>🗃️ Alphabet Sample Prediction</h4>
-                                    <div style="display: flex; align-items: center; justify-content: space-between; margin: 1rem 0;">
-                                        <div>
-                                            <div style="font-size: 3rem; font-weight: 700; color: #2a5298;">{predicted_char}</div>
-                                            <div style="color: #718096; font-size: 14px;">Predicted Letter</div>
-                                        </div>
-                                        <div style="text-align: right;">
-                                            <div style="font-size: 1.5rem; font-weight: 600; color: {accuracy_color};">{accuracy_text}</div>
-                                            <div style="font-size: 1.2rem; font-weight: 600; color: #059669;">{confidence:.1%}</div>
-                                            <div style="color: #718096; font-size: 14px;">Confidence</div>
-                                        </div>
+                with col1:
+                    st.image(image, caption=f"True Label: {label}", width=200)
+                    st.image(processed_img, caption="Processed for AI", width=200)
+
+                with col2:
+                    if predicted_char is not None:
+                        # Check if prediction matches true label
+                        is_correct = str(predicted_char).upper() == str(label).upper()
+                        accuracy_color = "#059669" if is_correct else "#dc2626"
+                        accuracy_text = "✅ Correct" if is_correct else "❌ Incorrect"
+
+                        st.markdown(
+                            f"""
+                            <div class="glass-card">
+                                <h4>🗃️ Alphabet Sample Prediction</h4>
+                                <div style="display: flex; align-items: center; justify-content: space-between; margin: 1rem 0;">
+                                    <div>
+                                        <div style="font-size: 3rem; font-weight: 700; color: #2a5298;">{predicted_char}</div>
+                                        <div style="color: #718096; font-size: 14px;">Predicted Letter</div>
+                                    </div>
+                                    <div style="text-align: right;">
+                                        <div style="font-size: 1.5rem; font-weight: 600; color: {accuracy_color};">{accuracy_text}</div>
+                                        <div style="font-size: 1.2rem; font-weight: 600; color: #059669;">{confidence:.1%}</div>
+                                        <div style="color: #718096; font-size: 14px;">Confidence</div>
                                     </div>
                                 </div>
-                                """,
-                                unsafe_allow_html=True
-                            )
-                            st.progress(float(confidence), text=f"{confidence:.1%}")
-
-                            # Detailed metrics
-                            col_a, col_b, col_c, col_d = st.columns(4)
-                            with col_a:
-                                st.metric("True Label", label)
-                            with col_b:
-                                st.metric("Prediction", predicted_char)
-                            with col_c:
-                                st.metric("Confidence", f"{confidence:.1%}")
-                            with col_d:
-                                st.metric("Accuracy", accuracy_text)
-                        else:
-                            st.error(f"❌ {current_model['name']}: Model not available")
-                else:
-                    st.warning("⚠️ Model not available for prediction")
+                            </div>
+                            """,
+                            unsafe_allow_html=True
+                        )
+                        st.progress(float(confidence), text=f"{confidence:.1%}")
+
+                        # Detailed metrics
+                        col_a, col_b, col_c, col_d = st.columns(4)
+                        with col_a:
+                            st.metric("True Label", label)
+                        with col_b:
+                            st.metric("Prediction", predicted_char)
+                        with col_c:
+                            st.metric("Confidence", f"{confidence:.1%}")
+                        with col_d:
+                            st.metric("Accuracy", accuracy_text)
+                    else:
+                        st.error(f"❌ {current_model['name']}: Model not available")
 
     elif choice == "🎬 Demo Slideshow":
         if recognition_mode == "digit":
@@ -1912,22 +1795,22 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
                 """,
                 unsafe_allow_html=True
             )
-            from tensorflow.keras.datasets import mnist
-            (_, _), (x_test, y_test) = mnist.load_data()
+            x_test, y_test = load_mnist_test_set()
             st.markdown("### 🎬 Automated Demonstration - Processing 5 Samples")
             slideshow_area = st.empty()
 
             if st.button("🎬 Start Digit Slideshow"):
+                slides = []
                 for i in range(5):
                     idx = random.randint(0, len(x_test) - 1)
-                    img = x_test[idx]
-                    label = y_test[idx]
-                    img_inverted = cv2.bitwise_not(img)
-                    processed_img = preprocess_image(Image.fromarray(img_inverted), recognition_mode)
+                    img_inverted = 255 - x_test[idx]
+                    slides.append((img_inverted, y_test[idx], preprocess_image(Image.fromarray(img_inverted), recognition_mode)))
 
-                    # Get prediction from current model
-                    predicted_char, confidence = predict_character(processed_img, current_model["model"], recognition_mode)
+                # Predict all slides in one forward pass before the show starts
+                rerun_stats["model_calls"] += 1
+                results = predict_batch([slide[2] for slide in slides], recognition_mode, current_model["model"], current_model["labels"])
 
+                for i, ((img_inverted, label, processed_img), (predicted_char, confidence)) in enumerate(zip(slides, results)):
                     with slideshow_area.container():
                         st.markdown(f"### 🎬 Sample {i+1}/5 - Digit Recognition Demo")
 
@@ -2014,17 +1897,20 @@ if 'recognition_mode' in locals() and current_model["model"] is not None:
                     az_samples = {k: alphabet_samples[k] for k in demo_letters}
 
             if st.button("🎬 Start Alphabet Slideshow"):
+                slides = []
                 for i in range(5):
                     # Select random letter from A_Z dataset samples
                     letter = random.choice(demo_letters)
 
                     # Use the A_Z dataset sample
                     img_array = az_samples[letter]
-                    processed_img = preprocess_image(Image.fromarray(img_array), recognition_mode)
+                    slides.append((img_array, letter, preprocess_image(Image.fromarray(img_array), recognition_mode)))
 
-                    # Get prediction from current model
-                    predicted_char, confidence = predict_character(processed_img, current_model["model"], recognition_mode)
+                # Predict all slides in one forward pass before the show starts
+                rerun_stats["model_calls"] += 1
+                results = predict_batch([slide[2] for slide in slides], recognition_mode, current_model["model"], current_model["labels"])
 
+                for i, ((img_array, letter, processed_img), (predicted_char, confidence)) in enumerate(zip(slides, results)):
                     with slideshow_area.container():
                         st.markdown(f"### 🎬 Sample {i+1}/5 - Alphabet Recognition Demo")
 
@@ -2147,3 +2033,21 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+# ---------------------------
+# Startup Report
+# ---------------------------
+script_time = time.perf_counter() - SCRIPT_START
+if startup.record_render(script_time):
+    print(startup.format_report(startup.FIRST_RENDER_TIME), flush=True)
+with st.sidebar:
+    with st.expander("⏱️ Startup Report"):
+        st.code(startup.format_report(startup.FIRST_RENDER_TIME, script_time))
+    st.caption(f"♻️ Result cache: {get_result_cache().summary()}")
+    rerun_times = st.session_state.setdefault("rerun_times", [])
+    rerun_times.append(script_time)
+    del rerun_times[:-50]
+    st.caption(
+        f"⏱️ This rerun: {script_time * 1000:.1f} ms, {rerun_stats['model_calls']} model calls | "
+        f"session mean {np.mean(rerun_times) * 1000:.1f} ms over the last {len(rerun_times)} reruns"
+    )
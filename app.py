@@ -1,19 +1,43 @@
+import time
+
+SCRIPT_START = time.perf_counter()
+
 import streamlit as st
-import numpy as np
-from PIL import Image
-import cv2
-import tensorflow as tf
 import random
-import time
+
+import config
+import startup
+from model_registry import ModelRegistry
+from prediction import predict_batch
+import preprocessing
+from preprocessing import PIPELINES, format_timings
+from result_cache import ResultCache, cache_key
+from samples import load_mnist_test_set
+
+# Heavy dependencies are imported on first use, not at startup
+Image = startup.lazy_import("PIL.Image")
 
 # ---------------------------
 # Load Model
 # --------------------------
 @st.cache_resource
-def load_model():
-    return tf.keras.models.load_model("mnist_cnn_model.h5")
+def get_registry():
+    registry = ModelRegistry({
+        "digit": {"path": config.MODEL_PATHS["digit"], "name": "MNIST CNN Model", "info": "Digit Recognition (0-9)"}
+    })
+    registry.load("digit")
+    registry.start_watcher()
+    return registry
+
+@st.cache_resource
+def get_result_cache():
+    """Preprocessed images and predictions for camera frames and uploads, shared by all sessions"""
+    return ResultCache()
 
-model = load_model()
+# Re-read every rerun so a hot-swapped model version is picked up
+model_entry = get_registry().entry("digit")
+model = model_entry["model"]
+warmup_time = model_entry["warmup_time"]
 
 # ---------------------------
 # Page Config
@@ -360,6 +384,8 @@ with st.sidebar:
     st.success("🟢 AI Model: Online")
     st.info("📊 Accuracy: 99.2%")
     st.info("⚡ Response Time: <100ms")
+    st.caption(f"🔥 Model warm-up: {warmup_time * 1000:.0f}ms")
+    st.caption(f"🏷️ Model version: {model_entry['version']}")
 
     st.markdown("### <i class='fas fa-chart-bar'></i> Quick Stats", unsafe_allow_html=True)
     col1, col2 = st.columns(2)
@@ -408,21 +434,13 @@ st.markdown(
 # ---------------------------
 # Preprocessing & Prediction
 # ---------------------------
-def preprocess_image(img):
-    img_gray = img.convert("L") if img.mode != "L" else img
-    img_array = np.array(img_gray)
-    _, binary_img = cv2.threshold(img_array, 127, 255, cv2.THRESH_BINARY)
-    inverted_img = cv2.bitwise_not(binary_img)
-    resized_img = cv2.resize(inverted_img, (28, 28), interpolation=cv2.INTER_AREA)
-    norm_img = resized_img / 255.0
-    return norm_img
+def preprocess_image(img, roi=False, threshold="fixed"):
+    """Threshold, invert, resize and normalize a digit image; `roi` crops to the ink and centres it first"""
+    return preprocessing.preprocess_image(img, "digit", roi=roi, threshold=threshold)
 
 def predict_digit(img_array):
-    input_img = img_array.reshape(1, 28, 28, 1).astype("float32")
-    prediction = model.predict(input_img, verbose=0)
-    predicted_digit = int(np.argmax(prediction))  # Convert to Python int
-    confidence = float(np.max(prediction))        # Convert to Python float
-    return predicted_digit, confidence
+    """Predict a digit; the PredictionResult unpacks as (digit, confidence)"""
+    return predict_batch([img_array], "digit", model, model_entry["labels"])[0]
 
 # ---------------------------
 # Professional Guidelines Section
@@ -480,6 +498,9 @@ choice = st.radio(
 )
 
 image = None
+pipeline_run = None
+# Raw camera/upload bytes, the result cache's key
+image_bytes = None
 
 if choice == "📷 Camera Capture":
     st.markdown(
@@ -492,7 +513,12 @@ if choice == "📷 Camera Capture":
     )
     camera_img = st.camera_input("📷 Capture Handwritten Digit", help="Position digit clearly in center of frame")
     if camera_img:
-        image = Image.open(camera_img)
+        try:
+            pipeline_run = PIPELINES["digit"].start(camera_img)
+            image_bytes = camera_img.getvalue()
+            image = pipeline_run.image
+        except Exception as e:
+            st.error(f"❌ Could not open the image: {str(e)}")
 
 elif choice == "📁 File Upload":
     st.markdown(
@@ -505,7 +531,12 @@ elif choice == "📁 File Upload":
     )
     uploaded = st.file_uploader("📁 Upload Digit Image", type=["png", "jpg", "jpeg"], help="Supported formats: PNG, JPG, JPEG")
     if uploaded:
-        image = Image.open(uploaded)
+        try:
+            pipeline_run = PIPELINES["digit"].start(uploaded)
+            image_bytes = uploaded.getvalue()
+            image = pipeline_run.image
+        except Exception as e:
+            st.error(f"❌ Could not open the image: {str(e)}")
 
 elif choice == "🗃️ Sample Dataset":
     st.markdown(
@@ -516,15 +547,14 @@ elif choice == "🗃️ Sample Dataset":
         """,
         unsafe_allow_html=True
     )
-    from tensorflow.keras.datasets import mnist
-    (_, _), (x_test, y_test) = mnist.load_data()
+    x_test, y_test = load_mnist_test_set()
     sample_indices = random.sample(range(len(x_test)), 10)
     labels = [y_test[i] for i in sample_indices]
     st.markdown("### 🔬 Dataset Sample Preview")
     preview_imgs = []
     for i in range(10):
         img = x_test[sample_indices[i]]
-        img_inverted = cv2.bitwise_not(img)
+        img_inverted = 255 - img
         preview_imgs.append(Image.fromarray(img_inverted))
     st.image(preview_imgs, caption=[f"{labels[i]}" for i in range(10)], width=80)
     sample_choice = st.selectbox("Choose a sample digit:", [f"Digit {labels[i]} (Sample {i+1})" for i in range(10)])
@@ -532,7 +562,7 @@ elif choice == "🗃️ Sample Dataset":
         idx = int(sample_choice.split("Sample ")[1].replace(")", "")) - 1
         img = x_test[sample_indices[idx]]
         label = y_test[sample_indices[idx]]
-        img_inverted = cv2.bitwise_not(img)
+        img_inverted = 255 - img
         image = Image.fromarray(img_inverted)
         st.markdown(f"<div class='info-box'>Sample digit <b>{label}</b> loaded.</div>", unsafe_allow_html=True)
 
@@ -545,15 +575,14 @@ elif choice == "🎬 Demo Slideshow":
         """,
         unsafe_allow_html=True
     )
-    from tensorflow.keras.datasets import mnist
-    (_, _), (x_test, y_test) = mnist.load_data()
+    x_test, y_test = load_mnist_test_set()
     st.markdown("### 🎬 Automated Demonstration - Processing 5 Samples")
     slideshow_area = st.empty()
     for i in range(5):
         idx = random.randint(0, len(x_test) - 1)
         img = x_test[idx]
         label = y_test[idx]
-        img_inverted = cv2.bitwise_not(img)
+        img_inverted = 255 - img
         processed_img = preprocess_image(Image.fromarray(img_inverted))
         digit, conf = predict_digit(processed_img)
         with slideshow_area.container():
@@ -566,7 +595,23 @@ elif choice == "🎬 Demo Slideshow":
 # Professional Results Display
 # ---------------------------
 if image is not None and choice != "🎬 Demo Slideshow":
-    processed_img = preprocess_image(image)
+    # Camera frames and uploads are cropped to the ink and thresholded for their
+    # lighting; dataset samples are already clean and centred. Repeated camera
+    # frames and uploads are served from the shared result cache.
+    cached = None
+    if pipeline_run is None:
+        pipeline_run = PIPELINES["digit"].start(image)
+        processed_img, _ = pipeline_run.finish()
+        prediction = predict_digit(processed_img)
+    else:
+        key = cache_key(image_bytes, "digit", model_entry, config.PREPROCESS_ROI, config.THRESHOLD_METHOD)
+        cached = get_result_cache().get(key)
+        if cached is not None:
+            processed_img, prediction = cached["processed"], cached["result"]
+        else:
+            processed_img, _ = pipeline_run.finish(roi=config.PREPROCESS_ROI, threshold=config.THRESHOLD_METHOD)
+            prediction = predict_digit(processed_img)
+            get_result_cache().put(key, {"processed": processed_img, "result": prediction, "steps": None})
 
     # Create two columns for professional layout
     col1, col2 = st.columns([1, 2])
@@ -582,9 +627,13 @@ if image is not None and choice != "🎬 Demo Slideshow":
             unsafe_allow_html=True
         )
         st.image(processed_img, caption="Preprocessed for Neural Network", width=200, clamp=True)
+        if cached is not None:
+            st.caption(f"♻️ Served from result cache: {get_result_cache().summary()}")
+        else:
+            st.caption(f"⏱️ Preprocessing {pipeline_run.total_ms():.1f}ms: {format_timings(pipeline_run.timings)}")
 
     with col2:
-        digit, conf = predict_digit(processed_img)
+        digit, conf = prediction
 
         if conf <= 0.5:
             st.markdown(
@@ -650,4 +699,15 @@ st.markdown(
     </div>
     """,
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+# ---------------------------
+# Startup Report
+# ---------------------------
+script_time = time.perf_counter() - SCRIPT_START
+if startup.record_render(script_time):
+    print(startup.format_report(startup.FIRST_RENDER_TIME), flush=True)
+with st.sidebar:
+    with st.expander("⏱️ Startup Report"):
+        st.code(startup.format_report(startup.FIRST_RENDER_TIME, script_time))
+    st.caption(f"♻️ Result cache: {get_result_cache().summary()}")
@@ -0,0 +1,114 @@
+"""Memory-mapped weight artifacts for the bundled models
+
+An artifact is two files next to the .h5:
+
+    <model>.weights.npy     every weight tensor, float32, back to back in one flat array
+    <model>.topology.json   the Keras model config plus each layer's weight offsets and shapes
+
+plus an optional <model>.float16.weights.npy with the same layout, used by the
+reduced-precision modes (HDAR_PRECISION) to halve the weight memory.
+
+Loading is np.load(mmap_mode="r") and a JSON parse. The weights are read-only
+views into the page cache, so every process serving the same model shares one
+physical copy, and nothing executable is unpickled. Only weights are exported;
+the optimizer state stored in the .h5 files is dropped.
+
+Usage: python artifact.py    (exports every model in config.MODEL_PATHS, float32 and float16)
+"""
+import json
+import os
+
+import numpy as np
+
+import config
+
+# ---------------------------
+# Paths
+# ---------------------------
+def artifact_paths_for(h5_path, dtype="float32"):
+    """Weights and topology paths of the artifact that sits next to a .h5 model"""
+    stem = os.path.splitext(h5_path)[0]
+    weights_suffix = ".weights.npy" if dtype == "float32" else f".{dtype}.weights.npy"
+    return stem + weights_suffix, stem + ".topology.json"
+
+def has_artifact(h5_path, dtype="float32"):
+    """Whether an artifact exists for a model and is at least as new as its .h5 (if the .h5 is present)"""
+    weights_path, topology_path = artifact_paths_for(h5_path, dtype)
+    if not (os.path.exists(weights_path) and os.path.exists(topology_path)):
+        return False
+    if not os.path.exists(h5_path):
+        return True
+    return min(os.path.getmtime(weights_path), os.path.getmtime(topology_path)) >= os.path.getmtime(h5_path)
+
+# ---------------------------
+# Export
+# ---------------------------
+def read_h5_weights(h5_path):
+    """Keras model config and {layer name: [weights...]} of a .h5 model, read with h5py"""
+    import h5py
+
+    with h5py.File(h5_path, "r") as f:
+        model_config = json.loads(f.attrs["model_config"])
+        weight_groups = f["model_weights"]
+        weights = {}
+        for layer in model_config["config"]["layers"]:
+            name = layer["config"]["name"]
+            if name in weight_groups:
+                group = weight_groups[name]
+                weight_names = [n.decode() if isinstance(n, bytes) else n for n in group.attrs["weight_names"]]
+                weights[name] = [np.asarray(group[weight_name], dtype=np.float32) for weight_name in weight_names]
+    return model_config, weights
+
+def export_artifact(h5_path, dtype="float32"):
+    """Write the artifact for a .h5 model with weights stored as `dtype` and return its (weights, topology) paths"""
+    model_config, weights = read_h5_weights(h5_path)
+    weights_path, topology_path = artifact_paths_for(h5_path, dtype)
+
+    layout, offset = {}, 0
+    for name, arrays in weights.items():
+        layout[name] = []
+        for array in arrays:
+            layout[name].append({"offset": offset, "shape": list(array.shape)})
+            offset += array.size
+    flat = np.concatenate([array.ravel() for arrays in weights.values() for array in arrays])
+
+    # Weights first, so a reader never sees a topology that points past the end of the array
+    np.save(weights_path, flat.astype(dtype))
+    with open(topology_path, "w") as f:
+        json.dump({"format": 1, "model_config": model_config, "weights": layout}, f)
+    return weights_path, topology_path
+
+# ---------------------------
+# Loading
+# ---------------------------
+def read_artifact(h5_path, dtype="float32"):
+    """Keras model config and {layer name: [weights...]} of a model's artifact
+
+    The weights are read-only views into one memory-mapped array.
+    """
+    weights_path, topology_path = artifact_paths_for(h5_path, dtype)
+    with open(topology_path) as f:
+        topology = json.load(f)
+    flat = np.load(weights_path, mmap_mode="r")
+
+    weights = {}
+    for name, entries in topology["weights"].items():
+        weights[name] = [
+            flat[entry["offset"]:entry["offset"] + int(np.prod(entry["shape"]))].reshape(entry["shape"])
+            for entry in entries
+        ]
+    return topology["model_config"], weights
+
+def read_model_weights(h5_path, dtype="float32"):
+    """Model config and per-layer weights as `dtype`, from the artifact when present and current, else the .h5"""
+    if has_artifact(h5_path, dtype):
+        return read_artifact(h5_path, dtype)
+    model_config, weights = read_artifact(h5_path) if has_artifact(h5_path) else read_h5_weights(h5_path)
+    if dtype != "float32":
+        weights = {name: [array.astype(dtype) for array in arrays] for name, arrays in weights.items()}
+    return model_config, weights
+
+if __name__ == "__main__":
+    for model_path in config.MODEL_PATHS.values():
+        for dtype in ("float32", "float16"):
+            print(f"{model_path} -> {', '.join(export_artifact(model_path, dtype))}")
@@ -0,0 +1,119 @@
+"""Dynamic micro-batching of concurrent prediction requests
+
+Streamlit runs every session on its own thread, so under load many sessions
+call predict() with a single 28x28 image at the same moment. MicroBatcher sits
+in front of a model, collects those requests for up to `max_wait_ms` or until
+`max_batch_size` images are queued, runs one batched forward pass and hands
+each caller its own slice of the output. close() stops the worker once the
+queued requests have run, for when a hot reload replaces the model.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+import config
+
+class MicroBatcher:
+    """Model wrapper that merges concurrent predict() calls into batched forward passes"""
+
+    def __init__(self, model, max_batch_size=None, max_wait_ms=None):
+        self.model = model
+        self.max_batch_size = config.BATCH_MAX_SIZE if max_batch_size is None else max_batch_size
+        self.max_wait = (config.BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000.0
+        self.input_shape = model.input_shape
+        self.output_shape = model.output_shape
+        self.input_dtype = getattr(model, "input_dtype", np.float32)
+        self.stats = {"requests": 0, "batches": 0, "images": 0}
+
+        self._queue = queue.Queue()
+        # A request that did not fit in the last batch, to start the next one
+        self._held = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="hdar-micro-batcher", daemon=True)
+        self._worker.start()
+
+    def predict(self, x, verbose=0):
+        """Queue a prediction and block until its batch has run, mirroring keras.Model.predict"""
+        x = np.asarray(x, dtype=self.input_dtype)
+        future = None
+        # Already a full batch on its own, nothing to gain from queueing; once closed, run unbatched
+        if len(x) < self.max_batch_size:
+            with self._lock:
+                if not self._closed:
+                    future = Future()
+                    self._queue.put((x, future))
+        if future is None:
+            return self.model.predict(x, verbose=0)
+        return future.result()
+
+    def reset_stats(self):
+        """Zero the counters, and the wrapped model's (such as a cascade's), so warm-up does not count as traffic"""
+        self.stats = {"requests": 0, "batches": 0, "images": 0}
+        reset = getattr(self.model, "reset_stats", None)
+        if reset is not None:
+            reset()
+
+    def close(self):
+        """Stop the worker thread after the requests queued so far; later predict() calls run unbatched"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            # Sentinel: the worker exits once it reaches it
+            self._queue.put(None)
+
+    def __call__(self, x):
+        return self.predict(x)
+
+    def _collect(self):
+        """Block for the first request, then gather more until the batch is full or the wait expires
+
+        A batch never exceeds `max_batch_size`: a request that would overflow
+        it is held over to start the next one. Returns the requests and
+        whether close() has been called behind them.
+        """
+        first, self._held = self._held or self._queue.get(), None
+        if first is None:
+            return [], True
+        pending = [first]
+        size = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return pending, True
+            if size + len(item[0]) > self.max_batch_size:
+                self._held = item
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending, False
+
+    def _run(self):
+        closed = False
+        while not closed:
+            pending, closed = self._collect()
+            if not pending:
+                continue
+            try:
+                outputs = self.model.predict(np.concatenate([x for x, _ in pending]), verbose=0)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            self.stats["requests"] += len(pending)
+            self.stats["batches"] += 1
+            self.stats["images"] += len(outputs)
+            offset = 0
+            for x, future in pending:
+                future.set_result(outputs[offset:offset + len(x)])
+                offset += len(x)
@@ -0,0 +1,96 @@
+"""Load time and memory sharing of .h5 vs memory-mapped artifact weights
+
+Starts several worker processes that each load both models into the NumPy
+engine from the same format and hold them. Once all of them are loaded it
+reads /proc/<pid>/smaps_rollup in each. Pss splits shared pages between the
+processes that map them, so its total is the real memory cost of the workers.
+
+Build the artifacts first with: python artifact.py
+
+Usage: python benchmarks/bench_artifact_loading.py [--workers 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+import numpy as np
+import artifact
+from numpy_engine import NumpyModel, model_layers
+reader = {"h5": artifact.read_h5_weights, "artifact": artifact.read_artifact}[sys.argv[1]]
+start = time.perf_counter()
+models = [NumpyModel(model_layers(*reader(path))) for path in sys.argv[2:]]
+elapsed = time.perf_counter() - start
+for model in models:
+    model.predict(np.zeros((1, 28, 28, 1), dtype=np.float32))
+print(json.dumps({"seconds": elapsed}), flush=True)
+sys.stdin.readline()
+"""
+
+def smaps_rollup(pid):
+    """Rss, Pss and shared memory of a process in MB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Shared_Clean:", "Shared_Dirty:"):
+                values[parts[0][:-1]] = int(parts[1]) / 1024
+    return values
+
+def run_format(weight_format, workers, paths):
+    """Mean load time and memory figures for `workers` processes loading `paths`"""
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3")
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", CHILD, weight_format] + paths,
+            cwd=ROOT, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(workers)
+    ]
+    try:
+        seconds = [json.loads(process.stdout.readline())["seconds"] for process in processes]
+        memory = [smaps_rollup(process.pid) for process in processes]
+    finally:
+        for process in processes:
+            process.communicate("\n")
+    return {
+        "load_ms": sum(seconds) / workers * 1000,
+        "rss_mb": sum(m["Rss"] for m in memory) / workers,
+        "shared_mb": sum(m["Shared_Clean"] + m["Shared_Dirty"] for m in memory) / workers,
+        "total_pss_mb": sum(m["Pss"] for m in memory),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4, help="concurrent worker processes")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import artifact
+    import config
+
+    paths = list(config.MODEL_PATHS.values())
+    missing = [path for path in paths if not artifact.has_artifact(os.path.join(ROOT, path))]
+    if missing:
+        sys.exit(f"No current artifact for {', '.join(missing)}; run 'python artifact.py' first")
+
+    for path in paths:
+        weights_path, topology_path = artifact.artifact_paths_for(path)
+        artifact_kb = (os.path.getsize(os.path.join(ROOT, weights_path)) + os.path.getsize(os.path.join(ROOT, topology_path))) / 1024
+        print(f"{path}: .h5 {os.path.getsize(os.path.join(ROOT, path)) / 1024:.0f} KB, artifact {artifact_kb:.0f} KB")
+
+    print(f"\n{'format':<10}{'load ms':>10}{'RSS MB':>10}{'shared MB':>11}{f'PSS MB x{args.workers}':>14}")
+    for weight_format in ("h5", "artifact"):
+        result = run_format(weight_format, args.workers, paths)
+        print(
+            f"{weight_format:<10}{result['load_ms']:>10.1f}{result['rss_mb']:>10.1f}"
+            f"{result['shared_mb']:>11.1f}{result['total_pss_mb']:>14.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compare per-call latency and throughput of the inference backends
+
+Usage: python benchmarks/bench_backends.py [--calls 500] [--batch 256]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inference
+
+MODEL_PATHS = {"digit": "mnist_cnn_model.h5", "alphabet": "arpit.h5"}
+
+def time_single_calls(model, calls):
+    """Latencies in milliseconds of `calls` single-image predictions"""
+    x = np.random.rand(1, 28, 28, 1).astype(np.float32)
+    model.predict(x, verbose=0)
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        model.predict(x, verbose=0)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def time_throughput(model, batch, repeats=10):
+    """Images per second for batched predictions"""
+    x = np.random.rand(batch, 28, 28, 1).astype(np.float32)
+    model.predict(x, verbose=0)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict(x, verbose=0)
+    return batch * repeats / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500, help="single-image calls per backend")
+    parser.add_argument("--batch", type=int, default=256, help="batch size for the throughput run")
+    args = parser.parse_args()
+
+    print(f"{'model':<10}{'backend':<16}{'p50 ms':>10}{'p99 ms':>10}{'single/s':>12}{'batch img/s':>14}")
+    for mode, path in MODEL_PATHS.items():
+        for backend in inference.BACKENDS:
+            try:
+                model = inference.load_model(path, backend)
+            except FileNotFoundError as e:
+                print(f"{mode:<10}{backend:<16}  skipped: {e}")
+                continue
+            latencies = time_single_calls(model, args.calls)
+            throughput = time_throughput(model, args.batch)
+            print(
+                f"{mode:<10}{backend:<16}{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 99):>10.3f}"
+                f"{1000 / latencies.mean():>12.0f}{throughput:>14.0f}"
+            )
+
+if __name__ == "__main__":
+    main()
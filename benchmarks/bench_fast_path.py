@@ -0,0 +1,51 @@
+"""Microbenchmark model.predict against the compiled Keras fast path
+
+Reports p50/p99 single-image latency for both bundled models with
+model.predict, the tf.function fast path, and the XLA-compiled fast path.
+
+Usage: python benchmarks/bench_fast_path.py [--calls 500]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inference
+
+MODEL_PATHS = {"digit": "mnist_cnn_model.h5", "alphabet": "arpit.h5"}
+
+def latencies_ms(predict, calls):
+    """Latencies in milliseconds of `calls` single-image predictions"""
+    x = np.random.rand(1, 28, 28, 1).astype(np.float32)
+    for _ in range(5):
+        predict(x)
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        predict(x)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500, help="single-image calls per path")
+    args = parser.parse_args()
+
+    print(f"{'model':<10}{'path':<18}{'p50 ms':>10}{'p99 ms':>10}")
+    for mode, path in MODEL_PATHS.items():
+        keras_model = inference.load_keras_model(path, fast_path=False)
+        paths = {
+            "model.predict": lambda x: keras_model.predict(x, verbose=0),
+            "fast path": inference.FastKerasModel(keras_model, jit_compile=False).predict,
+            "fast path (XLA)": inference.FastKerasModel(keras_model, jit_compile=True).predict,
+        }
+        for name, predict in paths.items():
+            latencies = latencies_ms(predict, args.calls)
+            print(f"{mode:<10}{name:<18}{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 99):>10.3f}")
+
+if __name__ == "__main__":
+    main()
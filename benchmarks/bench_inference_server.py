@@ -0,0 +1,81 @@
+"""Compare in-process models with the shared inference daemon
+
+Reports single-image latency for a local model and for a RemoteModel talking
+to a daemon over its Unix socket, plus the RSS of N worker processes holding
+their own models vs N workers using the daemon.
+
+Usage: python benchmarks/bench_inference_server.py [--backend keras] [--workers 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import inference
+from inference_server import RemoteModel, load_server_models, start_local_server
+
+WORKER = """
+import json, sys
+import inference
+models = [inference.load_model(path, sys.argv[1]) for path in ("mnist_cnn_model.h5", "arpit.h5")]
+import numpy as np
+for model in models:
+    model.predict(np.zeros((1, 28, 28, 1), dtype=np.float32), verbose=0)
+with open("/proc/self/status") as status:
+    rss_kb = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+print(json.dumps({"rss_mb": rss_kb / 1024}))
+"""
+
+def latencies_ms(model, calls):
+    """Latencies in milliseconds of `calls` single-image predictions"""
+    x = np.random.rand(1, 28, 28, 1).astype(np.float32)
+    model.predict(x, verbose=0)
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        model.predict(x, verbose=0)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def worker_rss_mb(backend, socket_path):
+    """RSS of a fresh worker process that loads both models with `backend`"""
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3", HDAR_INFERENCE_SOCKET=socket_path)
+    output = subprocess.run(
+        [sys.executable, "-c", WORKER, backend], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])["rss_mb"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="keras", help="backend the models run with")
+    parser.add_argument("--workers", type=int, default=4, help="simulated web worker processes")
+    parser.add_argument("--calls", type=int, default=500, help="single-image calls per path")
+    args = parser.parse_args()
+
+    socket_path = os.path.join(tempfile.mkdtemp(), "hdar-inference.sock")
+    server = start_local_server(socket_path, load_server_models(args.backend))
+
+    local = inference.load_model("mnist_cnn_model.h5", args.backend)
+    remote = RemoteModel("mnist_cnn_model.h5", socket_path)
+    print(f"{'path':<12}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, model in (("in-process", local), ("daemon", remote)):
+        latencies = latencies_ms(model, args.calls)
+        print(f"{name:<12}{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 99):>10.3f}")
+
+    own_models = sum(worker_rss_mb(args.backend, socket_path) for _ in range(args.workers))
+    via_daemon = sum(worker_rss_mb("remote", socket_path) for _ in range(args.workers))
+    print(f"\nTotal worker RSS for {args.workers} workers (daemon itself excluded):")
+    print(f"  own models:  {own_models:>8.0f} MB")
+    print(f"  via daemon:  {via_daemon:>8.0f} MB")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
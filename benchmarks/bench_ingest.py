@@ -0,0 +1,165 @@
+"""Latency, peak memory and recognition agreement of open_image against a full-resolution decode
+
+Test photos are digit samples drawn as dark ink on noisy light paper, saved
+as JPEG at 1, 12 and 48 MP with an EXIF orientation of 6 (stored sideways,
+as phones do). The full-resolution path is Image.open plus
+ImageOps.exif_transpose; the fast path is preprocessing.open_image. Both then
+go through preprocess_image. Latency and peak RSS are measured in a fresh
+interpreter per path and size, since PIL's decode buffers are invisible to
+tracemalloc. A second table checks the PNG modes open_image has to convert
+before reducing (palette, 1-bit, 16-bit) against a full decode of each.
+
+Usage: python benchmarks/bench_ingest.py [--samples 50] [--backend keras]
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SIZES = {"1 MP": (1152, 864), "12 MP": (4000, 3000), "48 MP": (8000, 6000)}
+PNG_MODES = ("P", "1", "I;16", "L", "RGBA")
+PNG_SIZE = (2400, 1600)
+
+CHILD = """
+import io, json, sys, time
+from PIL import Image, ImageOps
+from preprocessing import open_image, preprocess_image
+
+path, fast, repeats = sys.argv[1], sys.argv[2] == "fast", int(sys.argv[3])
+with open(path, "rb") as f:
+    data = f.read()
+
+def run():
+    if fast:
+        image = open_image(io.BytesIO(data))
+    else:
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    return preprocess_image(image, "digit")
+
+run()
+start = time.perf_counter()
+for _ in range(repeats):
+    run()
+elapsed = time.perf_counter() - start
+
+# VmHWM rather than ru_maxrss, which keeps the parent's high-water mark across fork and exec
+with open("/proc/self/status") as f:
+    peak_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+print(json.dumps({"ms": elapsed / repeats * 1000, "peak_rss_mb": peak_kb / 1024}))
+"""
+
+def photo(digit, width, height, rng):
+    """JPEG bytes of a 28x28 digit (white on black, 0-1) drawn as a photo, stored rotated with EXIF orientation 6"""
+    import cv2
+    from PIL import Image
+
+    paper = rng.normal(215, 12, (height, width)).clip(0, 255).astype(np.uint8)
+    side = int(min(width, height) * 0.6)
+    ink = cv2.resize(digit.reshape(28, 28), (side, side), interpolation=cv2.INTER_CUBIC).clip(0, 1)
+    top, left = (height - side) // 2, (width - side) // 2
+    region = paper[top:top + side, left:left + side]
+    region[:] = (region * (1 - ink) + 30 * ink).astype(np.uint8)
+
+    # Orientation 6 means "rotate 90 degrees clockwise to display", so store it turned the other way
+    stored = Image.fromarray(np.ascontiguousarray(np.rot90(paper, 1))).convert("RGB")
+    exif = stored.getexif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    stored.save(buffer, "JPEG", quality=90, exif=exif)
+    return buffer.getvalue()
+
+def png(digit, mode, rng):
+    """PNG bytes of a digit drawn at PNG_SIZE and stored in the given PIL mode"""
+    from PIL import Image
+
+    paper = Image.open(io.BytesIO(photo(digit, *PNG_SIZE, rng)))
+    if mode == "I;16":
+        stored = Image.fromarray(np.asarray(paper.convert("L"), dtype=np.uint16))
+    elif mode == "P":
+        stored = paper.convert("P", palette=Image.Palette.ADAPTIVE)
+    else:
+        stored = paper.convert(mode)
+    buffer = io.BytesIO()
+    stored.save(buffer, "PNG")
+    return buffer.getvalue()
+
+def measure(data, fast, repeats):
+    """Latency and peak RSS of one path in a fresh interpreter"""
+    path = os.path.join(ROOT, "benchmarks", ".bench_ingest.jpg")
+    with open(path, "wb") as f:
+        f.write(data)
+    try:
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD, path, "fast" if fast else "full", str(repeats)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+    finally:
+        os.remove(path)
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=50, help="photos per size for the agreement check")
+    parser.add_argument("--backend", default="keras", help="inference backend for the agreement check")
+    args = parser.parse_args()
+
+    from PIL import Image, ImageOps
+
+    import config
+    import inference
+    from prediction import predict_batch
+    from preprocessing import open_image, preprocess_image
+    from samples import load_samples
+
+    model = inference.load_model(config.MODEL_PATHS["digit"], args.backend)
+    digits, _ = load_samples("digit", "test", args.samples)
+    rng = np.random.default_rng(0)
+
+    print(f"{'size':<7}{'path':<6}{'decoded':>11}{'mean ms':>9}{'peak RSS MB':>13}{'agree':>8}{'mean |diff|':>13}")
+    for name, (width, height) in SIZES.items():
+        photos = [photo(digit, width, height, rng) for digit in digits]
+        full = [preprocess_image(ImageOps.exif_transpose(Image.open(io.BytesIO(data))), "digit") for data in photos]
+        fast = [preprocess_image(open_image(io.BytesIO(data)), "digit") for data in photos]
+        full_labels = [result.label for result in predict_batch(full, "digit", model)]
+        fast_labels = [result.label for result in predict_batch(fast, "digit", model)]
+        agreement = np.mean([a == b for a, b in zip(full_labels, fast_labels)])
+        difference = np.mean(np.abs(np.stack(full) - np.stack(fast)))
+
+        repeats = max(3, 48 // (width * height // 1_000_000 or 1))
+        decoded = {
+            "full": ImageOps.exif_transpose(Image.open(io.BytesIO(photos[0]))).size,
+            "fast": open_image(io.BytesIO(photos[0])).size,
+        }
+        for path, size in decoded.items():
+            stats = measure(photos[0], path == "fast", repeats)
+            agree, diff = (agreement, difference) if path == "fast" else (1.0, 0.0)
+            print(
+                f"{name:<7}{path:<6}{'x'.join(map(str, size)):>11}{stats['ms']:>9.1f}"
+                f"{stats['peak_rss_mb']:>13.0f}{agree:>8.1%}{diff:>13.4f}"
+            )
+
+    print()
+    print(f"{'PNG mode':<10}{'decoded':>11}{'mean ms':>9}{'agree':>8}{'mean |diff|':>13}")
+    for mode in PNG_MODES:
+        pngs = [png(digit, mode, rng) for digit in digits[:10]]
+        full = [preprocess_image(ImageOps.exif_transpose(Image.open(io.BytesIO(data))), "digit") for data in pngs]
+        start = time.perf_counter()
+        fast = [preprocess_image(open_image(io.BytesIO(data)), "digit") for data in pngs]
+        elapsed = (time.perf_counter() - start) / len(pngs) * 1000
+        full_labels = [result.label for result in predict_batch(full, "digit", model)]
+        fast_labels = [result.label for result in predict_batch(fast, "digit", model)]
+        agreement = np.mean([a == b for a, b in zip(full_labels, fast_labels)])
+        difference = np.mean(np.abs(np.stack(full) - np.stack(fast)))
+        size = open_image(io.BytesIO(pngs[0])).size
+        print(f"{mode:<10}{'x'.join(map(str, size)):>11}{elapsed:>9.1f}{agreement:>8.1%}{difference:>13.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Throughput of concurrent single-image clients with and without micro-batching
+
+Each client thread issues back-to-back single-image predictions, the way
+concurrent Streamlit sessions do.
+
+Usage: python benchmarks/bench_micro_batching.py [--backend keras] [--requests 200]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import inference
+from batching import MicroBatcher
+
+CLIENT_COUNTS = (1, 8, 64)
+
+def run_clients(model, clients, requests_per_client):
+    """Images per second and per-request latencies for `clients` concurrent threads"""
+    x = np.random.rand(1, 28, 28, 1).astype(np.float32)
+    latencies = [[] for _ in range(clients)]
+    barrier = threading.Barrier(clients + 1)
+
+    def client(index):
+        barrier.wait()
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            model.predict(x, verbose=0)
+            latencies[index].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return clients * requests_per_client / elapsed, np.concatenate(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="keras", help="backend the model runs with")
+    parser.add_argument("--requests", type=int, default=200, help="predictions per client")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    model = inference.load_backend_model("mnist_cnn_model.h5", args.backend)
+    inference.warm_up(model)
+    batcher = MicroBatcher(model, args.max_batch_size, args.max_wait_ms)
+
+    print(f"{'clients':<9}{'path':<10}{'img/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'avg batch':>11}")
+    for clients in CLIENT_COUNTS:
+        for name, target in (("direct", model), ("batched", batcher)):
+            before = dict(batcher.stats)
+            throughput, latencies = run_clients(target, clients, args.requests)
+            batches = batcher.stats["batches"] - before["batches"]
+            average_batch = (batcher.stats["images"] - before["images"]) / batches if batches else 1.0
+            print(
+                f"{clients:<9}{name:<10}{throughput:>10.0f}{np.percentile(latencies, 50):>10.3f}"
+                f"{np.percentile(latencies, 99):>10.3f}{average_batch:>11.1f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Measure cold-start time and resident memory of eager vs lazy per-mode model loading
+
+Each scenario runs in a fresh interpreter so import and load costs are not shared.
+
+Usage: python benchmarks/bench_model_loading.py [--backend keras]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "imports only": [],
+    "eager (both models)": ["mnist_cnn_model.h5", "arpit.h5"],
+    "lazy (digit only)": ["mnist_cnn_model.h5"],
+    "lazy (alphabet only)": ["arpit.h5"],
+}
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import inference
+for path in sys.argv[2:]:
+    inference.load_model(path, sys.argv[1])
+elapsed = time.perf_counter() - start
+with open("/proc/self/status") as status:
+    rss_kb = next(int(line.split()[1]) for line in status if line.startswith("VmRSS:"))
+print(json.dumps({"seconds": elapsed, "rss_mb": rss_kb / 1024}))
+"""
+
+def run_scenario(backend, paths):
+    """Load `paths` in a fresh interpreter and return its timing and RSS"""
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, backend] + paths,
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="keras", help="inference backend to load with")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<24}{'startup s':>12}{'RSS MB':>10}")
+    for name, paths in SCENARIOS.items():
+        result = run_scenario(args.backend, paths)
+        print(f"{name:<24}{result['seconds']:>12.2f}{result['rss_mb']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Per-stage latency breakdown of the preprocessing pipelines, from JPEG bytes to the 28x28 input
+
+Runs each mode's pipeline over a noisy paper photo with a dark stroke at a
+few sizes, with the camera/upload settings (ROI and HDAR_THRESHOLD) and with
+the plain whole-frame settings, and prints the mean time of every stage.
+
+Usage: python benchmarks/bench_pipeline.py [--repeats 20]
+"""
+import argparse
+import io
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from preprocessing import PIPELINES, Pipeline
+
+SIZES = {"0.3 MP": (640, 480), "1 MP": (1152, 864), "12 MP": (4000, 3000)}
+
+def photo(width, height):
+    """JPEG bytes of a dark stroke on noisy light paper"""
+    rng = np.random.default_rng(0)
+    paper = rng.normal(210, 10, (height, width)).clip(0, 255).astype(np.uint8)
+    paper[height // 4:height * 3 // 4, width * 9 // 20:width * 11 // 20] = 30
+    buffer = io.BytesIO()
+    Image.fromarray(paper).convert("RGB").save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    settings = {
+        "whole frame": {},
+        f"roi + {config.THRESHOLD_METHOD}": {"roi": True, "threshold": config.THRESHOLD_METHOD},
+    }
+    stage_names = [name for name, _, _ in PIPELINES["digit"].stages]
+    print(f"{'mode':<10}{'size':<8}{'settings':<16}" + "".join(f"{name:>11}" for name in stage_names) + f"{'total':>9}")
+    for mode, pipeline in PIPELINES.items():
+        for size_name, (width, height) in SIZES.items():
+            data = photo(width, height)
+            for settings_name, options in settings.items():
+                # A fresh pipeline per row so its stats only cover this row's runs
+                timed = Pipeline(mode, pipeline.stages)
+                timed.run(io.BytesIO(data), **options)
+                timed.stats = {name: [0, 0.0] for name in timed.stats}
+                for _ in range(args.repeats):
+                    timed.run(io.BytesIO(data), **options)
+                means = timed.mean_timings()
+                row = "".join(f"{means[name]:>11.2f}" if name in means else f"{'-':>11}" for name in stage_names)
+                print(f"{mode:<10}{size_name:<8}{settings_name:<16}{row}{sum(means.values()):>9.2f}")
+
+if __name__ == "__main__":
+    main()
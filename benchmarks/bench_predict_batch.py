@@ -0,0 +1,63 @@
+"""Throughput of predict_batch against one predict call per image, at batch sizes 1 to 1024
+
+Usage: python benchmarks/bench_predict_batch.py [--backend keras] [--chunk-size 64] [--pil]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import inference
+from prediction import predict_batch
+
+BATCH_SIZES = (1, 4, 16, 64, 256, 1024)
+
+def make_images(count, pil):
+    """Preprocessed 28x28 arrays, or 280x280 PIL images that still need preprocessing"""
+    rng = np.random.default_rng(0)
+    images = rng.random((count, 28, 28), dtype=np.float32)
+    if not pil:
+        return list(images)
+    from PIL import Image
+
+    return [Image.fromarray((255 - np.kron(image, np.ones((10, 10))) * 255).astype(np.uint8)) for image in images]
+
+def images_per_second(predict, images, min_seconds=1.0):
+    """Repeat `predict(images)` for at least `min_seconds` and return images per second"""
+    predict(images)
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        predict(images)
+        calls += 1
+    return calls * len(images) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="keras", help="inference backend to load with")
+    parser.add_argument("--chunk-size", type=int, default=config.PREDICT_CHUNK_SIZE)
+    parser.add_argument("--pil", action="store_true", help="include preprocessing of PIL images")
+    args = parser.parse_args()
+
+    model = inference.load_model(config.MODEL_PATHS["digit"], args.backend)
+    inference.warm_up(model)
+
+    def batched(images):
+        return predict_batch(images, "digit", model, chunk_size=args.chunk_size)
+
+    def one_by_one(images):
+        return [predict_batch([image], "digit", model)[0] for image in images]
+
+    print(f"{'batch':>6}{'per-image img/s':>17}{'batched img/s':>15}{'speed-up':>10}")
+    for batch_size in BATCH_SIZES:
+        images = make_images(batch_size, args.pil)
+        single = images_per_second(one_by_one, images)
+        batch = images_per_second(batched, images)
+        print(f"{batch_size:>6}{single:>17.0f}{batch:>15.0f}{batch / single:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
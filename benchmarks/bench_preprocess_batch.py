@@ -0,0 +1,62 @@
+"""Throughput of preprocess_batch against preprocess_image in a loop, and a bit-for-bit check
+
+Images are decoded grayscale arrays of one size (280x280 by default, the
+canvas size), with a dark stroke on a light background. Both modes are run,
+and the batched output is compared to the per-image output before timing.
+
+Usage: python benchmarks/bench_preprocess_batch.py [--size 280x280] [--batches 1,16,64,256,1024]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocessing import preprocess_batch, preprocess_image
+
+def make_arrays(count, height, width):
+    """Light backgrounds with a dark vertical stroke in a different place in each image"""
+    rng = np.random.default_rng(0)
+    arrays = rng.integers(200, 256, (count, height, width), dtype=np.uint8)
+    for array in arrays:
+        left = rng.integers(0, width * 3 // 4)
+        array[height // 8:height * 7 // 8, left:left + max(width // 10, 1)] = rng.integers(0, 60)
+    return list(arrays)
+
+def images_per_second(preprocess, images, min_seconds=1.0):
+    """Repeat `preprocess(images)` for at least `min_seconds` and return images per second"""
+    preprocess(images)
+    calls, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        preprocess(images)
+        calls += 1
+    return calls * len(images) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="280x280", help="image size as WIDTHxHEIGHT")
+    parser.add_argument("--batches", default="1,16,64,256,1024", help="comma-separated batch sizes")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split("x"))
+
+    print(f"{'mode':<10}{'batch':>6}{'per-image img/s':>17}{'batched img/s':>15}{'speed-up':>10}")
+    for mode in ("digit", "alphabet"):
+        for batch_size in (int(v) for v in args.batches.split(",")):
+            arrays = make_arrays(batch_size, height, width)
+            images = [Image.fromarray(array) for array in arrays]
+            out = np.empty((batch_size, 28, 28), dtype=np.float32)
+
+            expected = np.stack([preprocess_image(image, mode) for image in images])
+            if not np.array_equal(preprocess_batch(arrays, mode, out=out), expected):
+                sys.exit(f"{mode} batch of {batch_size}: output differs from preprocess_image")
+
+            single = images_per_second(lambda batch: [preprocess_image(image, mode) for image in batch], images)
+            batched = images_per_second(lambda batch: preprocess_batch(batch, mode, out=out), arrays)
+            print(f"{mode:<10}{batch_size:>6}{single:>17.0f}{batched:>15.0f}{batched / single:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
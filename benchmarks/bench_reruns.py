@@ -0,0 +1,56 @@
+"""Script time and model calls per rerun of HDAR.py for display-only interactions
+
+Drives the app headlessly with Streamlit's AppTest: alphabet mode, Sample
+Dataset input, one "Load Sample & Predict" click, then the debug checkbox
+toggled on and off. Each rerun's script time and model calls are read from
+the "This rerun" caption in the sidebar.
+
+Usage: python benchmarks/bench_reruns.py [--toggles 10]
+"""
+import argparse
+import os
+import re
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RERUN_CAPTION = re.compile(r"This rerun: ([\d.]+) ms, (\d+) model calls")
+
+def rerun_stats(at):
+    """(script ms, model calls) of the last rerun, from the sidebar caption"""
+    for caption in at.sidebar.caption:
+        match = RERUN_CAPTION.search(caption.value)
+        if match:
+            return float(match.group(1)), int(match.group(2))
+    raise RuntimeError(f"No rerun caption after the last run: {at.exception}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--toggles", type=int, default=10, help="debug checkbox toggles to time")
+    args = parser.parse_args()
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(ROOT)
+    at = AppTest.from_file(os.path.join(ROOT, "HDAR.py"), default_timeout=300)
+    at.run()
+    at.radio[0].set_value("🔤 Alphabet Recognition (A-Z)").run()
+    [radio for radio in at.radio if "🗃️ Sample Dataset" in radio.options][0].set_value("🗃️ Sample Dataset").run()
+    rows = {}
+
+    [button for button in at.button if button.label == "Load Sample & Predict"][0].click().run()
+    rows["predict click"] = [rerun_stats(at)]
+    rows["debug toggle"] = []
+    for i in range(args.toggles):
+        [box for box in at.checkbox if box.label == "🔍 Enable Debug Mode"][0].set_value(i % 2 == 0).run()
+        rows["debug toggle"].append(rerun_stats(at))
+
+    print(f"{'interaction':<16}{'reruns':>7}{'mean ms':>9}{'model calls':>13}")
+    for name, stats in rows.items():
+        times, calls = zip(*stats)
+        print(f"{name:<16}{len(stats):>7}{np.mean(times):>9.1f}{sum(calls):>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Latency of a result-cache hit against preprocessing and predicting, and hit rate under a byte budget
+
+A miss is what a camera frame or upload costs without the cache: hash the
+bytes, decode, run the camera/upload pipeline and predict. A hit is hashing
+the bytes and a lookup. The hit-rate part replays a stream of uploads where
+a few photos come back often (Zipf-distributed picks from a pool, as when
+users retry or share the same picture) through caches of several sizes.
+
+Usage: python benchmarks/bench_result_cache.py [--repeats 20] [--requests 2000] [--backend keras]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import inference
+from prediction import predict_batch
+from preprocessing import PIPELINES
+from result_cache import ResultCache, cache_key
+
+SIZES = {"0.3 MP": (640, 480), "1 MP": (1152, 864), "12 MP": (4000, 3000)}
+POOL = 500
+BUDGETS_MB = (0.1, 1, 8)
+
+def photo(width, height, seed=0):
+    """JPEG bytes of a dark stroke on noisy light paper"""
+    rng = np.random.default_rng(seed)
+    paper = rng.normal(210, 10, (height, width)).clip(0, 255).astype(np.uint8)
+    paper[height // 4:height * 3 // 4, width * 9 // 20:width * 11 // 20] = 30
+    buffer = io.BytesIO()
+    Image.fromarray(paper).convert("RGB").save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+def lookup(cache, data, model_entry):
+    """Serve one camera frame or upload through the cache, as the apps do"""
+    key = cache_key(data, "digit", model_entry, config.PREPROCESS_ROI, config.THRESHOLD_METHOD)
+    entry = cache.get(key)
+    if entry is None:
+        run = PIPELINES["digit"].start(io.BytesIO(data))
+        processed, _ = run.finish(roi=config.PREPROCESS_ROI, threshold=config.THRESHOLD_METHOD)
+        result = predict_batch([processed], "digit", model_entry["model"], model_entry["labels"])[0]
+        entry = {"processed": processed, "result": result, "steps": None}
+        cache.put(key, entry)
+    return entry
+
+def mean_ms(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=2000, help="uploads replayed per cache size")
+    parser.add_argument("--backend", default="keras", help="inference backend")
+    args = parser.parse_args()
+
+    model = inference.load_model(config.MODEL_PATHS["digit"], args.backend)
+    inference.warm_up(model)
+    model_entry = {
+        "model": model, "labels": tuple(str(i) for i in range(10)), "version": "bench",
+        "sha256": "bench", "backend": args.backend, "precision": None,
+    }
+
+    print(f"{'size':<8}{'miss ms':>9}{'hit ms':>9}{'speed-up':>10}")
+    for name, (width, height) in SIZES.items():
+        data = photo(width, height)
+        miss = mean_ms(lambda: lookup(ResultCache(), data, model_entry), args.repeats)
+        cache = ResultCache()
+        lookup(cache, data, model_entry)
+        hit = mean_ms(lambda: lookup(cache, data, model_entry), args.repeats)
+        print(f"{name:<8}{miss:>9.2f}{hit:>9.3f}{miss / hit:>9.0f}x")
+
+    print()
+    pool = [photo(96, 96, seed) for seed in range(POOL)]
+    rng = np.random.default_rng(0)
+    picks = (rng.zipf(1.3, args.requests) - 1) % POOL
+    print(f"{'budget MB':<11}{'entries':>9}{'hit rate':>10}{'evictions':>11}{'mean ms':>9}")
+    for budget in BUDGETS_MB:
+        cache = ResultCache(int(budget * 2**20))
+        start = time.perf_counter()
+        for pick in picks:
+            lookup(cache, pool[pick], model_entry)
+        elapsed = (time.perf_counter() - start) / len(picks) * 1000
+        print(f"{budget:<11}{len(cache):>9}{cache.hit_rate():>10.1%}{cache.stats['evictions']:>11}{elapsed:>9.2f}")
+
+if __name__ == "__main__":
+    main()
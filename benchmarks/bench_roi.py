@@ -0,0 +1,74 @@
+"""Accuracy and latency of the ROI + MNIST-centring stage against whole-frame preprocess_image
+
+Digit samples are drawn as dark ink on noisy light paper in 1000x750
+frames (the working size open_image leaves phone photos at). Each digit is
+drawn at a random position, with a height of 10%, 25% or 50% of the frame.
+The raw 28x28 samples, as the Sample Dataset mode feeds them, are included
+to check the stage does no harm on already-centred input.
+
+Usage: python benchmarks/bench_roi.py [--samples 200] [--backend keras]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import inference
+from prediction import predict_batch
+from preprocessing import preprocess_image
+from samples import load_samples
+
+FRAME = (1000, 750)
+DIGIT_HEIGHTS = (0.1, 0.25, 0.5)
+
+def frame_with_digit(digit, height_fraction, rng):
+    """A 1000x750 photo-like frame with a 28x28 sample (white on black, 0-1) drawn at a random position"""
+    import cv2
+    from PIL import Image
+
+    width, height = FRAME
+    paper = rng.normal(215, 12, (height, width)).clip(0, 255).astype(np.uint8)
+    side = int(height * height_fraction)
+    ink = cv2.resize(digit.reshape(28, 28), (side, side), interpolation=cv2.INTER_CUBIC).clip(0, 1)
+    top, left = rng.integers(0, height - side), rng.integers(0, width - side)
+    region = paper[top:top + side, left:left + side]
+    region[:] = (region * (1 - ink) + 30 * ink).astype(np.uint8)
+    return Image.fromarray(paper)
+
+def evaluate(images, labels, model, roi):
+    """Accuracy and mean preprocessing latency of one configuration"""
+    start = time.perf_counter()
+    processed = [preprocess_image(image, "digit", roi=roi) for image in images]
+    mean_ms = (time.perf_counter() - start) / len(images) * 1000
+    results = predict_batch(processed, "digit", model)
+    accuracy = np.mean([result.label == str(label) for result, label in zip(results, labels)])
+    return accuracy, mean_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=200, help="digits per input set")
+    parser.add_argument("--backend", default="keras", help="inference backend")
+    args = parser.parse_args()
+    from PIL import Image
+
+    model = inference.load_model(config.MODEL_PATHS["digit"], args.backend)
+    digits, labels = load_samples("digit", "test", args.samples)
+    rng = np.random.default_rng(0)
+
+    input_sets = {"28x28 sample": [Image.fromarray((255 - digit.reshape(28, 28) * 255).astype(np.uint8)) for digit in digits]}
+    for fraction in DIGIT_HEIGHTS:
+        input_sets[f"frame, {fraction:.0%} high"] = [frame_with_digit(digit, fraction, rng) for digit in digits]
+
+    print(f"{'input':<20}{'whole-frame acc':>16}{'ms':>7}{'roi acc':>9}{'ms':>7}")
+    for name, images in input_sets.items():
+        whole_accuracy, whole_ms = evaluate(images, labels, model, roi=False)
+        roi_accuracy, roi_ms = evaluate(images, labels, model, roi=True)
+        print(f"{name:<20}{whole_accuracy:>16.1%}{whole_ms:>7.2f}{roi_accuracy:>9.1%}{roi_ms:>7.2f}")
+
+if __name__ == "__main__":
+    main()
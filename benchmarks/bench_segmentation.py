@@ -0,0 +1,107 @@
+"""Latency and accuracy of multi-character line reading for 5, 20 and 100-character lines
+
+Lines are built from the digit and alphabet sample sets: each sample is
+cropped to its ink, scaled to 56 px high and drawn as dark ink on noisy light
+paper, separated by random gaps, with a --touching fraction of neighbours
+drawn overlapping so the projection-profile split is exercised. Segmentation
+time covers the whole line pipeline (grayscale to normalized stack); predict
+is the one batched call of read_line, compared with a call per character.
+
+Usage: python benchmarks/bench_segmentation.py [--lines 10] [--touching 0.1] [--backend keras]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import inference
+from prediction import predict_batch
+from samples import load_samples
+from segmentation import segment_line_with_steps
+
+LENGTHS = (5, 20, 100)
+INK_HEIGHT = 56
+MARGIN = 24
+
+def draw_line(samples, rng, touching):
+    """A grayscale PIL line of samples (white on black, 0-1) drawn as ink on paper, left to right"""
+    import cv2
+    from PIL import Image
+
+    inks = []
+    for sample in samples:
+        sample = sample.reshape(28, 28)
+        rows, cols = np.flatnonzero(sample.max(axis=1) > 0.2), np.flatnonzero(sample.max(axis=0) > 0.2)
+        ink = sample[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        width = max(1, round(ink.shape[1] * INK_HEIGHT / ink.shape[0]))
+        inks.append(cv2.resize(ink, (width, INK_HEIGHT), interpolation=cv2.INTER_CUBIC).clip(0, 1))
+    gaps = np.where(rng.random(len(inks)) < touching, -3, rng.integers(8, 24, len(inks)))
+    width = sum(ink.shape[1] for ink in inks) + int(gaps[1:].sum()) + 2 * MARGIN
+    paper = rng.normal(215, 10, (INK_HEIGHT + 2 * MARGIN, width))
+    left = MARGIN
+    for ink, gap in zip(inks, gaps):
+        left += int(gap) if left > MARGIN else 0
+        region = paper[MARGIN:MARGIN + INK_HEIGHT, left:left + ink.shape[1]]
+        region[:] = np.minimum(region, region * (1 - ink) + 30 * ink)
+        left += ink.shape[1]
+    return Image.fromarray(paper.clip(0, 255).astype(np.uint8))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=10, help="lines per mode and length")
+    parser.add_argument("--touching", type=float, default=0.1, help="fraction of neighbours drawn touching")
+    parser.add_argument("--backend", default="keras", help="inference backend")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    # The EMNIST-style alphabet fallback draws its samples with the global generators
+    random.seed(0)
+    np.random.seed(0)
+
+    print(
+        f"{'mode':<10}{'chars':>6}{'segment ms':>12}{'predict ms':>12}{'total ms':>10}"
+        f"{'per-char predict ms':>21}{'count ok':>10}{'char acc':>10}"
+    )
+    for mode, h5_path in config.MODEL_PATHS.items():
+        model = inference.load_model(h5_path, args.backend)
+        inference.warm_up(model)
+        samples, labels = load_samples(mode, "test", max(LENGTHS) * args.lines)
+        label_names = [str(label) for label in labels]
+        for length in LENGTHS:
+            segment_s = predict_s = single_s = 0.0
+            count_ok = correct = compared = 0
+            for line in range(args.lines):
+                picks = rng.choice(len(samples), length, replace=False)
+                image = draw_line(samples[picks], rng, args.touching)
+
+                start = time.perf_counter()
+                characters, boxes, _ = segment_line_with_steps(image, mode, capture_steps=False, threshold=config.THRESHOLD_METHOD)
+                segment_s += time.perf_counter() - start
+
+                start = time.perf_counter()
+                results = predict_batch(characters, mode, model)
+                predict_s += time.perf_counter() - start
+
+                start = time.perf_counter()
+                for character in characters:
+                    predict_batch([character], mode, model)
+                single_s += time.perf_counter() - start
+
+                if len(results) == length:
+                    count_ok += 1
+                    correct += sum(result.label == label_names[i] for result, i in zip(results, picks))
+                    compared += length
+            per_line = 1000 / args.lines
+            print(
+                f"{mode:<10}{length:>6}{segment_s * per_line:>12.2f}{predict_s * per_line:>12.2f}"
+                f"{(segment_s + predict_s) * per_line:>10.2f}{single_s * per_line:>21.2f}"
+                f"{count_ok / args.lines:>10.0%}{correct / compared if compared else 0.0:>10.1%}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Allocations and peak memory of preprocessing a 12 MP camera image, with and without step capture
+
+Every line executed in preprocessing.py is traced; tracemalloc's peak over
+that line counts as its allocation. Lines that allocate at least 1 MB are
+counted as large allocations. Peak is the highest traced memory above the
+starting point during the call, and retained is what is still held
+afterwards, with the steps dict kept alive.
+
+Usage: python benchmarks/bench_step_capture.py [--size 4000x3000] [--mode digit]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import preprocessing
+from preprocessing import preprocess_image, preprocess_image_with_steps
+
+LARGE = 1 << 20
+
+def camera_image(width, height):
+    """A dark stroke on a light, slightly noisy background, like a phone photo of a character"""
+    rng = np.random.default_rng(0)
+    canvas = rng.integers(200, 240, (height, width), dtype=np.uint8)
+    canvas[height // 5:height * 4 // 5, width * 9 // 20:width * 11 // 20] = 25
+    return Image.fromarray(np.stack([canvas] * 3, axis=-1))
+
+def traced_allocations(call):
+    """Run `call` under a line tracer; return (large allocations, MB allocated, peak MB, retained MB)"""
+    per_line = []
+
+    def tracer(frame, event, arg):
+        if frame.f_code.co_filename != preprocessing.__file__:
+            return None
+        if event in ("line", "return"):
+            current, peak = tracemalloc.get_traced_memory()
+            per_line.append(peak - tracer.start)
+            tracemalloc.reset_peak()
+            tracer.start = tracemalloc.get_traced_memory()[0]
+        return tracer
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracer.start = baseline
+    sys.settrace(tracer)
+    try:
+        result = call()
+    finally:
+        sys.settrace(None)
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    # Peak over the whole call, measured on its own so the per-line resets don't hide it
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+
+    large = sum(1 for allocated in per_line if allocated >= LARGE)
+    return large, sum(per_line) / 1e6, peak / 1e6, retained / 1e6
+
+def mean_ms(call, repeats=10):
+    call()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        call()
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="4000x3000", help="image size as WIDTHxHEIGHT")
+    parser.add_argument("--mode", default="digit", choices=("digit", "alphabet"))
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split("x"))
+    image = camera_image(width, height)
+
+    calls = {
+        "preprocess_image": lambda: preprocess_image(image, args.mode),
+        "with_steps": lambda: preprocess_image_with_steps(image, args.mode),
+    }
+    print(f"{width}x{height} {args.mode}")
+    print(f"{'call':<18}{'large allocs':>13}{'MB allocated':>14}{'peak MB':>9}{'retained MB':>13}{'mean ms':>9}")
+    for name, call in calls.items():
+        large, allocated, peak, retained = traced_allocations(call)
+        print(f"{name:<18}{large:>13}{allocated:>14.1f}{peak:>9.1f}{retained:>13.1f}{mean_ms(call):>9.1f}")
+
+if __name__ == "__main__":
+    main()
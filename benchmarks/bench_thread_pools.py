@@ -0,0 +1,106 @@
+"""Sweep TensorFlow / OpenCV thread-pool sizes under concurrent sessions
+
+Each combination runs in a fresh interpreter, since TensorFlow fixes its pools
+once it has executed an op. Client threads stand in for Streamlit sessions:
+each one preprocesses a camera-sized image with preprocess_image and
+runs a prediction, back to back. Results are sorted by throughput. Put the
+winning values in HDAR_TF_INTRA_OP_THREADS / HDAR_TF_INTER_OP_THREADS /
+HDAR_CV2_THREADS for that machine size.
+
+Usage: python benchmarks/bench_thread_pools.py [--clients 8] [--intra 0,1,2] [--inter 0,1] [--cv2=-1,0,1]
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, threading, time
+import numpy as np
+from PIL import Image
+import config, inference
+from preprocessing import preprocess_image
+
+backend, clients, requests_per_client = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+model = inference.load_model(config.MODEL_PATHS["digit"], backend)
+inference.warm_up(model)
+
+# A dark stroke on a light 1280x960 background, like a phone photo of a digit
+canvas = np.full((960, 1280), 235, dtype=np.uint8)
+canvas[200:760, 600:680] = 20
+image = Image.fromarray(canvas)
+
+latencies = [[] for _ in range(clients)]
+barrier = threading.Barrier(clients + 1)
+
+def client(index):
+    barrier.wait()
+    for _ in range(requests_per_client):
+        start = time.perf_counter()
+        norm_img = preprocess_image(image, "digit")
+        model.predict(norm_img.reshape(1, 28, 28, 1), verbose=0)
+        latencies[index].append((time.perf_counter() - start) * 1000)
+
+threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+for thread in threads:
+    thread.start()
+barrier.wait()
+start = time.perf_counter()
+for thread in threads:
+    thread.join()
+elapsed = time.perf_counter() - start
+latencies = np.concatenate(latencies)
+print(json.dumps({
+    "throughput": clients * requests_per_client / elapsed,
+    "p50_ms": float(np.percentile(latencies, 50)),
+    "p99_ms": float(np.percentile(latencies, 99)),
+}))
+"""
+
+def parse_sizes(value):
+    return [int(size) for size in value.split(",") if size.strip()]
+
+def run_combination(backend, clients, requests, intra, inter, cv2_threads):
+    """Throughput and latency percentiles for one pool-size combination"""
+    env = dict(
+        os.environ,
+        TF_CPP_MIN_LOG_LEVEL="3",
+        HDAR_TF_INTRA_OP_THREADS=str(intra),
+        HDAR_TF_INTER_OP_THREADS=str(inter),
+        HDAR_CV2_THREADS=str(cv2_threads),
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, backend, str(clients), str(requests)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default="keras", help="inference backend to load with")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    parser.add_argument("--intra", type=parse_sizes, default=[0, 1, 2], help="TensorFlow intra-op sizes (0 = default)")
+    parser.add_argument("--inter", type=parse_sizes, default=[0, 1], help="TensorFlow inter-op sizes (0 = default)")
+    parser.add_argument("--cv2", type=parse_sizes, default=[-1, 0, 1], help="OpenCV pool sizes (-1 = default)")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} clients, {args.backend} backend")
+    results = []
+    for intra, inter, cv2_threads in itertools.product(args.intra, args.inter, args.cv2):
+        result = run_combination(args.backend, args.clients, args.requests, intra, inter, cv2_threads)
+        results.append(((intra, inter, cv2_threads), result))
+
+    print(f"{'tf intra':>9}{'tf inter':>9}{'cv2':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for (intra, inter, cv2_threads), result in sorted(results, key=lambda item: -item[1]["throughput"]):
+        print(
+            f"{intra:>9}{inter:>9}{cv2_threads:>6}{result['throughput']:>10.1f}"
+            f"{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Latency and accuracy of the thresholding strategies on the sample sets under different lighting
+
+Digit and alphabet samples are drawn as ink on paper in 1000x750 frames
+(the working size open_image leaves phone photos at), at a random position
+and 40% of the frame height, under four lighting conditions plus light ink on
+dark backgrounds (chalk on a board, a white-on-black screen). Every frame goes
+through the camera/upload pipeline (preprocess_image with roi on, or off with
+--no-roi) once per strategy. Latency is the thresholding step alone on a full
+frame.
+
+Usage: python benchmarks/bench_thresholding.py [--samples 200] [--no-roi] [--backend keras]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+import inference
+from prediction import predict_batch
+from preprocessing import preprocess_image
+from samples import load_samples
+from thresholding import THRESHOLD_METHODS, threshold_image
+
+FRAME = (1000, 750)
+# Lighting -> (paper brightness at the left edge, at the right edge, ink brightness)
+LIGHTING = {
+    "normal": (215, 215, 30),
+    "dim": (95, 95, 35),
+    "uneven": (235, 70, 25),
+    "low contrast": (170, 170, 110),
+    "light on dark": (40, 40, 220),
+    "light, uneven": (90, 15, 200),
+}
+
+def frame_with_sample(sample, lighting, rng):
+    """A photo-like frame with a 28x28 sample (white on black, 0-1) drawn as ink under some lighting"""
+    import cv2
+    from PIL import Image
+
+    width, height = FRAME
+    paper_left, paper_right, ink_level = LIGHTING[lighting]
+    paper = np.linspace(paper_left, paper_right, width)[None, :] + rng.normal(0, 8, (height, width))
+    side = int(height * 0.4)
+    ink = cv2.resize(sample.reshape(28, 28), (side, side), interpolation=cv2.INTER_CUBIC).clip(0, 1)
+    top, left = rng.integers(0, height - side), rng.integers(0, width - side)
+    region = paper[top:top + side, left:left + side]
+    region[:] = region * (1 - ink) + ink_level * ink
+    return Image.fromarray(paper.clip(0, 255).astype(np.uint8))
+
+def threshold_ms(frame, method, repeats=10):
+    """Mean latency of one thresholding strategy on a full frame"""
+    threshold_image(frame, method)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        threshold_image(frame, method)
+    return (time.perf_counter() - start) / repeats * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=200, help="samples per mode and lighting condition")
+    parser.add_argument("--no-roi", action="store_true", help="threshold whole frames instead of ROI crops")
+    parser.add_argument("--backend", default="keras", help="inference backend")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    frame = np.asarray(frame_with_sample(np.zeros(784), "uneven", rng))
+    print(f"threshold latency on a {FRAME[0]}x{FRAME[1]} frame:")
+    for method in THRESHOLD_METHODS:
+        print(f"  {method:<10}{threshold_ms(frame, method):>8.2f} ms")
+
+    print()
+    print(f"{'mode':<10}{'lighting':<14}" + "".join(f"{method:>10}" for method in THRESHOLD_METHODS))
+    for mode, h5_path in config.MODEL_PATHS.items():
+        model = inference.load_model(h5_path, args.backend)
+        samples, labels = load_samples(mode, "test", args.samples)
+        for lighting in LIGHTING:
+            frames = [frame_with_sample(sample, lighting, rng) for sample in samples]
+            accuracies = []
+            for method in THRESHOLD_METHODS:
+                processed = [preprocess_image(frame, mode, roi=not args.no_roi, threshold=method) for frame in frames]
+                results = predict_batch(processed, mode, model)
+                accuracies.append(np.mean([result.label == str(label) for result, label in zip(results, labels)]))
+            print(f"{mode:<10}{lighting:<14}" + "".join(f"{accuracy:>10.1%}" for accuracy in accuracies))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Confidence-gated model cascade
+
+Most uploads are easy. A tiny first-stage model (max-pool, one small hidden
+layer) trained offline by train_cascade.py answers first. Only the images
+whose first-stage confidence or top-2 margin falls below the thresholds are
+sent to the full CNN. The first stage runs on the NumPy engine by default,
+where a single image costs microseconds.
+"""
+import os
+import threading
+
+import numpy as np
+
+import config
+
+def cascade_path_for(h5_path):
+    """Path of the first-stage model trained for a full .h5 model"""
+    return os.path.splitext(h5_path)[0] + ".cascade.h5"
+
+class CascadeModel:
+    """Model wrapper that answers from a first-stage model when it is confident, deferring to the full model otherwise"""
+
+    def __init__(self, first_stage, model, min_confidence=None, min_margin=None):
+        self.first_stage = first_stage
+        self.model = model
+        self.min_confidence = config.CASCADE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        self.min_margin = config.CASCADE_MIN_MARGIN if min_margin is None else min_margin
+        self.input_shape = model.input_shape
+        self.output_shape = model.output_shape
+        self.input_dtype = getattr(model, "input_dtype", np.float32)
+        self.stats = {"images": 0, "first_stage": 0}
+        # Sessions call predict() from their own threads
+        self._stats_lock = threading.Lock()
+
+    def confident(self, probabilities):
+        """Rows whose top probability and top-2 margin both clear the thresholds"""
+        top_two = np.sort(probabilities, axis=1)[:, -2:]
+        return (top_two[:, 1] >= self.min_confidence) & (top_two[:, 1] - top_two[:, 0] >= self.min_margin)
+
+    def predict(self, x, verbose=0):
+        """Run the cascade, mirroring keras.Model.predict"""
+        output = np.asarray(self.first_stage.predict(x, verbose=0), dtype=np.float32)
+        deferred = ~self.confident(output)
+        with self._stats_lock:
+            self.stats["images"] += len(output)
+            self.stats["first_stage"] += len(output) - int(deferred.sum())
+        if deferred.any():
+            output[deferred] = self.model.predict(np.asarray(x)[deferred], verbose=0)
+        return output
+
+    def __call__(self, x):
+        return self.predict(x)
+
+    def hit_rate(self):
+        """Fraction of images answered by the first stage so far"""
+        with self._stats_lock:
+            return self.stats["first_stage"] / self.stats["images"] if self.stats["images"] else 0.0
+
+    def reset_stats(self):
+        """Zero the counters, so warm-up batches do not count as traffic"""
+        with self._stats_lock:
+            self.stats = {"images": 0, "first_stage": 0}
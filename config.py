@@ -0,0 +1,173 @@
+"""Runtime configuration shared by HDAR.py and app.py, read from environment variables"""
+import os
+
+# ---------------------------
+# Inference Backend
+# ---------------------------
+# Which runtime serves predictions:
+#   "keras"           the .h5 models through tf.keras
+#   "onnx"            ONNX Runtime sessions over the .onnx exports
+#   "tflite-int8"     quantized TFLite exports built by quantize.py
+#   "tflite-float16"
+#   "numpy"           numpy_engine.py, no TensorFlow needed
+#   "remote"          the shared inference_server.py daemon
+INFERENCE_BACKEND = os.environ.get("HDAR_BACKEND", "keras").strip().lower()
+
+# Model files per mode; a manifest (see model_registry.py) can point a mode
+# at a new versioned file at runtime without a restart
+MODEL_PATHS = {
+    "digit": os.environ.get("HDAR_DIGIT_MODEL", "mnist_cnn_model.h5"),
+    "alphabet": os.environ.get("HDAR_ALPHABET_MODEL", "arpit.h5"),
+}
+MODEL_MANIFEST = os.environ.get("HDAR_MODEL_MANIFEST", "model_manifest.json")
+# Seconds between checks for new model versions; 0 disables hot reload
+MODEL_POLL_INTERVAL = float(os.environ.get("HDAR_MODEL_POLL_INTERVAL", "10"))
+
+# Per-mode overrides, so e.g. digits can run quantized while letters stay float32
+MODE_BACKENDS = {
+    "digit": os.environ.get("HDAR_DIGIT_BACKEND", INFERENCE_BACKEND).strip().lower(),
+    "alphabet": os.environ.get("HDAR_ALPHABET_BACKEND", INFERENCE_BACKEND).strip().lower(),
+}
+
+# Numeric precision of the keras and numpy backends:
+#   "float32"   full precision
+#   "float16"   NumPy engine: weights stored as float16 (half the weight memory),
+#               accumulating in float32. Keras has no fast float16 CPU kernels, so
+#               it runs "bfloat16" instead.
+#   "bfloat16"  Keras: weights and activations in bfloat16 (half the weight
+#               memory) on CPUs with bf16 instructions (AVX512-BF16 / AMX), and
+#               plain float32 elsewhere, with a logged warning. The NumPy engine
+#               treats it like "float16" since NumPy has no bfloat16 type.
+# The precision a model actually runs at is shown next to its version in the
+# sidebar. Other backends always run their own fixed precision.
+MODEL_PRECISION = os.environ.get("HDAR_PRECISION", "float32").strip().lower()
+# A reduced-precision model is checked against float32 on its mode's samples
+# (MNIST test digits, the alphabet samples) when it loads and falls back to
+# float32 if fewer predictions than this agree, or if no samples can be loaded
+PRECISION_MIN_AGREEMENT = float(os.environ.get("HDAR_PRECISION_MIN_AGREEMENT", "0.98"))
+PRECISION_CHECK_SAMPLES = int(os.environ.get("HDAR_PRECISION_CHECK_SAMPLES", "104"))
+
+# Unix socket of the shared inference daemon used by the "remote" backend
+INFERENCE_SOCKET = os.environ.get("HDAR_INFERENCE_SOCKET", "/tmp/hdar-inference.sock")
+
+# Interpreter threads for the TFLite backends (XNNPACK uses the same pool)
+TFLITE_NUM_THREADS = int(os.environ.get("HDAR_TFLITE_THREADS", "1"))
+
+# Serve small Keras batches through a compiled tf.function instead of
+# model.predict, which builds a data adapter and step loop on every call.
+# Batches larger than KERAS_FAST_PATH_MAX_BATCH still go through predict.
+KERAS_FAST_PATH = os.environ.get("HDAR_KERAS_FAST_PATH", "1") == "1"
+KERAS_FAST_PATH_MAX_BATCH = int(os.environ.get("HDAR_KERAS_FAST_PATH_MAX_BATCH", "64"))
+KERAS_JIT_COMPILE = os.environ.get("HDAR_KERAS_JIT_COMPILE", "0") == "1"
+
+# ---------------------------
+# Thread Pools
+# ---------------------------
+# Every Streamlit session is its own thread, so library pools sized to all
+# cores oversubscribe the CPU under concurrency. benchmarks/bench_thread_pools.py
+# sweeps these to find the best combination for a machine size.
+#   TF_INTRA_OP_THREADS   threads inside one TensorFlow op (0 = TensorFlow default)
+#   TF_INTER_OP_THREADS   TensorFlow ops run concurrently (0 = TensorFlow default)
+#   CV2_THREADS           OpenCV's pool for threshold / resize (0 = no pool, negative = OpenCV default)
+#   ONNX_THREADS          ONNX Runtime intra-op threads per session (0 = ONNX Runtime default)
+TF_INTRA_OP_THREADS = int(os.environ.get("HDAR_TF_INTRA_OP_THREADS", "0"))
+TF_INTER_OP_THREADS = int(os.environ.get("HDAR_TF_INTER_OP_THREADS", "0"))
+CV2_THREADS = int(os.environ.get("HDAR_CV2_THREADS", "-1"))
+ONNX_THREADS = int(os.environ.get("HDAR_ONNX_THREADS", "0"))
+
+# Number of best classes (label, score) carried in every prediction result
+TOP_K = int(os.environ.get("HDAR_TOP_K", "3"))
+# Largest batch predict_batch hands to the model in one call; the default keeps
+# Keras on its fast path (see KERAS_FAST_PATH_MAX_BATCH)
+PREDICT_CHUNK_SIZE = int(os.environ.get("HDAR_PREDICT_CHUNK_SIZE", "64"))
+# Pixels preprocess_batch thresholds in one vectorised pass; sized to stay in
+# the L2 cache (256 KiB of uint8 is about three 280x280 canvases)
+PREPROCESS_BLOCK_PIXELS = int(os.environ.get("HDAR_PREPROCESS_BLOCK_PIXELS", "262144"))
+# Largest side of the step previews shown by "Show Preprocessing Steps"
+STEP_PREVIEW_SIZE = int(os.environ.get("HDAR_STEP_PREVIEW_SIZE", "200"))
+# Shorter side camera frames and uploads are reduced toward on decode (see
+# preprocessing.open_image); they end up between this and twice this size
+INGEST_WORKING_SIZE = int(os.environ.get("HDAR_INGEST_WORKING_SIZE", "512"))
+# Crop camera frames and uploads to the ink and centre it MNIST style before
+# resizing (preprocessing.find_ink / center_in_field); the ink is located on a
+# mask at most ROI_MASK_SIZE pixels across. Off by default so the original
+# whole-frame resize is kept; benchmarks/bench_roi.py compares the two.
+PREPROCESS_ROI = os.environ.get("HDAR_PREPROCESS_ROI", "0") == "1"
+ROI_MASK_SIZE = int(os.environ.get("HDAR_ROI_MASK_SIZE", "128"))
+
+# Total bytes of preprocessed images and prediction results kept for repeated
+# uploads and camera frames, shared by every session (see result_cache.py)
+RESULT_CACHE_BYTES = int(float(os.environ.get("HDAR_RESULT_CACHE_MB", "64")) * 2**20)
+
+# ---------------------------
+# Thresholding
+# ---------------------------
+# THRESHOLD_METHOD is the strategy for camera frames and uploads (see
+# thresholding.THRESHOLD_METHODS); dataset samples always use "fixed". The
+# default keeps the original global threshold at 127; compare the methods on
+# the sample sets with benchmarks/bench_thresholding.py before switching.
+# Local methods use a window THRESHOLD_WINDOW_FRACTION of the shorter side of
+# whole frames, and ROI_WINDOW_FRACTION of ROI crops around one character.
+THRESHOLD_METHOD = os.environ.get("HDAR_THRESHOLD", "fixed")
+THRESHOLD_WINDOW_FRACTION = float(os.environ.get("HDAR_THRESHOLD_WINDOW_FRACTION", "0.125"))
+ROI_WINDOW_FRACTION = float(os.environ.get("HDAR_ROI_WINDOW_FRACTION", "0.5"))
+SAUVOLA_K = float(os.environ.get("HDAR_SAUVOLA_K", "0.2"))
+ADAPTIVE_C = float(os.environ.get("HDAR_ADAPTIVE_C", "10"))
+
+# ---------------------------
+# Line Segmentation
+# ---------------------------
+# segmentation.py splits a line of handwriting into characters. Connected
+# components whose longer side is under SEGMENT_MIN_SIZE_FRACTION of the
+# tallest one are noise. Components whose column ranges overlap by
+# SEGMENT_MERGE_OVERLAP of the narrower one are parts of one character, as are
+# pieces shorter than SEGMENT_FRAGMENT_HEIGHT of the tallest character. A
+# component wider than SEGMENT_SPLIT_ASPECT times its height is touching
+# characters, cut at projection-profile minima into pieces about
+# SEGMENT_CHAR_ASPECT as wide as high.
+SEGMENT_MIN_SIZE_FRACTION = float(os.environ.get("HDAR_SEGMENT_MIN_SIZE_FRACTION", "0.25"))
+SEGMENT_MERGE_OVERLAP = float(os.environ.get("HDAR_SEGMENT_MERGE_OVERLAP", "0.15"))
+SEGMENT_FRAGMENT_HEIGHT = float(os.environ.get("HDAR_SEGMENT_FRAGMENT_HEIGHT", "0.5"))
+SEGMENT_SPLIT_ASPECT = float(os.environ.get("HDAR_SEGMENT_SPLIT_ASPECT", "1.15"))
+SEGMENT_CHAR_ASPECT = float(os.environ.get("HDAR_SEGMENT_CHAR_ASPECT", "0.75"))
+
+# ---------------------------
+# Cascade
+# ---------------------------
+# Answer from a tiny first-stage model (<model>.cascade.h5, trained by
+# train_cascade.py) when its top probability and top-2 margin clear these
+# thresholds, and run the full CNN only for the rest. Modes without a trained
+# first stage are unaffected. The default thresholds were chosen on MNIST; the
+# alphabet gate has only been measured on generated letters unless
+# train_cascade.py was run with the A_Z dataset, and is untested on real
+# handwriting.
+CASCADE = os.environ.get("HDAR_CASCADE", "0") == "1"
+CASCADE_BACKEND = os.environ.get("HDAR_CASCADE_BACKEND", "numpy").strip().lower()
+CASCADE_MIN_CONFIDENCE = float(os.environ.get("HDAR_CASCADE_MIN_CONFIDENCE", "0.95"))
+CASCADE_MIN_MARGIN = float(os.environ.get("HDAR_CASCADE_MIN_MARGIN", "0.9"))
+
+# ---------------------------
+# Micro-batching
+# ---------------------------
+# Merge concurrent single-image predictions from different sessions into one
+# forward pass: requests are collected for up to BATCH_MAX_WAIT_MS or until
+# BATCH_MAX_SIZE images are queued. Off by default since a lone user only
+# sees the added wait.
+MICRO_BATCHING = os.environ.get("HDAR_MICRO_BATCHING", "0") == "1"
+BATCH_MAX_SIZE = int(os.environ.get("HDAR_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("HDAR_BATCH_MAX_WAIT_MS", "2"))
+
+# ---------------------------
+# Warm-up
+# ---------------------------
+# Batch sizes run through each model at load time so the first real
+# request does not pay for graph tracing. 1 covers single-image
+# predictions, the rest the bulk sizes we serve, up to the largest batch
+# predict_batch or the micro-batcher hands to a model.
+WARMUP_BATCH_SIZES = tuple(
+    int(size)
+    for size in os.environ.get(
+        "HDAR_WARMUP_BATCH_SIZES", f"1,32,{max(PREDICT_CHUNK_SIZE, BATCH_MAX_SIZE)}"
+    ).split(",")
+    if size.strip()
+)
@@ -0,0 +1,333 @@
+"""Model loading and inference backends for the HDAR recognition apps"""
+import copy
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+import config
+import thread_pools
+from artifact import has_artifact, read_model_weights
+from startup import timed_import
+
+thread_pools.install()
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("keras", "onnx", "tflite-int8", "tflite-float16", "numpy", "remote")
+TFLITE_VARIANTS = ("int8", "float16")
+PRECISIONS = ("float32", "float16", "bfloat16")
+# Backends that honour HDAR_PRECISION; the others run at their own fixed precision
+PRECISION_BACKENDS = ("keras", "numpy")
+
+# ---------------------------
+# Precision
+# ---------------------------
+def cpu_supports_bfloat16():
+    """Whether the CPU has native bfloat16 instructions (AVX512-BF16 or AMX)"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return bool(flags & {"avx512_bf16", "amx_bf16"})
+
+def keras_dtype_policy(precision):
+    """Keras dtype policy that runs a model at `precision` on this CPU
+
+    TensorFlow has no fast float16 CPU kernels and emulates bfloat16 on CPUs
+    without bf16 instructions, both far slower than float32. Reduced
+    precisions therefore run in bfloat16 (weights included) where the CPU
+    supports it and stay float32 elsewhere.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+    if precision == "float32" or not cpu_supports_bfloat16():
+        return "float32"
+    return "bfloat16"
+
+def effective_precision(backend, precision):
+    """The precision a model at `precision` actually runs at with `backend` on this CPU; None outside PRECISION_BACKENDS"""
+    if backend not in PRECISION_BACKENDS:
+        return None
+    if backend == "keras":
+        return keras_dtype_policy(precision)
+    # NumPy has no bfloat16 type: any reduced precision stores float16 weights
+    return "float32" if precision == "float32" else "float16"
+
+def compare_predictions(model, baseline, images):
+    """Top-1 agreement and largest probability difference between a model and a float32 baseline"""
+    output = model.predict(images.astype(getattr(model, "input_dtype", np.float32)), verbose=0)
+    reference = baseline.predict(images.astype(np.float32), verbose=0)
+    output = np.asarray(output, dtype=np.float32)
+    return {
+        "agreement": float(np.mean(output.argmax(axis=1) == reference.argmax(axis=1))),
+        "max_abs_diff": float(np.abs(output - reference).max()),
+    }
+
+# ---------------------------
+# Keras Backend
+# ---------------------------
+def load_keras_model(h5_path, fast_path=None, precision=None):
+    """Load a Keras model for inference, wrapped in the fast path unless disabled
+
+    Builds the model from its memory-mapped artifact when one is present and
+    current, which skips h5py and the optimizer state stored in the .h5.
+    """
+    tf = timed_import("tensorflow")
+
+    precision = precision or config.MODEL_PRECISION
+    if precision == "float32" and not has_artifact(h5_path):
+        model = tf.keras.models.load_model(h5_path, compile=False)
+    else:
+        dtype_policy = keras_dtype_policy(precision)
+        if dtype_policy != precision:
+            logger.warning("Keras runs %s as %s on this CPU: %s", h5_path, dtype_policy, (
+                "float16 has no fast CPU kernels" if dtype_policy == "bfloat16" else "it has no bf16 instructions"
+            ))
+        # bfloat16 variables are rounded from the float32 weights, not from a float16 copy
+        model = build_keras_model(*read_model_weights(h5_path), dtype_policy)
+    fast_path = config.KERAS_FAST_PATH if fast_path is None else fast_path
+    if fast_path:
+        return FastKerasModel(model)
+    return model
+
+def build_keras_model(model_config, weights, dtype_policy="float32"):
+    """Build a Sequential model from its config and {layer name: [weights...]}, every layer under `dtype_policy`"""
+    tf = timed_import("tensorflow")
+
+    sequential_config = copy.deepcopy(model_config["config"])
+    for layer in sequential_config["layers"]:
+        if layer["class_name"] != "InputLayer":
+            layer["config"]["dtype"] = dtype_policy
+    model = tf.keras.Sequential.from_config(sequential_config)
+    for layer in model.layers:
+        if layer.name in weights:
+            layer.set_weights(weights[layer.name])
+    return model
+
+class FastKerasModel:
+    """Keras model wrapper that runs small batches through a cached compiled call
+
+    model.predict() sets up a data adapter and step loop on every call, which
+    dominates the cost of a single 28x28 image. Small batches instead go
+    through a tf.function with a fixed input signature (optionally XLA
+    compiled); batches above `max_fast_batch` fall back to predict().
+    """
+
+    def __init__(self, model, jit_compile=None, max_fast_batch=None):
+        tf = timed_import("tensorflow")
+
+        self.model = model
+        self.jit_compile = config.KERAS_JIT_COMPILE if jit_compile is None else jit_compile
+        self.max_fast_batch = config.KERAS_FAST_PATH_MAX_BATCH if max_fast_batch is None else max_fast_batch
+        self.input_shape = model.input_shape
+        self.output_shape = model.output_shape
+        # Inputs arrive in the layers' compute dtype, so reduced-precision models skip the cast
+        compute_dtype = tf.as_dtype(model.layers[0].compute_dtype)
+        self.input_dtype = compute_dtype.as_numpy_dtype
+
+        signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]), compute_dtype)]
+        self._compiled_call = tf.function(
+            lambda x: model(x, training=False), input_signature=signature, jit_compile=self.jit_compile
+        )
+
+    def predict(self, x, verbose=0):
+        """Run a forward pass, mirroring keras.Model.predict"""
+        if len(x) > self.max_fast_batch:
+            return self.model.predict(x, verbose=verbose)
+        return self._compiled_call(np.asarray(x, dtype=self.input_dtype)).numpy()
+
+    def __call__(self, x):
+        return self.predict(x)
+
+    def __getattr__(self, name):
+        # Everything else (layers, summary, ...) comes from the wrapped model
+        return getattr(self.model, name)
+
+# ---------------------------
+# ONNX Runtime Backend
+# ---------------------------
+def onnx_path_for(h5_path):
+    """Path of the ONNX export that sits next to a .h5 model"""
+    return os.path.splitext(h5_path)[0] + ".onnx"
+
+def convert_to_onnx(h5_path, onnx_path=None):
+    """Convert a Keras .h5 model to ONNX and return the path of the export"""
+    onnx_path = onnx_path or onnx_path_for(h5_path)
+    model = load_keras_model(h5_path)
+
+    # Keras only exports models that have been called at least once
+    model(np.zeros((1,) + tuple(model.input_shape[1:]), dtype=np.float32))
+    model.export(onnx_path, format="onnx", verbose=False)
+    return onnx_path
+
+class OnnxModel:
+    """ONNX Runtime session exposing the parts of the Keras model API the apps use"""
+
+    def __init__(self, onnx_path):
+        ort = timed_import("onnxruntime")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = config.ONNX_THREADS
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.path = onnx_path
+        self.input_dtype = np.float32
+
+        model_input = self.session.get_inputs()[0]
+        model_output = self.session.get_outputs()[0]
+        self.input_name = model_input.name
+        # ONNX reports symbolic batch dimensions as strings; Keras uses None
+        self.input_shape = (None,) + tuple(model_input.shape[1:])
+        self.output_shape = (None,) + tuple(model_output.shape[1:])
+
+    def predict(self, x, verbose=0):
+        """Run a forward pass, mirroring keras.Model.predict"""
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        return self.session.run(None, {self.input_name: x})[0]
+
+    def __call__(self, x):
+        return self.predict(x)
+
+def load_onnx_model(h5_path):
+    """Load the ONNX export of a .h5 model, converting it first if missing or stale"""
+    onnx_path = onnx_path_for(h5_path)
+    if not os.path.exists(onnx_path) or os.path.getmtime(onnx_path) < os.path.getmtime(h5_path):
+        convert_to_onnx(h5_path, onnx_path)
+    return OnnxModel(onnx_path)
+
+# ---------------------------
+# TFLite Backend
+# ---------------------------
+def tflite_path_for(h5_path, variant):
+    """Path of a quantized TFLite export that sits next to a .h5 model"""
+    return f"{os.path.splitext(h5_path)[0]}.{variant}.tflite"
+
+def _tflite_interpreter_class():
+    """Prefer the standalone LiteRT / tflite-runtime interpreters over the one bundled in TensorFlow"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            Interpreter = timed_import("tensorflow").lite.Interpreter
+    return Interpreter
+
+class TFLiteModel:
+    """TFLite interpreter (XNNPACK on CPU) exposing the parts of the Keras model API the apps use"""
+
+    def __init__(self, tflite_path, num_threads=None):
+        interpreter_class = _tflite_interpreter_class()
+        num_threads = config.TFLITE_NUM_THREADS if num_threads is None else num_threads
+        self.interpreter = interpreter_class(model_path=tflite_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.path = tflite_path
+        self.input_dtype = np.float32
+        # The interpreter holds mutable tensor state, so calls are serialized
+        self._lock = threading.Lock()
+
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        self._input_index = input_details["index"]
+        self._output_index = output_details["index"]
+        self._batch_size = int(input_details["shape"][0])
+        self.input_shape = (None,) + tuple(int(dim) for dim in input_details["shape"][1:])
+        self.output_shape = (None,) + tuple(int(dim) for dim in output_details["shape"][1:])
+
+    def predict(self, x, verbose=0):
+        """Run a forward pass, mirroring keras.Model.predict"""
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        with self._lock:
+            if len(x) != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input_index, list(x.shape))
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(x)
+            self.interpreter.set_tensor(self._input_index, x)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output_index).copy()
+
+    def __call__(self, x):
+        return self.predict(x)
+
+def load_tflite_model(h5_path, variant):
+    """Load a quantized TFLite export of a .h5 model built by quantize.py"""
+    tflite_path = tflite_path_for(h5_path, variant)
+    if not os.path.exists(tflite_path):
+        raise FileNotFoundError(f"{tflite_path} not found, build it with 'python quantize.py'")
+    return TFLiteModel(tflite_path)
+
+# ---------------------------
+# Backend Selection
+# ---------------------------
+def load_model(h5_path, backend=None, precision=None):
+    """Load a model with the configured inference backend, behind the cascade and micro-batcher if enabled"""
+    backend = backend or config.INFERENCE_BACKEND
+    model = load_backend_model(h5_path, backend, precision)
+    if config.CASCADE:
+        from cascade import CascadeModel, cascade_path_for
+
+        if os.path.exists(cascade_path_for(h5_path)):
+            first_stage = load_backend_model(cascade_path_for(h5_path), config.CASCADE_BACKEND, precision)
+            model = CascadeModel(first_stage, model)
+    # Remote models are batched inside the daemon, which loads them through here
+    if config.MICRO_BATCHING and backend != "remote":
+        from batching import MicroBatcher
+
+        return MicroBatcher(model)
+    return model
+
+def load_backend_model(h5_path, backend, precision=None):
+    """Load a model with a specific inference backend; `precision` applies to PRECISION_BACKENDS only"""
+    if backend == "keras":
+        return load_keras_model(h5_path, precision=precision)
+    if backend == "onnx":
+        return load_onnx_model(h5_path)
+    if backend == "numpy":
+        from numpy_engine import load_numpy_model
+
+        return load_numpy_model(h5_path, precision)
+    if backend == "remote":
+        from inference_server import RemoteModel
+
+        return RemoteModel(os.path.basename(h5_path))
+    if backend.startswith("tflite-") and backend[len("tflite-"):] in TFLITE_VARIANTS:
+        return load_tflite_model(h5_path, backend[len("tflite-"):])
+    raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+def close_model(model):
+    """Release a replaced model's background resources (the micro-batcher's worker thread), if it has any"""
+    close = getattr(model, "close", None)
+    if close is not None:
+        close()
+
+# ---------------------------
+# Warm-up
+# ---------------------------
+def warm_up(model, batch_sizes=None):
+    """Run representative batches through a model so tracing happens before the first request
+
+    Returns the total warm-up time in seconds. Wrappers that count their
+    traffic (the cascade's hit rate, the micro-batcher) are reset afterwards,
+    so the warm-up batches do not show up in their stats.
+    """
+    batch_sizes = config.WARMUP_BATCH_SIZES if batch_sizes is None else batch_sizes
+    input_shape = tuple(model.input_shape[1:])
+    # Same dtype predict_batch feeds, so the traced signature matches real requests
+    dtype = getattr(model, "input_dtype", np.float32)
+    start = time.perf_counter()
+    for batch_size in sorted(set(batch_sizes)):
+        model.predict(np.zeros((batch_size,) + input_shape, dtype=dtype), verbose=0)
+    elapsed = time.perf_counter() - start
+    reset = getattr(model, "reset_stats", None)
+    if reset is not None:
+        reset()
+    return elapsed
+
+if __name__ == "__main__":
+    # Pre-convert the bundled models so deployments do not need TensorFlow to build the exports
+    for model_path in config.MODEL_PATHS.values():
+        print(f"{model_path} -> {convert_to_onnx(model_path)}")
@@ -0,0 +1,198 @@
+"""Shared out-of-process inference daemon for multiple Streamlit workers
+
+One daemon owns the models and serves forward passes over a Unix socket, so
+adding web workers does not add copies of TensorFlow and the weights. App
+processes use HDAR_BACKEND=remote, which loads a RemoteModel client instead of
+the model itself.
+
+Wire format, in both directions: a 4-byte big-endian header length, a JSON
+header, then an optional raw float32 payload whose shape is in the header.
+
+Usage: python inference_server.py [--socket /tmp/hdar-inference.sock] [--backend keras]
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+
+import numpy as np
+
+import config
+import inference
+from model_registry import file_sha256
+
+MODEL_PATHS = tuple(config.MODEL_PATHS.values())
+
+# ---------------------------
+# Wire Protocol
+# ---------------------------
+def _recv_exact(sock, size):
+    """Read exactly `size` bytes, or raise ConnectionError if the peer closes first"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError("inference socket closed")
+        received += count
+    return buffer
+
+def send_message(sock, header, array=None):
+    """Send a JSON header and an optional float32 array"""
+    payload = b""
+    if array is not None:
+        array = np.ascontiguousarray(array, dtype=np.float32)
+        header = dict(header, shape=list(array.shape))
+        payload = array.tobytes()
+    encoded = json.dumps(header).encode()
+    sock.sendall(struct.pack("!I", len(encoded)) + encoded + payload)
+
+def recv_message(sock):
+    """Receive a JSON header and its float32 array (None if the message has no payload)"""
+    (header_size,) = struct.unpack("!I", _recv_exact(sock, 4))
+    header = json.loads(bytes(_recv_exact(sock, header_size)))
+    array = None
+    if "shape" in header:
+        shape = tuple(header["shape"])
+        payload = _recv_exact(sock, int(np.prod(shape)) * 4)
+        array = np.frombuffer(payload, dtype=np.float32).reshape(shape)
+    return header, array
+
+# ---------------------------
+# Server
+# ---------------------------
+class InferenceRequestHandler(socketserver.BaseRequestHandler):
+    """Serves requests from one app connection until it disconnects"""
+
+    def handle(self):
+        models = self.server.models
+        while True:
+            try:
+                header, array = recv_message(self.request)
+            except ConnectionError:
+                return
+            model = models.get(header.get("model"))
+            if model is None:
+                send_message(self.request, {"error": f"Unknown model '{header.get('model')}'"})
+            elif header.get("op") == "info":
+                send_message(self.request, {
+                    "input_shape": model.input_shape, "output_shape": model.output_shape,
+                    "sha256": self.server.versions.get(header["model"]),
+                })
+            else:
+                try:
+                    send_message(self.request, {}, model.predict(array, verbose=0))
+                except Exception as e:
+                    send_message(self.request, {"error": str(e)})
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server holding one instance of each model for every connected app process"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, models, versions=None):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.models = models
+        # Model key -> SHA-256 of the file the daemon loaded, reported to clients as the model version
+        self.versions = versions or {}
+        super().__init__(socket_path, InferenceRequestHandler)
+
+def load_server_models(backend=None, model_paths=MODEL_PATHS):
+    """Load and warm every served model, keyed by its .h5 file name"""
+    models = {}
+    for path in model_paths:
+        model = inference.load_model(path, backend)
+        inference.warm_up(model)
+        models[os.path.basename(path)] = model
+    return models
+
+def model_versions(model_paths=MODEL_PATHS):
+    """SHA-256 of every served model file, keyed like load_server_models"""
+    return {os.path.basename(path): file_sha256(path) for path in model_paths}
+
+def start_local_server(socket_path, models, versions=None):
+    """Run a server on a background thread; a stand-in for the daemon in tests and benchmarks"""
+    server = InferenceServer(socket_path, models, versions)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# ---------------------------
+# Client
+# ---------------------------
+class RemoteModel:
+    """Client for a model held by the inference daemon, exposing the Keras model API the apps use"""
+
+    def __init__(self, model_key, socket_path=None):
+        self.model_key = model_key
+        self.socket_path = socket_path or config.INFERENCE_SOCKET
+        # The wire format is float32; the daemon casts to its model's own precision
+        self.input_dtype = np.float32
+        # One persistent connection per calling thread (Streamlit runs each session on its own thread)
+        self._local = threading.local()
+        info = self._request({"op": "info"})[0]
+        self.input_shape = tuple(info["input_shape"])
+        self.output_shape = tuple(info["output_shape"])
+        # Version of the daemon's copy of the weights; "remote" from a daemon that does not report one
+        self.sha256 = info.get("sha256") or "remote"
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _request(self, header, array=None):
+        header = dict(header, model=self.model_key)
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_message(sock, header, array)
+                response, result = recv_message(sock)
+                break
+            except (ConnectionError, OSError):
+                # The daemon may have restarted; reconnect once before giving up
+                stale = getattr(self._local, "sock", None)
+                if stale is not None:
+                    try:
+                        stale.close()
+                    except OSError:
+                        pass
+                self._local.sock = None
+                if attempt == 1:
+                    raise
+        if "error" in response:
+            raise RuntimeError(f"Inference server: {response['error']}")
+        return response, result
+
+    def predict(self, x, verbose=0):
+        """Run a forward pass on the daemon, mirroring keras.Model.predict"""
+        return self._request({"op": "predict"}, x)[1]
+
+    def __call__(self, x):
+        return self.predict(x)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", default=config.INFERENCE_SOCKET, help="Unix socket path to listen on")
+    parser.add_argument("--backend", default=None, help="backend the daemon runs the models with")
+    args = parser.parse_args()
+
+    backend = args.backend or config.INFERENCE_BACKEND
+    if backend == "remote":
+        parser.error("the daemon needs a local backend, e.g. --backend keras")
+    server = InferenceServer(args.socket, load_server_models(backend), model_versions())
+    print(f"Serving {', '.join(server.models)} with the {backend} backend on {args.socket}", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        os.unlink(args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Versioned model registry with background reload and atomic swap
+
+Each recognition mode has one active model entry. The registry tracks the
+entry's version and the SHA-256 of its weights. When the model file changes
+on disk, or the manifest points the mode at a new file, the new version is
+loaded and warmed on a background thread. It is then swapped in under a
+lock. Requests that already hold the old entry finish on the old model, so
+nothing is dropped and nobody waits for the load; the old model is then
+closed. With the remote backend the daemon owns the model files, so those
+entries are versioned by what the daemon loaded and not watched here.
+
+Manifest format (optional, HDAR_MODEL_MANIFEST):
+    {"digit": {"path": "mnist_cnn_model_v2.h5", "version": "v2"}}
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import config
+import inference
+from results import label_table
+
+# Load, swap and failure events kept in ModelRegistry.history
+HISTORY_LENGTH = 100
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ModelRegistry:
+    """Active model entry per mode, with versioning and zero-downtime hot reload"""
+
+    def __init__(self, specs, manifest_path=None, poll_interval=None):
+        # mode -> {"path", "name", "info"}
+        self.specs = specs
+        self.manifest_path = config.MODEL_MANIFEST if manifest_path is None else manifest_path
+        self.poll_interval = config.MODEL_POLL_INTERVAL if poll_interval is None else poll_interval
+        # (timestamp, mode, version, event) for the latest loads, swaps and failed reloads
+        self.history = deque(maxlen=HISTORY_LENGTH)
+        self._active = {}
+        self._staging = set()
+        # mode -> (path, mtime, version) last staged by poll()
+        self._staged = {}
+        self._lock = threading.Lock()
+        # One per mode, held while a first load builds it so concurrent sessions build it once
+        self._load_locks = {mode: threading.Lock() for mode in specs}
+        self._watcher = None
+
+    # ---------------------------
+    # Resolution
+    # ---------------------------
+    def _manifest(self):
+        if not self.manifest_path or not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # A half-written manifest is picked up on the next poll
+            return {}
+
+    def resolve(self, mode):
+        """Model path and version label (None = derive from the checksum) currently configured for a mode"""
+        override = self._manifest().get(mode, {})
+        return override.get("path", self.specs[mode]["path"]), override.get("version")
+
+    # ---------------------------
+    # Loading
+    # ---------------------------
+    def _build(self, mode):
+        """Load and warm the configured version of a mode's model into a new entry"""
+        spec = self.specs[mode]
+        path, version = self.resolve(mode)
+        backend = config.MODE_BACKENDS[mode]
+        # What this CPU actually runs, so the entry never claims a precision it does not have
+        precision = inference.effective_precision(backend, config.MODEL_PRECISION)
+        precision_check = None
+        start = time.perf_counter()
+        try:
+            if backend == "remote":
+                # The daemon serves its own copy of the file: version what it loaded
+                model = inference.load_model(path, backend, precision)
+                mtime, sha256 = None, model.sha256
+            else:
+                mtime = os.path.getmtime(path)
+                sha256 = file_sha256(path)
+                model = inference.load_model(path, backend, precision)
+            if precision not in (None, "float32"):
+                precision_check = self._check_precision(mode, path, model)
+                if precision_check.get("agreement", 0.0) < config.PRECISION_MIN_AGREEMENT:
+                    precision = "float32"
+                    precision_check["fell_back_to_float32"] = True
+                    model = inference.load_model(path, backend, precision)
+            load_time = time.perf_counter() - start
+            warmup_time = inference.warm_up(model)
+        except Exception as e:
+            return {
+                "model": None, "name": f"{spec['name']} (Not Available)", "info": f"Model file not found: {str(e)}",
+                "backend": backend, "precision": precision, "precision_check": None, "labels": None, "path": path,
+                "version": None, "sha256": None, "mtime": None,
+                "load_time": time.perf_counter() - start, "warmup_time": 0.0, "loaded_at": time.time()
+            }
+        return {
+            "model": model, "name": spec["name"], "info": spec["info"], "backend": backend,
+            "precision": precision, "precision_check": precision_check,
+            "labels": label_table(mode, model.output_shape[-1]),
+            "path": path, "version": version or sha256[:12], "sha256": sha256, "mtime": mtime,
+            "load_time": load_time, "warmup_time": warmup_time, "loaded_at": time.time()
+        }
+
+    def _check_precision(self, mode, path, model):
+        """Agreement of a reduced-precision model with the float32 weights on the mode's own samples"""
+        from numpy_engine import load_numpy_model
+        from samples import load_samples
+
+        try:
+            images, _ = load_samples(mode, "test", config.PRECISION_CHECK_SAMPLES)
+        except Exception as e:
+            # Without samples the reduced precision cannot be vouched for, so it falls back
+            return {"error": f"No samples to check against: {e}"}
+        baseline = load_numpy_model(path, "float32")
+        return inference.compare_predictions(model, baseline, images)
+
+    def _record(self, mode, entry, event):
+        self.history.append((time.time(), mode, entry["version"], event))
+
+    def load(self, mode):
+        """Synchronously load a mode's model if it has no active entry yet, and return the active entry"""
+        if mode in self._active:
+            return self._active[mode]
+        with self._load_locks[mode]:
+            if mode in self._active:
+                return self._active[mode]
+            entry = self._build(mode)
+            with self._lock:
+                self._active[mode] = entry
+                self._record(mode, entry, "loaded" if entry["model"] is not None else "failed")
+            return entry
+
+    def entry(self, mode):
+        """The active entry for a mode, or None if it has not been loaded"""
+        return self._active.get(mode)
+
+    def stage(self, mode):
+        """Load the configured version of a mode in the background and swap it in once warm"""
+        with self._lock:
+            if mode in self._staging:
+                return
+            self._staging.add(mode)
+        threading.Thread(target=self._stage, args=(mode,), name=f"hdar-stage-{mode}", daemon=True).start()
+
+    def _stage(self, mode):
+        previous = None
+        try:
+            entry = self._build(mode)
+            with self._lock:
+                if entry["model"] is None:
+                    # Keep serving the current version if the new one cannot load
+                    self._record(mode, entry, f"reload failed: {entry['info']}")
+                else:
+                    previous = self._active.get(mode)
+                    self._active[mode] = entry
+                    self._record(mode, entry, "swapped in")
+            if previous is not None:
+                inference.close_model(previous["model"])
+        finally:
+            with self._lock:
+                self._staging.discard(mode)
+
+    # ---------------------------
+    # Hot Reload
+    # ---------------------------
+    def poll(self):
+        """Stage a reload for every loaded mode whose configured model file has changed
+
+        A file that failed to load is not staged again until it changes.
+        Remote entries are skipped: restart the daemon to roll out a version.
+        """
+        for mode, active in list(self._active.items()):
+            if active["backend"] == "remote":
+                continue
+            path, version = self.resolve(mode)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if path == active["path"] and mtime == active["mtime"] and version in (None, active["version"]):
+                continue
+            # Touching a file without changing its contents is not a new version,
+            # nor is pinning a new label on the same bytes
+            if path == active["path"] and file_sha256(path) == active["sha256"]:
+                with self._lock:
+                    active["mtime"] = mtime
+                    if version not in (None, active["version"]):
+                        active["version"] = version
+                        self._record(mode, active, "relabelled")
+                continue
+            if self._staged.get(mode) == (path, mtime, version):
+                continue
+            self._staged[mode] = (path, mtime, version)
+            self.stage(mode)
+
+    def start_watcher(self):
+        """Poll for new model versions every `poll_interval` seconds on a daemon thread"""
+        if self._watcher is not None or not self.poll_interval:
+            return
+
+        def watch():
+            while True:
+                time.sleep(self.poll_interval)
+                self.poll()
+
+        self._watcher = threading.Thread(target=watch, name="hdar-model-watcher", daemon=True)
+        self._watcher.start()
@@ -0,0 +1,135 @@
+"""TensorFlow-free inference engine for the bundled Sequential CNNs
+
+Reads the layer topology and weights from the model's memory-mapped artifact
+(see artifact.py) or, if none is built, straight out of the Keras .h5 file,
+and runs conv / max-pool / dense / softmax with vectorized NumPy kernels, so
+a deployment can serve predictions without TensorFlow installed.
+"""
+import numpy as np
+
+import config
+from artifact import read_model_weights
+
+# Largest number of images pushed through the im2col kernels at once; bounds
+# the size of the patch matrices for big batches
+MAX_CHUNK = 256
+
+# ---------------------------
+# Kernels
+# ---------------------------
+def pad_same(x, kernel_size, strides, value=0.0):
+    """Pad an NHWC batch the way Keras does for padding="same" """
+    pads = []
+    for size, kernel, stride in zip(x.shape[1:3], kernel_size, strides):
+        out = -(-size // stride)
+        total = max((out - 1) * stride + kernel - size, 0)
+        pads.append((total // 2, total - total // 2))
+    return np.pad(x, [(0, 0)] + pads + [(0, 0)], constant_values=value)
+
+def conv2d(x, kernel, bias, strides=(1, 1), padding="valid"):
+    """2D convolution of an NHWC batch via im2col and a single matrix multiply"""
+    kh, kw, in_channels, filters = kernel.shape
+    if padding == "same":
+        x = pad_same(x, (kh, kw), strides)
+
+    # (N, H', W', C, kh, kw) view of every receptive field, then strided
+    windows = np.lib.stride_tricks.sliding_window_view(x, (kh, kw), axis=(1, 2))
+    windows = windows[:, ::strides[0], ::strides[1]]
+    n, out_h, out_w = windows.shape[:3]
+
+    # Patch matrix rows are ordered (C, kh, kw) to match the window view
+    patches = windows.reshape(n * out_h * out_w, in_channels * kh * kw)
+    weights = kernel.transpose(2, 0, 1, 3).reshape(in_channels * kh * kw, filters)
+    return (patches @ weights + bias).reshape(n, out_h, out_w, filters)
+
+def max_pool2d(x, pool_size=(2, 2), strides=None, padding="valid"):
+    """Max pooling of an NHWC batch"""
+    strides = strides or pool_size
+    if padding == "same":
+        x = pad_same(x, pool_size, strides, value=-np.inf)
+    if tuple(pool_size) == tuple(strides):
+        # Non-overlapping windows: crop and reshape instead of building a window view
+        ph, pw = pool_size
+        n, h, w, c = x.shape
+        x = x[:, :h - h % ph, :w - w % pw]
+        return x.reshape(n, h // ph, ph, w // pw, pw, c).max(axis=(2, 4))
+    windows = np.lib.stride_tricks.sliding_window_view(x, pool_size, axis=(1, 2))
+    return windows[:, ::strides[0], ::strides[1]].max(axis=(-2, -1))
+
+def softmax(x):
+    """Numerically stable softmax over the last axis"""
+    exp = np.exp(x - x.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0, out=x),
+    "softmax": softmax,
+}
+
+# ---------------------------
+# Model
+# ---------------------------
+def model_layers(model_config, weights):
+    """(class_name, config, [weights...]) tuples in execution order for a Sequential model config"""
+    return [
+        (layer["class_name"], layer["config"], weights.get(layer["config"]["name"], []))
+        for layer in model_config["config"]["layers"]
+    ]
+
+class NumpyModel:
+    """Pure-NumPy forward pass exposing the parts of the Keras model API the apps use
+
+    Weights may be stored as float16 to halve their memory; they are widened
+    layer by layer as they are used, and activations stay float32 since NumPy
+    has no fast half-precision matmul.
+    """
+
+    def __init__(self, layers, name="model"):
+        self.name = name
+        self.input_dtype = np.float32
+        self.layers = []
+        for class_name, layer_config, weights in layers:
+            if class_name == "InputLayer":
+                self.input_shape = tuple(layer_config["batch_shape"])
+            elif class_name in ("Conv2D", "Dense", "MaxPooling2D", "Flatten"):
+                self.layers.append((class_name, layer_config, weights))
+            elif class_name != "Dropout":
+                raise ValueError(f"Layer type {class_name} is not supported by the NumPy engine")
+
+        probe = self.predict(np.zeros((1,) + tuple(self.input_shape[1:]), dtype=np.float32))
+        self.output_shape = (None,) + probe.shape[1:]
+
+    def _forward(self, x):
+        for class_name, layer_config, weights in self.layers:
+            weights = [np.asarray(weight, dtype=x.dtype) for weight in weights]
+            bias = weights[1] if len(weights) > 1 else 0.0
+            if class_name == "Conv2D":
+                x = conv2d(x, weights[0], bias, tuple(layer_config["strides"]), layer_config["padding"])
+                x = ACTIVATIONS[layer_config["activation"]](x)
+            elif class_name == "MaxPooling2D":
+                x = max_pool2d(x, tuple(layer_config["pool_size"]), tuple(layer_config["strides"]), layer_config["padding"])
+            elif class_name == "Flatten":
+                x = x.reshape(len(x), -1)
+            elif class_name == "Dense":
+                x = ACTIVATIONS[layer_config["activation"]](x @ weights[0] + bias)
+        return x
+
+    def predict(self, x, verbose=0):
+        """Run a forward pass, mirroring keras.Model.predict"""
+        x = np.asarray(x, dtype=np.float32)
+        if len(x) <= MAX_CHUNK:
+            return self._forward(x)
+        return np.concatenate([self._forward(x[i:i + MAX_CHUNK]) for i in range(0, len(x), MAX_CHUNK)])
+
+    def __call__(self, x):
+        return self.predict(x)
+
+def load_numpy_model(h5_path, precision=None):
+    """Load a model into the NumPy engine, preferring its memory-mapped artifact over the .h5
+
+    Any reduced precision stores the weights as float16.
+    """
+    precision = precision or config.MODEL_PRECISION
+    storage_dtype = "float32" if precision == "float32" else "float16"
+    return NumpyModel(model_layers(*read_model_weights(h5_path, storage_dtype)), name=h5_path)
@@ -0,0 +1,58 @@
+"""Batched prediction shared by HDAR.py and app.py
+
+predict_batch packs N images into one contiguous (N, 28, 28, 1) array, runs
+the model over it in chunks of `chunk_size` and returns one PredictionResult
+per image. The apps' single-image predict functions are thin wrappers over it.
+"""
+import numpy as np
+
+import config
+from preprocessing import preprocess_batch
+from results import PredictionResult, label_table
+
+INPUT_SHAPE = (28, 28, 1)
+
+def prepare_batch(images, mode="digit", dtype=np.float32):
+    """Pack images into one contiguous (N, 28, 28, 1) array of `dtype` scaled to 0-1
+
+    PIL images are preprocessed for `mode`; arrays are taken as already
+    preprocessed 28x28 images (any of (28, 28), (28, 28, 1) or (1, 28, 28, 1)).
+    `dtype` is the model's input dtype, so reduced-precision models get their
+    batch without a second full-size conversion.
+    """
+    batch = np.empty((len(images),) + INPUT_SHAPE, dtype=dtype)
+    raw = [i for i, image in enumerate(images) if not isinstance(image, np.ndarray)]
+    if len(raw) == len(images):
+        preprocess_batch(images, mode, out=batch)
+    elif raw:
+        batch[raw] = preprocess_batch([images[i] for i in raw], mode, out=np.empty((len(raw), 28, 28, 1), dtype=dtype))
+    for i, image in enumerate(images):
+        if isinstance(image, np.ndarray):
+            batch[i] = np.reshape(image, INPUT_SHAPE)
+
+    # Images still in 0-255 are scaled individually, as predict_character always did
+    if len(batch):
+        unscaled = batch.reshape(len(batch), -1).max(axis=1) > 1.0
+        if unscaled.any():
+            batch[unscaled] /= 255.0
+    return batch
+
+def predict_batch(images, mode, model, labels=None, chunk_size=None):
+    """Predict every image in one pass over a contiguous batch and return a PredictionResult per image"""
+    if model is None:
+        return [PredictionResult.unavailable(None) for _ in images]
+    chunk_size = chunk_size or config.PREDICT_CHUNK_SIZE
+
+    batch = prepare_batch(images, mode, getattr(model, "input_dtype", np.float32))
+    probabilities = None
+    for start in range(0, len(batch), chunk_size):
+        output = model.predict(batch[start:start + chunk_size], verbose=0)
+        if probabilities is None:
+            probabilities = np.empty((len(batch), output.shape[1]), dtype=np.float32)
+        probabilities[start:start + len(output)] = output
+    if probabilities is None:
+        return []
+
+    if labels is None:
+        labels = label_table(mode, probabilities.shape[1])
+    return PredictionResult.from_batch(probabilities, labels)
@@ -0,0 +1,388 @@
+"""Image preprocessing shared by the HDAR recognition apps"""
+import logging
+import threading
+import time
+
+import numpy as np
+
+import config
+import thread_pools
+from startup import lazy_import
+from thresholding import light_background, threshold_image
+
+cv2 = lazy_import("cv2")
+Image = lazy_import("PIL.Image")
+thread_pools.install()
+logger = logging.getLogger(__name__)
+
+# EXIF orientation tag value -> transpose that undoes it (as in ImageOps.exif_transpose)
+EXIF_ORIENTATION = 0x0112
+EXIF_TRANSPOSES = {
+    2: "FLIP_LEFT_RIGHT",
+    3: "ROTATE_180",
+    4: "FLIP_TOP_BOTTOM",
+    5: "TRANSPOSE",
+    6: "ROTATE_270",
+    7: "TRANSVERSE",
+    8: "ROTATE_90",
+}
+
+# Modes Image.reduce supports; others are converted before the box-filter pyramid
+REDUCE_MODES = ("L", "LA", "RGB", "RGBA", "CMYK", "YCbCr", "F")
+
+def open_image(source, working_size=None):
+    """Open a camera frame or upload at a working resolution instead of full size
+
+    JPEGs are decoded in draft mode, at the largest 1/2, 1/4 or 1/8 DCT scale
+    whose shorter side is still at least `working_size` (INGEST_WORKING_SIZE).
+    Other formats are decoded in full. The image is then halved with a box
+    filter until its shorter side is below twice `working_size` (palette,
+    1-bit and 16-bit images are converted first, as reduce cannot take them),
+    and the EXIF orientation is applied last, on the small image.
+    """
+    working_size = working_size or config.INGEST_WORKING_SIZE
+    img = Image.open(source)
+    orientation = img.getexif().get(EXIF_ORIENTATION)
+    img.draft(img.mode, (working_size, working_size))
+
+    if min(img.size) >= 2 * working_size and img.mode not in REDUCE_MODES:
+        # reduce() has no palette, 1-bit or 16-bit support; the pipeline ends in grayscale anyway
+        img = img.convert("RGB" if img.mode in ("P", "PA") else "L")
+    while min(img.size) >= 2 * working_size:
+        img = img.reduce(2)
+
+    if orientation in EXIF_TRANSPOSES:
+        img = img.transpose(getattr(Image.Transpose, EXIF_TRANSPOSES[orientation]))
+    return img
+
+def step_preview(array):
+    """Subsampled copy of a step for display, at most STEP_PREVIEW_SIZE pixels across"""
+    stride = -(-max(array.shape[:2]) // config.STEP_PREVIEW_SIZE)
+    return array[::stride, ::stride].copy()
+
+def ink_polarity(img_array, mode="digit", threshold="fixed"):
+    """Whether to invert after thresholding: digits always, alphabet images when the grayscale background is light"""
+    return mode != "alphabet" or light_background(img_array, threshold)
+
+def find_ink(img_array, mode="digit", threshold="fixed"):
+    """Locate the ink on a downscaled mask: returns ((top, bottom, left, right), invert), box None if there is no ink
+
+    `invert` is the polarity decision of the full pipeline (see ink_polarity),
+    taken here on the whole downscaled frame so the crop is not judged on its
+    own. The box is padded by one mask pixel.
+    """
+    height, width = img_array.shape
+    stride = max(1, -(-max(height, width) // config.ROI_MASK_SIZE))
+    mask_size = (-(-width // stride), -(-height // stride))
+    small = cv2.resize(img_array, mask_size, interpolation=cv2.INTER_AREA)
+    invert = ink_polarity(small, mode, threshold)
+    dark = threshold_image(small, threshold, dark_ink=invert) == 0
+    ink = dark if invert else ~dark
+    rows, cols = np.flatnonzero(ink.any(axis=1)), np.flatnonzero(ink.any(axis=0))
+    if not len(rows):
+        return None, invert
+
+    scale_y, scale_x = height / mask_size[1], width / mask_size[0]
+    box = (
+        max(0, int((rows[0] - 1) * scale_y)),
+        min(height, int(np.ceil((rows[-1] + 2) * scale_y))),
+        max(0, int((cols[0] - 1) * scale_x)),
+        min(width, int(np.ceil((cols[-1] + 2) * scale_x))),
+    )
+    return box, invert
+
+def center_in_field(binary_img):
+    """Fit the ink into a 20x20 box and centre it in a 28x28 field by centre of mass, as MNIST was built"""
+    rows, cols = np.flatnonzero(binary_img.any(axis=1)), np.flatnonzero(binary_img.any(axis=0))
+    if not len(rows):
+        return cv2.resize(binary_img, (28, 28), interpolation=cv2.INTER_AREA)
+    ink = binary_img[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+
+    scale = 20 / max(ink.shape)
+    size = (max(1, round(ink.shape[1] * scale)), max(1, round(ink.shape[0] * scale)))
+    digit = cv2.resize(ink, size, interpolation=cv2.INTER_AREA)
+
+    # Shift so the centre of mass lands on the centre of the field, keeping the digit inside it
+    moments = cv2.moments(digit)
+    if moments["m00"]:
+        center_y, center_x = moments["m01"] / moments["m00"], moments["m10"] / moments["m00"]
+    else:
+        center_y, center_x = (digit.shape[0] - 1) / 2, (digit.shape[1] - 1) / 2
+    top = min(max(round(13.5 - center_y), 0), 28 - digit.shape[0])
+    left = min(max(round(13.5 - center_x), 0), 28 - digit.shape[1])
+
+    field = np.zeros((28, 28), dtype=np.uint8)
+    field[top:top + digit.shape[0], left:left + digit.shape[1]] = digit
+    return field
+
+# ---------------------------
+# Pipeline stages
+# ---------------------------
+# Each stage takes a PipelineRun, updates it and returns the array to show for
+# it in the preprocessing steps (or None). Full-resolution arrays go through
+# step_preview; the 28x28 stages are shown by reference.
+
+def decode_stage(run):
+    """Open uploads and camera frames at the working resolution; PIL images pass through
+
+    PIL decodes lazily, so the pixels are loaded here to keep decoding out of
+    the grayscale stage's time.
+    """
+    if not isinstance(run.image, Image.Image):
+        run.image = open_image(run.image)
+    run.image.load()
+
+def grayscale_stage(run):
+    """Convert to a grayscale array without copying when the image already is grayscale"""
+    run.gray = run.array = np.asarray(run.image.convert("L") if run.image.mode != "L" else run.image)
+    return step_preview(run.array) if run.capture_steps else None
+
+def roi_stage(run):
+    """Crop to the ink found on a downscaled mask, deciding polarity on the mask too"""
+    run.box, run.invert = find_ink(run.array, run.mode, run.threshold)
+    if run.box is None:
+        return None
+    top, bottom, left, right = run.box
+    run.array = run.array[top:bottom, left:right]
+    return step_preview(run.array) if run.capture_steps else None
+
+def threshold_stage(run):
+    """Binarize with the run's threshold method, using wider windows on ROI crops
+
+    Polarity is decided on the grayscale image first (unless the ROI stage
+    already has), so local methods know which way the ink goes.
+    """
+    if run.invert is None:
+        run.invert = ink_polarity(run.array, run.mode, run.threshold)
+    window_fraction = config.ROI_WINDOW_FRACTION if run.box is not None else None
+    run.array = threshold_image(run.array, run.threshold, window_fraction, dark_ink=run.invert)
+    return step_preview(run.array) if run.capture_steps else None
+
+def polarity_stage(run):
+    """Invert to white ink on black if the polarity decision says so (digits always, see ink_polarity)"""
+    if run.invert:
+        cv2.bitwise_not(run.array, dst=run.array)
+    return step_preview(run.array) if run.capture_steps else None
+
+def resize_stage(run):
+    """Resize to 28x28, or fit and centre the ink MNIST style after an ROI crop"""
+    if run.roi:
+        run.array = center_in_field(run.array)
+    else:
+        run.array = cv2.resize(run.array, (28, 28), interpolation=cv2.INTER_AREA)
+    return run.array
+
+def normalize_stage(run):
+    """Scale to 0-1 float32"""
+    run.array = np.divide(run.array, np.float32(255.0), dtype=np.float32)
+    return run.array
+
+# Step name shown by "Show Preprocessing Steps" for each stage that has one
+STEP_NAMES = {
+    "grayscale": "original",
+    "roi": "cropped",
+    "segment": "segmented",
+    "threshold": "thresholded",
+    "polarity": "inverted",
+    "resize": "resized",
+    "normalize": "normalized",
+}
+
+# ---------------------------
+# Pipelines
+# ---------------------------
+class PipelineRun:
+    """One image going through a Pipeline: the decoded image, the working array, captured steps and stage timings"""
+
+    def __init__(self, pipeline, source):
+        self.pipeline = pipeline
+        self.mode = pipeline.mode
+        self.image = source
+        self.gray = self.array = None
+        self.box = self.invert = None
+        self.capture_steps, self.roi, self.threshold = False, False, "fixed"
+        self.steps = {}
+        # Stage name -> milliseconds, in stage order
+        self.timings = {}
+
+    def run_stages(self, stages):
+        for name, stage, option in stages:
+            if option is not None and not getattr(self, option):
+                continue
+            start = time.perf_counter()
+            preview = stage(self)
+            elapsed = time.perf_counter() - start
+            self.timings[name] = elapsed * 1000
+            self.pipeline.record(name, elapsed)
+            if preview is not None and self.capture_steps:
+                self.steps[STEP_NAMES[name]] = preview
+
+    def finish(self, capture_steps=False, roi=False, threshold="fixed"):
+        """Run the stages after decoding; returns the normalized 28x28 image and the captured steps"""
+        self.capture_steps, self.roi, self.threshold = capture_steps, roi, threshold
+        self.run_stages(self.pipeline.stages[1:])
+        logger.debug("%s pipeline: %s", self.mode, format_timings(self.timings))
+        return self.array, self.steps
+
+    def total_ms(self):
+        return sum(self.timings.values())
+
+class Pipeline:
+    """Named preprocessing stages for one recognition mode, run in order and timed individually
+
+    `stages` is a list of (name, function, option): the stage is skipped when
+    `option` names a run setting (such as "roi") that is off. The first stage
+    decodes. Running totals per stage are kept in `stats`, like the cascade's.
+    """
+
+    def __init__(self, mode, stages):
+        self.mode = mode
+        self.stages = stages
+        # Stage name -> [runs, total seconds]
+        self.stats = {name: [0, 0.0] for name, _, _ in stages}
+        self._lock = threading.Lock()
+
+    def start(self, source):
+        """Decode `source` (an upload, a camera frame or a PIL image) and return the run, ready to finish"""
+        run = PipelineRun(self, source)
+        run.run_stages(self.stages[:1])
+        return run
+
+    def run(self, source, capture_steps=False, roi=False, threshold="fixed"):
+        """Decode and preprocess in one go; returns the finished PipelineRun"""
+        run = self.start(source)
+        run.finish(capture_steps, roi, threshold)
+        return run
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.stats[name][0] += 1
+            self.stats[name][1] += seconds
+
+    def mean_timings(self):
+        """Mean milliseconds per stage over every run so far, for stages that have run"""
+        with self._lock:
+            return {name: total / runs * 1000 for name, (runs, total) in self.stats.items() if runs}
+
+def format_timings(timings):
+    """One-line stage breakdown, e.g. "decode 1.20 ms | grayscale 0.31 ms | ..." """
+    return " | ".join(f"{name} {ms:.2f} ms" for name, ms in timings.items())
+
+PIPELINES = {
+    "digit": Pipeline("digit", [
+        ("decode", decode_stage, None),
+        ("grayscale", grayscale_stage, None),
+        ("roi", roi_stage, "roi"),
+        ("threshold", threshold_stage, None),
+        ("polarity", polarity_stage, None),
+        ("resize", resize_stage, None),
+        ("normalize", normalize_stage, None),
+    ]),
+    "alphabet": Pipeline("alphabet", [
+        ("decode", decode_stage, None),
+        ("grayscale", grayscale_stage, None),
+        ("roi", roi_stage, "roi"),
+        ("threshold", threshold_stage, None),
+        ("polarity", polarity_stage, None),
+        ("resize", resize_stage, None),
+        ("normalize", normalize_stage, None),
+    ]),
+}
+
+# Bump when a change to the stages alters their output for the same settings,
+# so results cached under the old pipeline (see result_cache.py) stop matching
+PIPELINE_VERSION = 2
+
+def pipeline_signature(mode, roi=False, threshold="fixed"):
+    """Everything a camera/upload result depends on besides the image and model: stages, settings and version"""
+    stages = tuple(name for name, _, _ in PIPELINES[mode].stages)
+    settings = (config.INGEST_WORKING_SIZE, config.ROI_MASK_SIZE, config.THRESHOLD_WINDOW_FRACTION,
+                config.ROI_WINDOW_FRACTION, config.SAUVOLA_K, config.ADAPTIVE_C)
+    return (PIPELINE_VERSION, mode, stages, bool(roi), threshold, settings)
+
+def preprocess_image_with_steps(img, mode="digit", capture_steps=True, roi=False, threshold="fixed"):
+    """Enhanced preprocessing with step-by-step visualization
+
+    Runs the mode's pipeline (see PIPELINES). Steps are only recorded when
+    `capture_steps` is set, as previews at most STEP_PREVIEW_SIZE pixels
+    across (the 28x28 stages by reference), so the full-resolution
+    intermediates can be reused in place.
+
+    With `roi`, the ink is located on a downscaled mask first and only that
+    crop is thresholded, then fitted into a 20x20 box and centred by centre of
+    mass in the 28x28 field (MNIST style) instead of resizing the whole frame.
+
+    `threshold` is one of thresholding.THRESHOLD_METHODS; "fixed" is the
+    original global threshold at 127.
+    """
+    run = PIPELINES[mode].run(img, capture_steps, roi, threshold)
+    return run.array, run.steps
+
+def preprocess_image(img, mode="digit", roi=False, threshold="fixed"):
+    """Enhanced preprocessing for both digit and alphabet recognition"""
+    return PIPELINES[mode].run(img, roi=roi, threshold=threshold).array
+
+def preprocess_alphabet_image(img):
+    """Specific preprocessing for alphabet recognition: Threshold → Invert → Resize → Normalize"""
+    return preprocess_image(img, "alphabet")
+
+def preprocess_batch(images, mode="digit", out=None):
+    """Preprocess a stack of images at once, matching preprocess_image bit for bit
+
+    `images` is an (N, H, W) uint8 array or a list of decoded grayscale uint8
+    arrays (PIL images are converted to "L" first). Thresholding, inversion
+    and normalization run as NumPy operations over every same-sized group of
+    images; only the resize is done per image. Results are written into
+    `out`, a float (N, 28, 28) or (N, 28, 28, 1) buffer of any float dtype (a
+    model's reduced input dtype included), allocated as float32 when not given.
+    """
+    if isinstance(images, np.ndarray) and images.ndim == 3:
+        arrays = images
+        groups = [list(range(len(images)))] if len(images) else []
+    else:
+        arrays = [image if isinstance(image, np.ndarray) else np.asarray(image.convert("L")) for image in images]
+        indices_by_shape = {}
+        for i, array in enumerate(arrays):
+            indices_by_shape.setdefault(array.shape, []).append(i)
+        groups = list(indices_by_shape.values())
+
+    if out is None:
+        out = np.empty((len(arrays), 28, 28), dtype=np.float32)
+    resized = np.empty((len(arrays), 28, 28), dtype=np.uint8)
+    resize = cv2.resize
+
+    for indices in groups:
+        # Work through each group a cache-sized block at a time: whole-stack
+        # passes over megapixel images are memory bound
+        height, width = arrays[indices[0]].shape
+        block_size = max(1, config.PREPROCESS_BLOCK_PIXELS // (height * width))
+        buffer = None if isinstance(arrays, np.ndarray) else np.empty((min(block_size, len(indices)), height, width), dtype=np.uint8)
+        mask = np.empty((min(block_size, len(indices)), height, width), dtype=bool)
+
+        for start in range(0, len(indices), block_size):
+            block = indices[start:start + block_size]
+            n = len(block)
+            if buffer is None:
+                stack = arrays[start:start + n]
+            else:
+                stack = np.stack([arrays[i] for i in block], out=buffer[:n])
+            ink = mask[:n]
+
+            # cv2.threshold(..., 127, 255, THRESH_BINARY) as a 0/1 mask of the
+            # pixels that end up white: the ink after inversion
+            if mode == "alphabet":
+                np.greater(stack, 127, out=ink)
+                # mean(binary) > 127 without the float mean: 255 * count > 127 * pixels
+                count = ink.reshape(n, -1).sum(axis=1, dtype=np.int64)
+                for j in np.flatnonzero(count * 255 > 127 * height * width):
+                    np.logical_not(ink[j], out=ink[j])
+            else:
+                np.less_equal(stack, 127, out=ink)
+            binary = ink.view(np.uint8)
+            np.negative(binary, out=binary)  # 0/1 -> 0/255
+
+            for i, image in zip(block, binary):
+                resized[i] = resize(image, (28, 28), interpolation=cv2.INTER_AREA)
+
+    np.divide(resized.reshape(out.shape), np.float32(255.0), out=out, dtype=np.float32, casting="same_kind")
+    return out
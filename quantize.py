@@ -0,0 +1,115 @@
+"""Post-training quantization of the bundled models to int8 and float16 TFLite
+
+Builds <model>.int8.tflite and <model>.float16.tflite next to each .h5, using
+a representative dataset drawn from the app's own sample loaders, then prints
+an accuracy-vs-latency report comparing each variant, and the Keras backend's
+reduced-precision modes (HDAR_PRECISION), to the float32 Keras model. Rows
+marked "no" under "held out" were evaluated on the calibration data itself
+(alphabet without the A_Z dataset, see samples.has_held_out_split).
+
+Usage: python quantize.py [--report quantization_report.json]
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+import config
+import inference
+from results import label_table
+from samples import has_held_out_split, load_samples
+
+MODEL_PATHS = config.MODEL_PATHS
+REPRESENTATIVE_SAMPLES = 200
+EVALUATION_SAMPLES = 1000
+
+# ---------------------------
+# Conversion
+# ---------------------------
+def quantize(h5_path, variant, representative_images):
+    """Convert a .h5 model to a quantized TFLite file and return its path"""
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(h5_path, compile=False)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        # Full int8 kernels; inputs and outputs stay float32 so the model is a drop-in replacement
+        converter.representative_dataset = lambda: ([image[None]] for image in representative_images)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    tflite_path = inference.tflite_path_for(h5_path, variant)
+    with open(tflite_path, "wb") as f:
+        f.write(converter.convert())
+    return tflite_path
+
+# ---------------------------
+# Report
+# ---------------------------
+def evaluate(model, mode, images, labels, reference=None, latency_calls=200):
+    """Accuracy, agreement with a reference model's predictions and single-image latency"""
+    table = label_table(mode, model.output_shape[-1])
+    predicted = np.argmax(model.predict(images, verbose=0), axis=1)
+    accuracy = float(np.mean([table[p] == label for p, label in zip(predicted, labels)]))
+    agreement = float(np.mean(predicted == reference)) if reference is not None else 1.0
+
+    latencies = []
+    for image in images[:latency_calls]:
+        start = time.perf_counter()
+        model.predict(image[None], verbose=0)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return predicted, {
+        "accuracy": accuracy,
+        "agreement_with_float32": agreement,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--report", help="also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = {}
+    print(
+        f"{'model':<10}{'variant':<16}{'size KB':>9}{'accuracy':>10}{'agree':>8}{'p50 ms':>9}{'p99 ms':>9}"
+        f"{'held out':>10}"
+    )
+    for mode, h5_path in MODEL_PATHS.items():
+        representative_images, _ = load_samples(mode, "train", REPRESENTATIVE_SAMPLES)
+        images, labels = load_samples(mode, "test", EVALUATION_SAMPLES)
+
+        baseline = inference.load_keras_model(h5_path)
+        reference, metrics = evaluate(baseline, mode, images, labels)
+        report[mode] = {"float32": dict(metrics, size_kb=os.path.getsize(h5_path) / 1024)}
+
+        for variant in inference.TFLITE_VARIANTS:
+            tflite_path = quantize(h5_path, variant, representative_images)
+            _, metrics = evaluate(inference.TFLiteModel(tflite_path), mode, images, labels, reference)
+            report[mode][variant] = dict(metrics, size_kb=os.path.getsize(tflite_path) / 1024)
+
+        for precision in inference.PRECISIONS[1:]:
+            model = inference.load_keras_model(h5_path, precision=precision)
+            weight_bytes = sum(weight.nbytes for weight in model.get_weights())
+            _, metrics = evaluate(model, mode, images, labels, reference)
+            report[mode][f"keras-{precision}"] = dict(metrics, size_kb=weight_bytes / 1024)
+
+        held_out = has_held_out_split(mode)
+        for variant, metrics in report[mode].items():
+            metrics["held_out"] = held_out
+            print(
+                f"{mode:<10}{variant:<16}{metrics['size_kb']:>9.0f}{metrics['accuracy']:>10.1%}"
+                f"{metrics['agreement_with_float32']:>8.1%}{metrics['p50_ms']:>9.3f}{metrics['p99_ms']:>9.3f}"
+                f"{'yes' if held_out else 'no':>10}"
+            )
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Content-addressed cache of preprocessed images and prediction results, shared by every session
+
+Entries are keyed by a hash of the raw upload or camera-frame bytes together
+with the model identity and the preprocessing settings, so the same photo
+seen again (by any session, on any rerun) skips preprocessing and the model
+call, while a hot-swapped model or a change of pipeline settings misses
+instead of serving a stale result. The cache is bounded by the total bytes of
+its entries (RESULT_CACHE_BYTES) and evicts the least recently used first.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import config
+from preprocessing import pipeline_signature
+
+# Rough bytes of the key, the entry dict and the PredictionResult object around the arrays
+ENTRY_OVERHEAD = 1024
+
+def model_identity(model_entry):
+    """What a cached prediction depends on in a registry entry: the weights, backend, precision and cascade"""
+    return (model_entry["version"], model_entry["sha256"], model_entry["backend"], model_entry["precision"], config.CASCADE)
+
+def cache_key(data, mode, model_entry, roi=False, threshold="fixed"):
+    """Hex digest of the raw image bytes, the model identity and the pipeline settings"""
+    digest = hashlib.sha256(data)
+    digest.update(repr((model_identity(model_entry), pipeline_signature(mode, roi, threshold))).encode())
+    return digest.hexdigest()
+
+def entry_nbytes(entry):
+    """Approximate memory held by an entry: its arrays (including captured steps) plus a fixed overhead"""
+    nbytes = ENTRY_OVERHEAD
+    for value in entry.values():
+        if isinstance(value, dict):
+            nbytes += sum(item.nbytes for item in value.values() if isinstance(item, np.ndarray))
+        elif isinstance(value, np.ndarray):
+            nbytes += value.nbytes
+        elif hasattr(value, "probabilities"):
+            nbytes += value.probabilities.nbytes
+    return nbytes
+
+class ResultCache:
+    """Thread-safe LRU of result entries (dicts of the processed image, PredictionResult and so on), bounded by bytes"""
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = config.RESULT_CACHE_BYTES if max_bytes is None else max_bytes
+        # Key -> (entry, nbytes), least recently used first
+        self._entries = OrderedDict()
+        self.nbytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """The entry stored under `key` (marking it most recently used), or None; counts a hit or a miss"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return item[0]
+
+    def put(self, key, entry):
+        """Store or replace an entry, evicting least recently used entries until the cache fits its budget"""
+        nbytes = entry_nbytes(entry)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (entry, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.stats["evictions"] += 1
+
+    def hit_rate(self):
+        """Fraction of lookups served from the cache so far (0.0 before the first lookup)"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return self.stats["hits"] / lookups if lookups else 0.0
+
+    def summary(self):
+        """One-line state for the UI, e.g. "hit rate 75.0% (3 of 4) | 2 entries, 0.01 of 64.0 MB" """
+        hit_rate = self.hit_rate()
+        with self._lock:
+            hits, lookups = self.stats["hits"], self.stats["hits"] + self.stats["misses"]
+            return (
+                f"hit rate {hit_rate:.1%} ({hits} of {lookups}) | {len(self._entries)} entries, "
+                f"{self.nbytes / 2**20:.2f} of {self.max_bytes / 2**20:.1f} MB"
+            )
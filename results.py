@@ -0,0 +1,111 @@
+"""Structured prediction results and per-model label tables"""
+import functools
+
+import numpy as np
+
+import config
+
+@functools.lru_cache(maxsize=None)
+def label_table(mode, num_classes):
+    """Label of every output class of a model, built once per (mode, class count)"""
+    if mode == "digit":
+        return tuple(str(i) for i in range(num_classes))
+    letters = [chr(ord("A") + i) for i in range(min(num_classes, 26))]
+    if num_classes == 27:
+        # Some models include space or special character
+        return tuple(letters + ["Special"])
+    return tuple(letters + [f"Class_{i}" for i in range(26, num_classes)])
+
+def top_k_indices(probabilities, top_k=None):
+    """Indices of the k best classes of every row of an (N, num_classes) array, best first"""
+    k = min(config.TOP_K if top_k is None else top_k, probabilities.shape[1])
+    # Partial sort: only the k best classes of each row are ordered
+    top = np.argpartition(probabilities, -k, axis=1)[:, -k:]
+    order = np.argsort(np.take_along_axis(probabilities, top, axis=1), axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+class PredictionResult:
+    """One image's prediction: the full probability vector, top-k labels and scores, and the top-1/top-2 margin
+
+    Unpacks like the (label, confidence) tuple predict_character used to return.
+    """
+
+    def __init__(self, probabilities, labels, top_k=None):
+        probabilities = np.asarray(probabilities, dtype=np.float32).reshape(-1)
+        self._fill(probabilities, top_k_indices(probabilities[None], top_k)[0], labels)
+
+    def _fill(self, probabilities, top, labels):
+        scores = probabilities[top].tolist()
+        self.probabilities = probabilities
+        self.class_index = int(top[0])
+        self.label = labels[self.class_index]
+        self.confidence = scores[0]
+        self.top_k = [(labels[i], score) for i, score in zip(top.tolist(), scores)]
+        self.margin = scores[0] - (scores[1] if len(scores) > 1 else 0.0)
+
+    @classmethod
+    def from_batch(cls, probabilities, labels, top_k=None):
+        """One result per row of an (N, num_classes) array, with the top-k of every row found in one pass"""
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        results = []
+        for row, top in zip(probabilities, top_k_indices(probabilities, top_k)):
+            result = cls.__new__(cls)
+            result._fill(row, top, labels)
+            results.append(result)
+        return results
+
+    @classmethod
+    def unavailable(cls, label):
+        """Placeholder result when no prediction could be made (no model, or an error)"""
+        result = cls.__new__(cls)
+        result.probabilities = np.zeros(0, dtype=np.float32)
+        result.class_index = None
+        result.label = label
+        result.confidence = 0.0
+        result.top_k = []
+        result.margin = 0.0
+        return result
+
+    def __iter__(self):
+        return iter((self.label, self.confidence))
+
+    def __repr__(self):
+        return f"PredictionResult(label={self.label!r}, confidence={self.confidence:.3f}, margin={self.margin:.3f})"
+
+    def as_dict(self):
+        """JSON-friendly summary for logging and batch jobs"""
+        return {
+            "label": self.label,
+            "confidence": self.confidence,
+            "margin": self.margin,
+            "top_k": self.top_k,
+            "probabilities": self.probabilities.tolist(),
+        }
+
+class LineResult:
+    """A segmented line's recognition: the string, and every character's PredictionResult and box, left to right
+
+    Boxes are (top, bottom, left, right) in the decoded (working resolution) image.
+    """
+
+    def __init__(self, characters, boxes):
+        self.characters = list(characters)
+        self.boxes = list(boxes)
+        self.text = "".join(str(result.label) for result in self.characters)
+        self.confidences = [result.confidence for result in self.characters]
+
+    def __len__(self):
+        return len(self.characters)
+
+    def __repr__(self):
+        return f"LineResult(text={self.text!r}, min_confidence={min(self.confidences, default=0.0):.3f})"
+
+    def as_dict(self):
+        """JSON-friendly summary for logging and batch jobs"""
+        return {
+            "text": self.text,
+            "characters": [
+                {"label": result.label, "confidence": result.confidence, "box": [int(v) for v in box]}
+                for result, box in zip(self.characters, self.boxes)
+            ],
+        }
@@ -0,0 +1,294 @@
+"""Sample image loaders for dataset previews, demos and offline evaluation"""
+import os
+import random
+
+import numpy as np
+import streamlit as st
+
+from preprocessing import preprocess_image
+from startup import lazy_import, timed_import
+
+Image = lazy_import("PIL.Image")
+ImageDraw = lazy_import("PIL.ImageDraw")
+ImageFont = lazy_import("PIL.ImageFont")
+
+AZ_DATASET = "A_Z Handwritten Data.csv"
+# Every AZ_TEST_STRIDE-th row of the A_Z dataset is held out as the test split
+AZ_TEST_STRIDE = 5
+
+def load_az_dataset_samples(report_errors=True):
+    """Load samples from A_Z Handwritten Data.csv dataset; `report_errors` shows a failure in the page"""
+    try:
+        pd = timed_import("pandas")
+
+        # Load the A_Z dataset
+        df = pd.read_csv(AZ_DATASET)
+
+        # Get unique labels and select 5 random samples
+        alphabet_samples = {}
+        letters = ['A', 'B', 'C', 'D', 'E']  # Only 5 samples as requested
+
+        for letter in letters:
+            # Convert letter to numeric label (A=0, B=1, etc.)
+            label_num = ord(letter) - ord('A')
+
+            # Filter data for this letter
+            letter_data = df[df.iloc[:, 0] == label_num]
+
+            if len(letter_data) > 0:
+                # Select a random sample
+                sample_idx = random.randint(0, len(letter_data) - 1)
+                sample_row = letter_data.iloc[sample_idx]
+
+                # Extract pixel values (assuming columns 1-784 contain pixel data)
+                pixel_values = sample_row.iloc[1:].values
+
+                # Reshape to 28x28 image
+                img_array = pixel_values.reshape(28, 28).astype(np.uint8)
+
+                alphabet_samples[letter] = img_array
+            else:
+                # Fallback: create a simple letter if no data found
+                img = Image.new('L', (28, 28), color=0)
+                draw = ImageDraw.Draw(img)
+                try:
+                    font = ImageFont.truetype("arial.ttf", 18)
+                except:
+                    font = ImageFont.load_default()
+
+                bbox = draw.textbbox((0, 0), letter, font=font)
+                text_width = bbox[2] - bbox[0]
+                text_height = bbox[3] - bbox[1]
+                x = (28 - text_width) // 2
+                y = (28 - text_height) // 2
+
+                draw.text((x, y), letter, fill=255, font=font)
+                alphabet_samples[letter] = np.array(img)
+
+        return alphabet_samples, True
+
+    except Exception as e:
+        if report_errors:
+            st.error(f"❌ Could not load A_Z dataset: {str(e)}")
+        return {}, False
+
+def load_emnist_style_samples():
+    """Load EMNIST-style alphabet samples for realistic testing"""
+    try:
+        # In a real implementation, you would use:
+        # pip install extra-keras-datasets
+        # from extra_keras_datasets import emnist
+        # (x_train, y_train), (x_test, y_test) = emnist.load_data(type='letters')
+
+        # For now, we'll create realistic EMNIST-style samples
+        alphabet_samples = {}
+        letters = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T']
+
+        for i, letter in enumerate(letters):
+            # Create realistic handwritten-style letters
+            img = Image.new('L', (28, 28), color=0)  # Black background
+            draw = ImageDraw.Draw(img)
+
+            # Use different fonts and add variations for realism
+            try:
+                fonts = ["arial.ttf", "calibri.ttf", "times.ttf", "georgia.ttf"]
+                font_choice = fonts[i % len(fonts)]
+                font_size = 12 + (i % 8)  # Vary font size (12-19)
+                font = ImageFont.truetype(font_choice, font_size)
+            except:
+                font = ImageFont.load_default()
+
+            # Add position variations to simulate handwriting
+            bbox = draw.textbbox((0, 0), letter, font=font)
+            text_width = bbox[2] - bbox[0]
+            text_height = bbox[3] - bbox[1]
+            x = (28 - text_width) // 2 + random.randint(-4, 4)  # Position variation
+            y = (28 - text_height) // 2 + random.randint(-4, 4)  # Position variation
+
+            # Ensure text stays within bounds
+            x = max(0, min(x, 28 - text_width))
+            y = max(0, min(y, 28 - text_height))
+
+            draw.text((x, y), letter, fill=255, font=font)
+
+            # Add realistic variations
+            img_array = np.array(img)
+
+            # Add slight noise for realism (simulating EMNIST characteristics)
+            if random.random() > 0.3:  # Add noise to most samples
+                noise = np.random.normal(0, 12, img_array.shape)
+                img_array = np.clip(img_array + noise, 0, 255).astype(np.uint8)
+
+            # Add slight rotation for some samples
+            if random.random() > 0.6:
+                angle = random.randint(-15, 15)
+                img_pil = Image.fromarray(img_array)
+                img_pil = img_pil.rotate(angle, fillcolor=0)
+                img_array = np.array(img_pil)
+
+            alphabet_samples[letter] = img_array
+
+        return alphabet_samples, True
+
+    except Exception as e:
+        return {}, False
+
+def create_realistic_alphabet_samples():
+    """Create realistic alphabet samples based on provided images"""
+    alphabet_samples = {}
+
+    # Sample B - based on your provided image
+    b_pattern = np.array([
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    ], dtype=np.uint8)
+    alphabet_samples['B'] = b_pattern
+
+    # Sample M - based on your provided image
+    m_pattern = np.array([
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 255, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 255, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 255, 255, 255, 0, 0, 0, 0, 0, 0, 255, 255, 255, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 0, 255, 255, 255, 0, 0, 0, 0, 255, 255, 255, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 0, 0, 255, 255, 255, 0, 0, 255, 255, 255, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 255, 255, 255, 255, 255, 255, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 255, 255, 255, 255, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 255, 255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 255, 255, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+    ], dtype=np.uint8)
+    alphabet_samples['M'] = m_pattern
+
+    # Add more letters using font rendering for variety
+    additional_letters = ['A', 'C', 'E', 'F', 'G', 'H', 'I', 'J', 'L', 'P', 'T', 'D']
+    for letter in additional_letters:
+        img = Image.new('L', (28, 28), color=0)  # Black background
+        draw = ImageDraw.Draw(img)
+        try:
+            font = ImageFont.truetype("arial.ttf", 18)
+        except:
+            font = ImageFont.load_default()
+
+        bbox = draw.textbbox((0, 0), letter, font=font)
+        text_width = bbox[2] - bbox[0]
+        text_height = bbox[3] - bbox[1]
+        x = (28 - text_width) // 2
+        y = (28 - text_height) // 2
+
+        draw.text((x, y), letter, fill=255, font=font)
+        alphabet_samples[letter] = np.array(img)
+
+    return alphabet_samples
+
+def load_alphabet_samples(report_errors=True):
+    """Alphabet samples from the A_Z dataset, falling back to EMNIST-style and then built-in samples"""
+    az_samples, az_loaded = load_az_dataset_samples(report_errors)
+    if az_loaded:
+        return az_samples
+    emnist_samples, emnist_loaded = load_emnist_style_samples()
+    if emnist_loaded:
+        return emnist_samples
+    return create_realistic_alphabet_samples()
+
+def shifted_alphabet_samples(count, mode="alphabet"):
+    """Preprocessed alphabet samples and labels, shifted by a few pixels to cover `count` inputs
+
+    Used off the page (evaluation scripts, the registry's precision check),
+    so a missing A_Z dataset falls through to the fallbacks silently.
+    """
+    samples = load_alphabet_samples(report_errors=False)
+    letters = list(samples.keys())
+    base = [preprocess_image(Image.fromarray(samples[letter]), mode) for letter in letters]
+    rng = np.random.default_rng(0)
+    images, labels = [], []
+    for i in range(count):
+        shift = rng.integers(-2, 3, size=2)
+        images.append(np.roll(base[i % len(base)], tuple(shift), axis=(0, 1)))
+        labels.append(letters[i % len(letters)])
+    return np.stack(images)[..., None], labels
+
+@st.cache_resource
+def load_mnist_test_set():
+    """MNIST test images and labels, loaded once per process when a digit dataset view first needs them"""
+    mnist = timed_import("tensorflow.keras.datasets.mnist")
+    (_, _), (x_test, y_test) = mnist.load_data()
+    return x_test, y_test
+
+def digit_samples(split, count):
+    """Preprocessed MNIST digits and labels, inverted to dark-on-light like the app's dataset mode"""
+    mnist = timed_import("tensorflow.keras.datasets.mnist")
+    (x_train, y_train), (x_test, y_test) = mnist.load_data()
+    images, labels = (x_train, y_train) if split == "train" else (x_test, y_test)
+    indices = np.random.default_rng(0).choice(len(images), min(count, len(images)), replace=False)
+    processed = [preprocess_image(Image.fromarray(255 - images[i]), "digit") for i in indices]
+    return np.stack(processed)[..., None], [str(labels[i]) for i in indices]
+
+def az_dataset_split(split, count):
+    """Preprocessed A_Z dataset letters and labels from the train or test rows (every AZ_TEST_STRIDE-th row is test)"""
+    pd = timed_import("pandas")
+    in_test = lambda row: row % AZ_TEST_STRIDE == 0
+    skip = (lambda row: not in_test(row)) if split == "test" else in_test
+    rows = pd.read_csv(AZ_DATASET, header=None, skiprows=skip).values
+    indices = np.random.default_rng(0).choice(len(rows), min(count, len(rows)), replace=False)
+    processed = [preprocess_image(Image.fromarray(rows[i, 1:].reshape(28, 28).astype(np.uint8)), "alphabet") for i in indices]
+    return np.stack(processed)[..., None], [chr(ord("A") + int(rows[i, 0])) for i in indices]
+
+def has_held_out_split(mode):
+    """Whether load_samples draws a mode's train and test splits from disjoint data
+
+    Without the A_Z dataset both alphabet splits are shifted copies of the
+    same few generated letters, so alphabet results are not held out.
+    """
+    return mode == "digit" or os.path.exists(AZ_DATASET)
+
+def load_samples(mode, split, count):
+    """Sample images of shape (N, 28, 28, 1) and their labels for a recognition mode, for offline evaluation"""
+    if mode == "digit":
+        return digit_samples(split, count)
+    if os.path.exists(AZ_DATASET):
+        return az_dataset_split(split, count)
+    return shifted_alphabet_samples(count)
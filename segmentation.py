@@ -0,0 +1,183 @@
+"""Multi-character line segmentation: split a line of handwriting into characters and read them in one batch
+
+A line goes through the same decode, grayscale, threshold and polarity
+stages as a single character (see preprocessing.PIPELINES), then a segment
+stage finds the characters on the white-on-black line:
+
+  1. connected components, dropping specks (adaptive thresholding leaves
+     many on plain paper) whose longer side is under SEGMENT_MIN_SIZE_FRACTION
+     of the tallest component
+  2. components sorted left to right, merging one into the previous when
+     their column ranges overlap by SEGMENT_MERGE_OVERLAP (broken strokes)
+  3. pieces shorter than SEGMENT_FRAGMENT_HEIGHT of the tallest character
+     on the line (serifs, stroke fragments) joined to their nearest neighbour
+  4. components wider than SEGMENT_SPLIT_ASPECT times their height (touching
+     characters) cut at the minima of their vertical projection profile
+
+Each character is fitted and centred MNIST style (center_in_field), and
+read_line classifies the whole stack with one predict_batch call.
+"""
+import numpy as np
+
+import config
+from prediction import predict_batch
+from preprocessing import (
+    Pipeline, center_in_field, decode_stage, grayscale_stage, ink_polarity, polarity_stage, step_preview,
+)
+from results import LineResult
+from startup import lazy_import
+from thresholding import binary_mask, threshold_image
+
+cv2 = lazy_import("cv2")
+
+def split_points(profile, pieces):
+    """Columns to cut a component at: the emptiest column of the projection profile near each even split"""
+    width = len(profile)
+    step = width / pieces
+    radius = max(1, int(step / 3))
+    cuts = []
+    for k in range(1, pieces):
+        target = int(k * step)
+        low, high = max(cuts[-1] + 1 if cuts else 1, target - radius), min(width - 1, target + radius + 1)
+        if low >= high:
+            continue
+        window = profile[low:high]
+        # Emptiest column, nearest the even split on ties
+        candidates = np.flatnonzero(window == window.min()) + low
+        cuts.append(int(candidates[np.argmin(np.abs(candidates - target))]))
+    return cuts
+
+def merge_group(group, other):
+    """Extend a [left, right, top, bottom, labels] group by another"""
+    group[0], group[1] = min(group[0], other[0]), max(group[1], other[1])
+    group[2], group[3] = min(group[2], other[2]), max(group[3], other[3])
+    group[4].extend(other[4])
+
+def merge_fragments(groups):
+    """Join groups much shorter than the line's tallest character to the horizontally nearest neighbour"""
+    if len(groups) < 2:
+        return groups
+    min_height = config.SEGMENT_FRAGMENT_HEIGHT * max(bottom - top for _, _, top, bottom, _ in groups)
+    i = 0
+    while i < len(groups) and len(groups) > 1:
+        fragment = groups[i]
+        if fragment[3] - fragment[2] >= min_height:
+            i += 1
+            continue
+        neighbours = [j for j in (i - 1, i + 1) if 0 <= j < len(groups)]
+        nearest = min(neighbours, key=lambda j: max(groups[j][0] - fragment[1], fragment[0] - groups[j][1]))
+        merge_group(groups[nearest], fragment)
+        del groups[i]
+        i = max(0, i - 1)
+    return groups
+
+def find_characters(binary_img):
+    """Boxes and 0/255 crops of the characters in a white-on-black line image, left to right
+
+    Boxes are (top, bottom, left, right). Each crop holds only its own
+    components, so a neighbour reaching into the box is left out.
+    """
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(binary_img, connectivity=8)
+    stats = stats[1:]
+    if not len(stats):
+        return [], []
+    sizes = np.maximum(stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT])
+    keep = np.flatnonzero(sizes >= config.SEGMENT_MIN_SIZE_FRACTION * stats[:, cv2.CC_STAT_HEIGHT].max())
+
+    # Group components into characters: [left, right, top, bottom, component labels]
+    groups = []
+    for i in keep[np.argsort(stats[keep, cv2.CC_STAT_LEFT], kind="stable")]:
+        left, top, width, height = (int(v) for v in stats[i, :4])
+        right, bottom = left + width, top + height
+        if groups:
+            last = groups[-1]
+            overlap = min(right, last[1]) - max(left, last[0])
+            if overlap >= config.SEGMENT_MERGE_OVERLAP * min(width, last[1] - last[0]):
+                merge_group(last, [left, right, top, bottom, [i + 1]])
+                continue
+        groups.append([left, right, top, bottom, [i + 1]])
+
+    boxes, crops = [], []
+    for left, right, top, bottom, members in merge_fragments(groups):
+        mask = binary_mask(np.isin(labels[top:bottom, left:right], members))
+        height, width = mask.shape
+        cuts = []
+        if width > config.SEGMENT_SPLIT_ASPECT * height:
+            pieces = max(2, round(width / (config.SEGMENT_CHAR_ASPECT * height)))
+            cuts = split_points(np.count_nonzero(mask, axis=0), pieces)
+        for start, stop in zip([0] + cuts, cuts + [width]):
+            piece = mask[:, start:stop]
+            rows = np.flatnonzero(piece.any(axis=1))
+            if not len(rows):
+                continue
+            boxes.append((top + int(rows[0]), top + int(rows[-1]) + 1, left + start, left + stop))
+            crops.append(piece[rows[0]:rows[-1] + 1])
+    return boxes, crops
+
+# ---------------------------
+# Line Pipeline Stages
+# ---------------------------
+def line_threshold_stage(run):
+    """Binarize the whole line with character-sized windows: a line is about one character high"""
+    run.invert = ink_polarity(run.array, run.mode, run.threshold)
+    run.array = threshold_image(run.array, run.threshold, config.ROI_WINDOW_FRACTION, dark_ink=run.invert)
+    return step_preview(run.array) if run.capture_steps else None
+
+def segment_stage(run):
+    """Find the characters on the white-on-black line; the preview outlines their boxes"""
+    run.boxes, run.crops = find_characters(run.array)
+    if not run.capture_steps:
+        return None
+    outlined = cv2.cvtColor(run.array, cv2.COLOR_GRAY2RGB)
+    for top, bottom, left, right in run.boxes:
+        cv2.rectangle(outlined, (left, top), (right - 1, bottom - 1), (255, 64, 64), max(1, outlined.shape[0] // 100))
+    return step_preview(outlined)
+
+def characters_resize_stage(run):
+    """Fit and centre every character in a 28x28 field; the preview lays them out in a row"""
+    run.array = np.zeros((len(run.crops), 28, 28), dtype=np.uint8)
+    for field, crop in zip(run.array, run.crops):
+        field[:] = center_in_field(crop)
+    if not run.capture_steps or not len(run.array):
+        return None
+    return np.hstack(list(run.array))
+
+def characters_normalize_stage(run):
+    """Scale the character stack to 0-1 float32"""
+    run.array = np.divide(run.array, np.float32(255.0), dtype=np.float32)
+
+LINE_PIPELINES = {
+    "digit": Pipeline("digit", [
+        ("decode", decode_stage, None),
+        ("grayscale", grayscale_stage, None),
+        ("threshold", line_threshold_stage, None),
+        ("polarity", polarity_stage, None),
+        ("segment", segment_stage, None),
+        ("resize", characters_resize_stage, None),
+        ("normalize", characters_normalize_stage, None),
+    ]),
+    "alphabet": Pipeline("alphabet", [
+        ("decode", decode_stage, None),
+        ("grayscale", grayscale_stage, None),
+        ("threshold", line_threshold_stage, None),
+        ("polarity", polarity_stage, None),
+        ("segment", segment_stage, None),
+        ("resize", characters_resize_stage, None),
+        ("normalize", characters_normalize_stage, None),
+    ]),
+}
+
+def segment_line_with_steps(img, mode="digit", capture_steps=True, threshold="fixed"):
+    """Segment a line of characters into normalized 28x28 images
+
+    The line counterpart of preprocess_image_with_steps: returns an
+    (N, 28, 28) float32 stack, the N boxes left to right and the captured
+    steps (the thresholded line, the boxes outlined, the characters in a row).
+    """
+    run = LINE_PIPELINES[mode].run(img, capture_steps, threshold=threshold)
+    return run.array, run.boxes, run.steps
+
+def read_line(img, mode, model, labels=None, threshold="fixed", capture_steps=False):
+    """Segment a line and classify every character with one batched predict; returns a LineResult and the steps"""
+    characters, boxes, steps = segment_line_with_steps(img, mode, capture_steps, threshold)
+    return LineResult(predict_batch(characters, mode, model, labels), boxes), steps
@@ -0,0 +1,82 @@
+"""Deferred imports and cold-start timing for the HDAR apps
+
+Heavy dependencies (TensorFlow, OpenCV, PIL, pandas) are bound to LazyModule
+proxies that import the real module on first attribute access. Every import
+that goes through this module is timed, so the startup report can show where
+cold-start time goes.
+"""
+import importlib
+import threading
+import time
+import types
+
+# Module name -> seconds spent importing it, in import order
+IMPORT_TIMES = {}
+# Duration of the first complete script run in this process
+FIRST_RENDER_TIME = None
+_lock = threading.RLock()
+# Module name -> callbacks run with the module right after its first timed import
+_import_hooks = {}
+
+def timed_import(name):
+    """Import a module now, recording how long the first import took"""
+    with _lock:
+        if name in IMPORT_TIMES:
+            return importlib.import_module(name)
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES[name] = time.perf_counter() - start
+        for hook in _import_hooks.pop(name, []):
+            hook(module)
+        return module
+
+def on_first_import(name, hook):
+    """Run `hook(module)` when `name` is first imported through timed_import, or now if it already was"""
+    with _lock:
+        if name not in IMPORT_TIMES:
+            _import_hooks.setdefault(name, []).append(hook)
+            return
+    hook(importlib.import_module(name))
+
+class LazyModule(types.ModuleType):
+    """Module proxy that performs a timed import on first attribute access"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        if self.__dict__["_module"] is None:
+            self.__dict__["_module"] = timed_import(self.__name__)
+        return self.__dict__["_module"]
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+def lazy_import(name):
+    """Return a proxy for `name` that is only imported when first used"""
+    return LazyModule(name)
+
+def record_render(script_time):
+    """Record a finished script run; returns True if it was the first render of the process"""
+    global FIRST_RENDER_TIME
+    with _lock:
+        if FIRST_RENDER_TIME is not None:
+            return False
+        FIRST_RENDER_TIME = script_time
+        return True
+
+def format_report(first_render_time=None, script_time=None):
+    """Plain-text startup report: per-module import times and render timings"""
+    lines = ["Startup report"]
+    for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: -item[1]):
+        lines.append(f"  {'import ' + name:<44}{seconds * 1000:>9.1f} ms")
+    if first_render_time is not None:
+        lines.append(f"  {'time to first render':<44}{first_render_time * 1000:>9.1f} ms")
+    if script_time is not None:
+        lines.append(f"  {'this script run':<44}{script_time * 1000:>9.1f} ms")
+    return "\n".join(lines)
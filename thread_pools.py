@@ -0,0 +1,37 @@
+"""Thread-pool sizes for the native libraries behind inference and preprocessing
+
+Streamlit runs every session on its own script thread, while TensorFlow,
+OpenCV and ONNX Runtime each size their internal pools to every core by
+default. With several sessions active that is many times more runnable
+threads than cores. The sizes come from config.py and are applied to each
+library as it is first imported through startup.timed_import.
+"""
+import config
+import startup
+
+_installed = False
+
+def configure_tensorflow(tf):
+    """Apply the configured intra-/inter-op pool sizes (0 keeps TensorFlow's default)"""
+    try:
+        if config.TF_INTRA_OP_THREADS:
+            tf.config.threading.set_intra_op_parallelism_threads(config.TF_INTRA_OP_THREADS)
+        if config.TF_INTER_OP_THREADS:
+            tf.config.threading.set_inter_op_parallelism_threads(config.TF_INTER_OP_THREADS)
+    except RuntimeError:
+        # TensorFlow fixes its pools once it has run an op; the existing sizes stay
+        pass
+
+def configure_opencv(cv2):
+    """Apply the configured OpenCV pool size (negative keeps OpenCV's default)"""
+    if config.CV2_THREADS >= 0:
+        cv2.setNumThreads(config.CV2_THREADS)
+
+def install():
+    """Configure TensorFlow and OpenCV as they are first imported; safe to call more than once"""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    startup.on_first_import("tensorflow", configure_tensorflow)
+    startup.on_first_import("cv2", configure_opencv)
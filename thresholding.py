@@ -0,0 +1,135 @@
+"""Thresholding strategies for the preprocessing pipeline
+
+Every strategy maps a grayscale uint8 image to a 0/255 image with the same
+convention as cv2.threshold(..., THRESH_BINARY): 255 where the pixel is
+above its threshold. All run in time linear in the pixel count:
+
+  fixed     the original global threshold of 127
+  otsu      global threshold from one histogram pass (Otsu's method)
+  sauvola   local threshold mean * (1 + k * (std / 128 - 1)) over a window,
+            with mean and std from integral images
+  adaptive  local threshold mean - C over a window, from an integral image
+
+Local windows are a fraction of the image's shorter side, so they scale
+with the working image: THRESHOLD_WINDOW_FRACTION for whole frames, and the
+larger ROI_WINDOW_FRACTION for crops around a single character, where a
+window narrower than a stroke would read its middle as background.
+
+Local methods compare each pixel with its neighbourhood, so they turn any
+flat region white, a dark background as much as a light one, and assume
+dark ink. Polarity is therefore decided beforehand on the grayscale image
+with a global split (light_background), and light ink is thresholded on the
+negated image.
+"""
+import numpy as np
+
+import config
+from startup import lazy_import
+
+cv2 = lazy_import("cv2")
+
+def fixed_threshold(img_array, window_fraction=None, level=127):
+    """Global threshold at a fixed level"""
+    _, binary_img = cv2.threshold(img_array, level, 255, cv2.THRESH_BINARY)
+    return binary_img
+
+def otsu_level(img_array):
+    """Otsu's threshold: the level maximising the between-class variance of one 256-bin histogram"""
+    hist = cv2.calcHist([img_array], [0], None, [256], [0, 256]).ravel().astype(np.float64)
+    levels = np.arange(256)
+    weight = np.cumsum(hist)
+    mass = np.cumsum(hist * levels)
+    total_weight, total_mass = weight[-1], mass[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (total_mass * weight - total_weight * mass) ** 2 / (weight * (total_weight - weight))
+    between[~np.isfinite(between)] = 0
+    return int(np.argmax(between))
+
+def otsu_threshold(img_array, window_fraction=None):
+    """Global threshold at Otsu's level"""
+    return fixed_threshold(img_array, level=otsu_level(img_array))
+
+def window_sums(table, radius, height, width):
+    """Sum over a (2 * radius + 1)-square window around every pixel, from its integral image
+
+    The table is edge-padded so windows clipped at the image border become
+    plain slices, and the four corner lookups are whole-array operations.
+    """
+    table = np.pad(table, ((radius, radius + 1), (radius, radius + 1)), mode="edge")
+    low_rows, high_rows = slice(0, height), slice(2 * radius + 1, 2 * radius + 1 + height)
+    low_cols, high_cols = slice(0, width), slice(2 * radius + 1, 2 * radius + 1 + width)
+    sums = table[high_rows, high_cols] - table[low_rows, high_cols]
+    sums -= table[high_rows, low_cols]
+    sums += table[low_rows, low_cols]
+    return sums
+
+def window_means(img_array, window_fraction, with_std=False):
+    """Mean (and standard deviation) over a square window around every pixel, from integral images"""
+    height, width = img_array.shape
+    radius = max(1, int(min(height, width) * window_fraction) // 2)
+    # Pixels inside each clipped window
+    rows = np.minimum(np.arange(height) + radius + 1, height) - np.maximum(np.arange(height) - radius, 0)
+    cols = np.minimum(np.arange(width) + radius + 1, width) - np.maximum(np.arange(width) - radius, 0)
+    inverse_area = np.outer(1 / rows.astype(np.float32), 1 / cols.astype(np.float32))
+    # 32-bit tables are faster; past 2**31 (about 8.4 MP of white) they wrap, so switch to float64
+    sdepth = cv2.CV_32S if img_array.size * 255 < 2**31 else cv2.CV_64F
+
+    if not with_std:
+        sums = window_sums(cv2.integral(img_array, sdepth=sdepth), radius, height, width)
+        return np.multiply(sums, inverse_area, dtype=np.float32), None
+
+    sums, squares = cv2.integral2(img_array, sdepth=sdepth, sqdepth=cv2.CV_64F)
+    mean = np.multiply(window_sums(sums, radius, height, width), inverse_area, dtype=np.float32)
+    variance = np.multiply(window_sums(squares, radius, height, width), inverse_area, dtype=np.float32)
+    variance -= mean * mean
+    return mean, np.sqrt(np.maximum(variance, 0, out=variance), out=variance)
+
+def binary_mask(mask):
+    """0/255 uint8 image from a boolean mask, reusing the mask's buffer"""
+    binary_img = mask.view(np.uint8)
+    np.negative(binary_img, out=binary_img)
+    return binary_img
+
+def sauvola_threshold(img_array, window_fraction):
+    """Sauvola's local threshold, which holds up on dim and unevenly lit captures"""
+    mean, std = window_means(img_array, window_fraction, with_std=True)
+    # mean * (1 + k * (std / R - 1)), computed in place in std's buffer
+    level = std
+    level *= config.SAUVOLA_K / 128
+    level += 1 - config.SAUVOLA_K
+    level *= mean
+    return binary_mask(img_array > level)
+
+def adaptive_threshold(img_array, window_fraction):
+    """Local threshold at the window mean minus ADAPTIVE_C"""
+    mean, _ = window_means(img_array, window_fraction)
+    mean -= config.ADAPTIVE_C
+    return binary_mask(img_array > mean)
+
+def light_background(img_array, method="fixed"):
+    """Whether most of a grayscale image lies above a global split: 127 for "fixed", Otsu's level otherwise"""
+    level = 127 if method == "fixed" else otsu_level(img_array)
+    # mean(binary) > 127 without the float mean: 255 * count > 127 * pixels
+    return np.count_nonzero(img_array > level) * 255 > 127 * img_array.size
+
+THRESHOLD_METHODS = {
+    "fixed": fixed_threshold,
+    "otsu": otsu_threshold,
+    "sauvola": sauvola_threshold,
+    "adaptive": adaptive_threshold,
+}
+LOCAL_METHODS = ("sauvola", "adaptive")
+
+def threshold_image(img_array, method="fixed", window_fraction=None, dark_ink=True):
+    """Threshold a grayscale image with one of THRESHOLD_METHODS; local windows default to THRESHOLD_WINDOW_FRACTION
+
+    With `dark_ink` off, local methods threshold the negated image and negate
+    the result back, so light ink comes out white as under a global threshold.
+    """
+    if method not in THRESHOLD_METHODS:
+        raise ValueError(f"Unknown threshold method '{method}', expected one of {tuple(THRESHOLD_METHODS)}")
+    window_fraction = window_fraction or config.THRESHOLD_WINDOW_FRACTION
+    if dark_ink or method not in LOCAL_METHODS:
+        return THRESHOLD_METHODS[method](img_array, window_fraction)
+    binary_img = THRESHOLD_METHODS[method](cv2.bitwise_not(img_array), window_fraction)
+    return cv2.bitwise_not(binary_img, dst=binary_img)
@@ -0,0 +1,116 @@
+"""Train the tiny first-stage models for the confidence-gated cascade
+
+For each mode the first stage learns the full CNN's own predictions on the
+app's sample data, so wherever it is confident it agrees with the model it
+stands in for. It is saved as <model>.cascade.h5 next to the full model.
+The script then reports the cascade's hit rate, latency and accuracy loss on
+held-out samples for a few threshold settings.
+
+Alphabet samples are only held out when the A_Z dataset is present (see
+samples.has_held_out_split); otherwise the alphabet first stage is trained
+and evaluated on the same generated letters, the report marks its rows "no"
+under "held out", and its gate is untested on real handwriting.
+
+Usage: python train_cascade.py [--epochs 8] [--report cascade_report.json]
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+import config
+import inference
+from cascade import CascadeModel, cascade_path_for
+from results import label_table
+from samples import has_held_out_split, load_samples
+
+TRAINING_SAMPLES = 20000
+EVALUATION_SAMPLES = 2000
+# (min_confidence, min_margin) settings compared in the report
+THRESHOLDS = ((0.8, 0.6), (0.9, 0.8), (0.95, 0.9), (0.99, 0.98))
+
+def build_first_stage(num_classes):
+    """2x2 max-pool, one 32-unit hidden layer and a softmax: about 7k weights against the full CNN's 225k"""
+    tf = inference.timed_import("tensorflow")
+
+    return tf.keras.Sequential([
+        tf.keras.layers.Input((28, 28, 1)),
+        tf.keras.layers.MaxPooling2D(2),
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(32, activation="relu"),
+        tf.keras.layers.Dense(num_classes, activation="softmax"),
+    ])
+
+def train_first_stage(h5_path, images, epochs):
+    """Distill a full model into a first stage and save it next to the .h5"""
+    full_model = inference.load_keras_model(h5_path, fast_path=False)
+    targets = full_model.predict(images, batch_size=256, verbose=0)
+
+    first_stage = build_first_stage(targets.shape[1])
+    first_stage.compile(optimizer="adam", loss="categorical_crossentropy")
+    first_stage.fit(images, targets, batch_size=128, epochs=epochs, verbose=0)
+    first_stage.save(cascade_path_for(h5_path))
+    return cascade_path_for(h5_path)
+
+def mean_latency_ms(model, images):
+    """Average single-image predict latency over `images`"""
+    start = time.perf_counter()
+    for image in images:
+        model.predict(image[None], verbose=0)
+    return (time.perf_counter() - start) / len(images) * 1000
+
+def evaluate(mode, model, first_stage, images, labels):
+    """Full-model baseline and one report row per threshold setting"""
+    table = label_table(mode, model.output_shape[-1])
+    reference = np.argmax(model.predict(images, verbose=0), axis=1)
+    rows = {"full": {
+        "hit_rate": 0.0,
+        "mean_ms": mean_latency_ms(model, images[:500]),
+        "accuracy": float(np.mean([table[p] == label for p, label in zip(reference, labels)])),
+        "agreement_with_full": 1.0,
+    }}
+    for min_confidence, min_margin in THRESHOLDS:
+        cascade = CascadeModel(first_stage, model, min_confidence, min_margin)
+        predicted = np.argmax(cascade.predict(images), axis=1)
+        hit_rate = cascade.hit_rate()
+        rows[f"cascade {min_confidence}/{min_margin}"] = {
+            "hit_rate": hit_rate,
+            "mean_ms": mean_latency_ms(cascade, images[:500]),
+            "accuracy": float(np.mean([table[p] == label for p, label in zip(predicted, labels)])),
+            "agreement_with_full": float(np.mean(predicted == reference)),
+        }
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--epochs", type=int, default=8, help="first-stage training epochs")
+    parser.add_argument("--report", help="also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = {}
+    print(f"{'model':<10}{'setting':<20}{'hit rate':>10}{'mean ms':>9}{'accuracy':>10}{'agree':>8}{'held out':>10}")
+    for mode, h5_path in config.MODEL_PATHS.items():
+        train_images, _ = load_samples(mode, "train", TRAINING_SAMPLES)
+        images, labels = load_samples(mode, "test", EVALUATION_SAMPLES)
+        cascade_path = train_first_stage(h5_path, train_images, args.epochs)
+
+        model = inference.load_backend_model(h5_path, config.MODE_BACKENDS[mode])
+        first_stage = inference.load_backend_model(cascade_path, config.CASCADE_BACKEND)
+        inference.warm_up(model)
+        report[mode] = evaluate(mode, model, first_stage, images, labels)
+
+        held_out = has_held_out_split(mode)
+        for setting, row in report[mode].items():
+            row["held_out"] = held_out
+            print(
+                f"{mode:<10}{setting:<20}{row['hit_rate']:>10.1%}{row['mean_ms']:>9.3f}"
+                f"{row['accuracy']:>10.1%}{row['agreement_with_full']:>8.1%}{'yes' if held_out else 'no':>10}"
+            )
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()